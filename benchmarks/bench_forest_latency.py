@@ -0,0 +1,95 @@
+"""
+Benchmark: single-reading prediction latency, sklearn vs. compiled forest.
+
+Trains IrrigationPredictor (DEFAULT_PARAMS) on noisy synthetic readings,
+exports it with compile() and times, per reading:
+    1. IrrigationPredictor.predict (dict -> sklearn)
+    2. CompiledForest.predict_one  (feature vector -> NumPy only)
+
+It also checks that both give identical predictions on a random batch.
+
+The readings span values outside the relay thresholds and a fraction
+(--noise) of the relay labels is flipped, so the trees grow to the
+configured depth as they do on real sensor data (the noiseless rule of
+generate_sample_data is learned by trees of depth 2). The tree depths are
+reported with the timings.
+
+Usage:
+    python benchmarks/bench_forest_latency.py [--samples 5000] [--repeat 2000] [--noise 0.1]
+"""
+import argparse
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'src'))
+
+import numpy as np
+import pandas as pd
+from ml_model import IrrigationPredictor
+
+def noisy_readings(n_samples, noise, seed=42):
+    """Readings one minute apart with the relay rule of main.cpp and noise flipped relay labels"""
+    rng = np.random.default_rng(seed)
+    data = pd.DataFrame({
+        'timestamp': pd.date_range('2024-01-01', periods=n_samples, freq='min'),
+        'humidity': rng.uniform(20, 90, n_samples),
+        'temperature': rng.uniform(5, 55, n_samples),
+        'light': rng.uniform(0, 800, n_samples),
+        'btn_p': rng.integers(0, 2, n_samples),
+        'btn_k': rng.integers(0, 2, n_samples)
+    })
+    relay = (
+        data['humidity'].between(30, 80) & data['temperature'].between(10, 50) &
+        (data['light'] <= 700) & ((data['btn_p'] == 1) | (data['btn_k'] == 1))
+    ).to_numpy()
+    data['relay_status'] = (relay ^ (rng.random(n_samples) < noise)).astype(int)
+    return data
+
+def time_per_call(func, args_list, repeat):
+    """Median latency in microseconds over repeat calls"""
+    timings = np.empty(repeat)
+    for i in range(repeat):
+        args = args_list[i % len(args_list)]
+        start = time.perf_counter()
+        func(args)
+        timings[i] = time.perf_counter() - start
+    return np.median(timings) * 1e6, np.percentile(timings, 99) * 1e6
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--samples', type=int, default=5000, help='training rows')
+    parser.add_argument('--repeat', type=int, default=2000, help='timed predictions per method')
+    parser.add_argument('--noise', type=float, default=0.1, help='fraction of flipped relay labels')
+    args = parser.parse_args()
+    
+    data = noisy_readings(args.samples, args.noise)
+    predictor = IrrigationPredictor()
+    predictor.train(data)
+    depths = [tree.get_depth() for tree in predictor.model.estimators_]
+    compiled = predictor.compile()
+    
+    readings = data[predictor.features].to_dict('records')[:500]
+    vectors = data[predictor.features].to_numpy(dtype=float)[:500]
+    
+    # Equivalence check on fresh random inputs
+    rng = np.random.default_rng(0)
+    X = np.column_stack([
+        rng.uniform(30, 80, 10000), rng.uniform(10, 50, 10000), rng.uniform(0, 700, 10000),
+        rng.integers(0, 2, 10000), rng.integers(0, 2, 10000)
+    ])
+    mismatches = int((predictor.predict_batch(X) != compiled.predict(X)).sum())
+    print(f"Trees: {compiled.n_trees}, nodes: {len(compiled.value)}, "
+          f"depth: mean {np.mean(depths):.1f}, max {compiled.max_depth} "
+          f"(max_depth={predictor.params.get('max_depth')})")
+    print(f"Mismatched predictions: {mismatches} / {len(X)}")
+    
+    sk_median, sk_p99 = time_per_call(predictor.predict, readings, args.repeat)
+    cf_median, cf_p99 = time_per_call(compiled.predict_one, vectors, args.repeat)
+    print(f"{'IrrigationPredictor.predict':<30} median {sk_median:>9.1f} us  p99 {sk_p99:>9.1f} us")
+    print(f"{'CompiledForest.predict_one':<30} median {cf_median:>9.1f} us  p99 {cf_p99:>9.1f} us")
+    print(f"Speedup: {sk_median / cf_median:.0f}x")
+    return 1 if mismatches else 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,71 @@
+"""
+Benchmark: current read path vs. get_readings_frame.
+
+Compares, over the same rows of sensor_data:
+    1. get_all_readings() -> pd.DataFrame -> IrrigationPredictor.prepare_data
+    2. get_readings_frame() -> IrrigationPredictor.prepare_data
+
+Usage:
+    python benchmarks/bench_frame_fetch.py                      # uses the rows already in the table
+    python benchmarks/bench_frame_fetch.py --rows 1000000       # inserts 1M synthetic rows first
+
+WARNING: --rows inserts into the sensor_data table configured in .env.
+"""
+import argparse
+import os
+import sys
+import time
+import tracemalloc
+from datetime import datetime, timedelta
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'src'))
+
+import pandas as pd
+from storage import generate_random_data, get_storage
+from ml_model import IrrigationPredictor
+
+def synthetic_readings(n_rows, start=datetime(2020, 1, 1)):
+    """Yield n_rows random readings one minute apart"""
+    for i in range(n_rows):
+        reading = generate_random_data()
+        reading['timestamp'] = start + timedelta(minutes=i)
+        yield reading
+
+def measure(label, func):
+    """Run func once, returning wall time and peak traced memory"""
+    tracemalloc.start()
+    start = time.perf_counter()
+    result = func()
+    elapsed = time.perf_counter() - start
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    print(f"{label:<45} {elapsed:>8.2f}s  peak {peak / 2**20:>8.1f} MiB  rows {len(result)}")
+    return elapsed, peak
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--rows', type=int, default=0, help='insert this many synthetic rows before measuring')
+    args = parser.parse_args()
+    
+    predictor = IrrigationPredictor()
+    with get_storage() as db:
+        if args.rows:
+            print(f"Inserting {args.rows} synthetic rows...")
+            db.insert_many(synthetic_readings(args.rows), batch_size=5000, commit_every=10)
+        
+        def current_path():
+            df = pd.DataFrame(db.get_all_readings())
+            return predictor.prepare_data(df)
+        
+        def frame_path():
+            return predictor.prepare_data(db.get_readings_frame())
+        
+        # Warm up the shared pool/statement cache so both paths start equal
+        db.get_readings(limit=1)
+        
+        old_time, old_peak = measure("get_all_readings + DataFrame + prepare_data", current_path)
+        new_time, new_peak = measure("get_readings_frame + prepare_data", frame_path)
+        print(f"\nSpeedup: {old_time / new_time:.1f}x, peak memory ratio: {old_peak / max(new_peak, 1):.1f}x")
+
+if __name__ == "__main__":
+    main()
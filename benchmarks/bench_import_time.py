@@ -0,0 +1,109 @@
+"""
+Benchmark: cold import time of the entry-point modules (python -X importtime).
+
+Imports each module in a fresh interpreter and reports its cumulative
+import time (best of --repeat runs) and the heaviest modules it pulls in.
+It also guards the lazy-loading rules, failing when:
+    - a module imports a dependency it must only load on demand
+      (e.g. database importing pandas, dashboard importing sklearn)
+    - importing a module writes to stdout (side effects at import time)
+    - a module is slower than its --budget
+
+ORACLE_HOME is removed from the environment of the children, so importing
+database must not depend on the Oracle Instant Client. Modules whose own
+dependencies are not installed (e.g. streamlit) are reported as skipped.
+
+Usage:
+    python benchmarks/bench_import_time.py [--repeat 5] [--top 5] [--budget database=150]
+"""
+import argparse
+import os
+import re
+import subprocess
+import sys
+
+SRC = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'src')
+
+# Module -> dependencies it must not import (loaded lazily, on first use)
+TARGETS = {
+    'storage': ('cx_Oracle', 'numpy', 'pandas', 'sklearn'),
+    'database': ('numpy', 'pandas', 'sklearn'),
+    'sqlite_storage': ('numpy', 'pandas', 'sklearn'),
+    'ingest': ('numpy', 'pandas', 'sklearn'),
+    'dashboard': ('ml_model', 'sklearn', 'plotly.express')
+}
+
+IMPORTTIME_LINE = re.compile(r"^import time:\s+(\d+) \|\s+(\d+) \|( *)(\S+)$")
+
+def profile(module):
+    """Import module in a fresh interpreter; returns (cumulative us, {name: cumulative us}, stdout, error)"""
+    env = dict(os.environ, PYTHONPATH=os.pathsep.join(filter(None, [SRC, os.getenv('PYTHONPATH')])))
+    env.pop('ORACLE_HOME', None)
+    result = subprocess.run(
+        [sys.executable, '-X', 'importtime', '-c', f"import {module}"],
+        cwd=SRC, env=env, capture_output=True, text=True
+    )
+    if result.returncode != 0:
+        return None, None, result.stdout, result.stderr.strip().splitlines()[-1]
+    imports = {}
+    for line in result.stderr.splitlines():
+        match = IMPORTTIME_LINE.match(line)
+        if match:
+            imports[match.group(4)] = int(match.group(2))
+    return imports.get(module), imports, result.stdout, None
+
+def parse_budgets(items):
+    budgets = {}
+    for item in items:
+        module, _, ms = item.partition('=')
+        budgets[module] = float(ms)
+    return budgets
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--repeat', type=int, default=5, help='runs per module (the best one is reported)')
+    parser.add_argument('--top', type=int, default=5, help='heaviest imports listed per module')
+    parser.add_argument('--budget', action='append', default=[], metavar='MODULE=MS',
+                        help='fail if MODULE takes longer than MS milliseconds to import (repeatable)')
+    parser.add_argument('modules', nargs='*', default=list(TARGETS), help='modules to measure')
+    args = parser.parse_args()
+    budgets = parse_budgets(args.budget)
+
+    failures = []
+    for module in args.modules:
+        best = imports = stdout = error = None
+        for _ in range(args.repeat):
+            total, run_imports, stdout, error = profile(module)
+            if error:
+                break
+            if best is None or total < best:
+                best, imports = total, run_imports
+        if error:
+            if 'ModuleNotFoundError' in error and f"'{module}'" not in error:
+                print(f"{module:<16} skipped ({error})")
+                continue
+            failures.append(f"{module}: import failed ({error})")
+            print(f"{module:<16} FAILED ({error})")
+            continue
+
+        ms = best / 1000
+        print(f"{module:<16} {ms:>9.1f} ms")
+        heaviest = sorted(((us, name) for name, us in imports.items() if name != module), reverse=True)
+        for us, name in heaviest[:args.top]:
+            print(f"    {name:<40} {us / 1000:>9.1f} ms")
+
+        forbidden = [name for name in TARGETS.get(module, ())
+                     if any(imported == name or imported.startswith(name + '.') for imported in imports)]
+        if forbidden:
+            failures.append(f"{module}: imports {', '.join(forbidden)} at import time")
+        if stdout:
+            failures.append(f"{module}: writes to stdout when imported ({stdout.strip().splitlines()[0]!r})")
+        if module in budgets and ms > budgets[module]:
+            failures.append(f"{module}: {ms:.1f} ms exceeds the {budgets[module]:.0f} ms budget")
+
+    for failure in failures:
+        print(f"FAIL {failure}")
+    return 1 if failures else 0
+
+if __name__ == "__main__":
+    sys.exit(main())
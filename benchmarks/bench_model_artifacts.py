@@ -0,0 +1,125 @@
+"""
+Benchmark: model artifact formats (load time, memory, size on disk).
+
+Trains IrrigationPredictor on synthetic data, saves it with every
+save_model format and loads each artifact in a fresh Python process,
+reporting:
+    - size on disk
+    - load_model time
+    - anonymous (private) and file-backed resident memory after load and
+      after one prediction (Linux /proc/self/status, RssAnon / RssFile)
+
+File-backed pages of the 'mmap' format are shared between processes, so
+several dashboard workers loading the same artifact only pay RssAnon each.
+Predictions of every format are checked against the trained model.
+
+Usage:
+    python benchmarks/bench_model_artifacts.py [--samples 20000] [--trees 200]
+"""
+import argparse
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'src'))
+
+import numpy as np
+
+FORMATS = {
+    'joblib': 'model.joblib',
+    'mmap': 'model.mmap',
+    'compressed': 'model.npz'
+}
+
+def memory_kb():
+    """RssAnon and RssFile of this process in kB (None outside Linux)"""
+    usage = {'RssAnon': None, 'RssFile': None}
+    try:
+        with open('/proc/self/status') as f:
+            for line in f:
+                name, _, value = line.partition(':')
+                if name in usage:
+                    usage[name] = int(value.split()[0])
+    except OSError:
+        pass
+    return usage
+
+def disk_size(path):
+    if os.path.isdir(path):
+        return sum(os.path.getsize(os.path.join(path, name)) for name in os.listdir(path))
+    return os.path.getsize(path)
+
+def child(path, inputs_path):
+    """Load one artifact and report timings/memory as JSON on stdout"""
+    from ml_model import IrrigationPredictor
+    X = np.load(inputs_path)
+    before = memory_kb()
+    start = time.perf_counter()
+    predictor = IrrigationPredictor()
+    predictor.load_model(path)
+    load_seconds = time.perf_counter() - start
+    loaded = memory_kb()
+    predictions = predictor.predict_batch(X)
+    predicted = memory_kb()
+    print(json.dumps({
+        'load_ms': load_seconds * 1000,
+        'before': before,
+        'loaded': loaded,
+        'predicted': predicted,
+        'predictions': predictions.tolist()
+    }))
+
+def delta(after, before, name):
+    if after[name] is None or before[name] is None:
+        return 'n/a'
+    return f"{(after[name] - before[name]) / 1024:.1f}"
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--samples', type=int, default=20000, help='training rows')
+    parser.add_argument('--trees', type=int, default=200, help='trees in the forest')
+    parser.add_argument('--child', nargs=2, metavar=('ARTIFACT', 'INPUTS'), help=argparse.SUPPRESS)
+    args = parser.parse_args()
+    if args.child:
+        child(*args.child)
+        return 0
+
+    from ml_model import IrrigationPredictor, generate_sample_data
+    data = generate_sample_data(args.samples)
+    predictor = IrrigationPredictor(params={'n_estimators': args.trees})
+    predictor.train(data)
+    X = data[predictor.features].to_numpy(dtype=float)[:1000]
+    expected = predictor.predict_batch(X)
+
+    mismatches = 0
+    with tempfile.TemporaryDirectory(prefix='irrigation_artifacts_') as directory:
+        inputs_path = os.path.join(directory, 'inputs.npy')
+        np.save(inputs_path, X)
+        print(f"{'format':<12}{'disk MB':>10}{'save ms':>10}{'load ms':>10}"
+              f"{'anon MB':>10}{'file MB':>10}{'anon MB*':>10}{'file MB*':>10}")
+        for format, name in FORMATS.items():
+            path = os.path.join(directory, name)
+            start = time.perf_counter()
+            predictor.save_model(path, format=format)
+            save_ms = (time.perf_counter() - start) * 1000
+
+            output = subprocess.run(
+                [sys.executable, os.path.abspath(__file__), '--child', path, inputs_path],
+                check=True, capture_output=True, text=True
+            ).stdout
+            result = json.loads(output.strip().splitlines()[-1])
+            mismatches += int((np.array(result['predictions']) != expected).sum())
+            before, loaded, predicted = result['before'], result['loaded'], result['predicted']
+            print(f"{format:<12}{disk_size(path) / 2**20:>10.2f}{save_ms:>10.1f}{result['load_ms']:>10.1f}"
+                  f"{delta(loaded, before, 'RssAnon'):>10}{delta(loaded, before, 'RssFile'):>10}"
+                  f"{delta(predicted, before, 'RssAnon'):>10}{delta(predicted, before, 'RssFile'):>10}")
+
+    print("(* = after one predict_batch of 1000 rows)")
+    print(f"Mismatched predictions: {mismatches}")
+    return 1 if mismatches else 0
+
+if __name__ == "__main__":
+    sys.exit(main())
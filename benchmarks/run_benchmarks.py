@@ -0,0 +1,223 @@
+"""
+Benchmark suite: ingest, query, feature preparation, training, prediction,
+charting and daily statistics, at several table sizes.
+
+Runs against the embedded SQLite backend (a temporary database file, no
+Oracle needed) seeded with synthetic readings, one per minute. For every
+size it times:
+    insert_single      insert_sensor_data, one commit per reading
+                       (on the first --single-rows readings only)
+    insert_many        bulk insert of every row (also seeds the table)
+    get_all_readings   full table as a list of dicts
+    get_readings_frame full table as typed NumPy columns
+    prepare_data       IrrigationPredictor.prepare_data on the full table
+    train              IrrigationPredictor.train (on at most --train-rows rows)
+    predict            IrrigationPredictor.predict, one reading (median latency)
+    predict_batch      IrrigationPredictor.predict_batch on the full table
+    sensor_chart       dashboard.create_sensor_chart (needs streamlit installed)
+    daily_stats        aggregate(bucket='day'), as the dashboard's daily statistics
+
+Each step is run --repeat times and the best time is kept. Results are
+written as JSON (--output); with --baseline they are compared to a stored
+run, and steps slower than the baseline by more than --threshold are
+reported as regressions (exit status 1).
+
+Usage:
+    python benchmarks/run_benchmarks.py                                  # 10k, 100k and 1M rows
+    python benchmarks/run_benchmarks.py --sizes 10000 --output results.json
+    python benchmarks/run_benchmarks.py --baseline benchmarks/baseline.json --threshold 0.2
+"""
+import argparse
+import json
+import os
+import platform
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'src'))
+
+import numpy as np
+from sqlite_storage import SQLiteStorage
+from storage import INSERT_COLUMNS
+from ml_model import IrrigationPredictor
+
+DEFAULT_SIZES = (10000, 100000, 1000000)
+
+def synthetic_rows(n_rows, seed=42, start=datetime(2023, 1, 1)):
+    """n_rows readings one minute apart, as insert_many tuples (relay as in main.cpp)"""
+    rng = np.random.default_rng(seed)
+    humidity = rng.uniform(20, 90, n_rows).round(2)
+    temperature = rng.uniform(5, 55, n_rows).round(2)
+    light = rng.uniform(0, 800, n_rows).round(2)
+    btn_p = rng.integers(0, 2, n_rows)
+    btn_k = rng.integers(0, 2, n_rows)
+    relay = ((humidity >= 30) & (humidity <= 80) & (temperature >= 10) & (temperature <= 50) &
+             (light <= 700) & ((btn_p == 1) | (btn_k == 1))).astype(int)
+    stamps = [start + timedelta(minutes=i) for i in range(n_rows)]
+    return list(zip(stamps, humidity.tolist(), temperature.tolist(), light.tolist(),
+                    btn_p.tolist(), btn_k.tolist(), relay.tolist()))
+
+def best_of(func, repeat):
+    """Run func repeat times; returns (best seconds, last result)"""
+    best = float('inf')
+    result = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = func()
+        best = min(best, time.perf_counter() - start)
+    return best, result
+
+def load_chart_function():
+    """dashboard.create_sensor_chart, or the reason it cannot be imported"""
+    try:
+        from dashboard import add_derived_columns, create_sensor_chart
+        return (add_derived_columns, create_sensor_chart), None
+    except ImportError as error:
+        return None, str(error)
+
+def run_size(n_rows, args, chart):
+    """Run every step on a fresh table of n_rows readings; returns {step: result}"""
+    results = {}
+
+    def record(step, seconds, rows, **extra):
+        results[step] = dict(seconds=seconds, rows=rows,
+                             rows_per_second=rows / seconds if seconds > 0 else None, **extra)
+        print(f"  {step:<20}{seconds * 1000:>12.1f} ms{rows:>12} rows")
+
+    rows = synthetic_rows(n_rows, seed=args.seed)
+    with tempfile.TemporaryDirectory(prefix='irrigation_bench_') as directory:
+        path = os.path.join(directory, 'bench.db')
+
+        # Row by row: a fresh table each repeat, the best run kept
+        single = rows[:min(args.single_rows, n_rows)]
+        def insert_single():
+            with SQLiteStorage(path) as db:
+                db.delete_all_readings()
+                for row in single:
+                    db.insert_sensor_data(**dict(zip(INSERT_COLUMNS[1:], row[1:])), timestamp=row[0])
+        seconds, _ = best_of(insert_single, args.repeat)
+        record('insert_single', seconds, len(single))
+
+        with SQLiteStorage(path) as db:
+            def insert_many():
+                db.delete_all_readings()
+                db.insert_many(rows, batch_size=5000, commit_every=0)
+            seconds, _ = best_of(insert_many, args.repeat)
+            record('insert_many', seconds, n_rows)
+
+            seconds, readings = best_of(db.get_all_readings, args.repeat)
+            record('get_all_readings', seconds, len(readings))
+            del readings
+
+            seconds, frame = best_of(db.get_readings_frame, args.repeat)
+            record('get_readings_frame', seconds, len(frame))
+
+            predictor = IrrigationPredictor(params={'n_estimators': args.trees})
+            ml_frame = frame.rename(columns=str.lower)
+            seconds, prepared = best_of(lambda: predictor.prepare_data(ml_frame), args.repeat)
+            record('prepare_data', seconds, len(prepared))
+
+            train_frame = ml_frame.iloc[-args.train_rows:]
+            seconds, metrics = best_of(lambda: predictor.train(train_frame), args.repeat)
+            record('train', seconds, len(train_frame), trees=args.trees, r2=metrics['r2'])
+
+            readings = ml_frame[predictor.features].iloc[:200].to_dict('records')
+            latencies = []
+            for reading in readings:
+                start = time.perf_counter()
+                predictor.predict(reading)
+                latencies.append(time.perf_counter() - start)
+            record('predict', float(np.median(latencies)), 1, p99_seconds=float(np.percentile(latencies, 99)))
+
+            seconds, predictions = best_of(lambda: predictor.predict_batch(ml_frame), args.repeat)
+            record('predict_batch', seconds, len(predictions))
+
+            if chart is not None:
+                add_derived_columns, create_sensor_chart = chart
+                chart_frame = add_derived_columns(frame)
+                seconds, _ = best_of(
+                    lambda: create_sensor_chart(chart_frame, 'TEMPERATURE', '#ff4b4b', 'Temperature (°C)'),
+                    args.repeat
+                )
+                record('sensor_chart', seconds, len(chart_frame))
+
+            seconds, stats = best_of(lambda: db.aggregate(bucket='day'), args.repeat)
+            record('daily_stats', seconds, int(stats['READINGS'].sum()), buckets=len(stats))
+    return results
+
+def compare(results, baseline, threshold, min_seconds):
+    """Print current vs. baseline per step; returns the regressed keys"""
+    regressions = []
+    print(f"\n{'step':<32}{'baseline ms':>14}{'current ms':>14}{'change':>10}")
+    for key, current in results.items():
+        previous = baseline.get(key)
+        if previous is None:
+            print(f"{key:<32}{'-':>14}{current['seconds'] * 1000:>14.1f}{'new':>10}")
+            continue
+        change = current['seconds'] / previous['seconds'] - 1 if previous['seconds'] > 0 else 0.0
+        regressed = change > threshold and current['seconds'] - previous['seconds'] > min_seconds
+        flag = '  REGRESSION' if regressed else ''
+        print(f"{key:<32}{previous['seconds'] * 1000:>14.1f}{current['seconds'] * 1000:>14.1f}"
+              f"{change:>+10.1%}{flag}")
+        if regressed:
+            regressions.append(key)
+    return regressions
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--sizes', type=int, nargs='+', default=list(DEFAULT_SIZES), help='table sizes (rows)')
+    parser.add_argument('--repeat', type=int, default=3, help='runs per step (the best one is kept)')
+    parser.add_argument('--single-rows', type=int, default=1000, help='readings inserted one by one')
+    parser.add_argument('--train-rows', type=int, default=100000, help='maximum training rows')
+    parser.add_argument('--trees', type=int, default=100, help='trees in the forest')
+    parser.add_argument('--seed', type=int, default=42, help='seed of the synthetic readings')
+    parser.add_argument('--output', default=None, help='write the results to this JSON file')
+    parser.add_argument('--baseline', default=None, help='JSON results of a previous run to compare against')
+    parser.add_argument('--threshold', type=float, default=0.2,
+                        help='relative slowdown reported as a regression (0.2 = 20%%)')
+    parser.add_argument('--min-ms', type=float, default=5.0,
+                        help='ignore slowdowns smaller than this many milliseconds (timer noise)')
+    args = parser.parse_args()
+
+    chart, reason = load_chart_function()
+    if chart is None:
+        print(f"sensor_chart skipped: {reason}")
+
+    results = {}
+    for n_rows in args.sizes:
+        print(f"{n_rows} rows")
+        for step, result in run_size(n_rows, args, chart).items():
+            results[f"{step}@{n_rows}"] = result
+
+    report = {
+        'meta': {
+            'created': datetime.now().isoformat(timespec='seconds'),
+            'python': platform.python_version(),
+            'platform': platform.platform(),
+            'backend': 'sqlite',
+            'sizes': args.sizes,
+            'repeat': args.repeat,
+            'train_rows': args.train_rows,
+            'trees': args.trees,
+            'seed': args.seed
+        },
+        'results': results
+    }
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(report, f, indent=2)
+        print(f"Results written to {args.output}")
+
+    if args.baseline:
+        with open(args.baseline) as f:
+            baseline = json.load(f)
+        regressions = compare(results, baseline['results'], args.threshold, args.min_ms / 1000)
+        if regressions:
+            print(f"{len(regressions)} regressions over {args.threshold:.0%}: {', '.join(regressions)}")
+            return 1
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,387 @@
+import os
+import json
+import argparse
+from datetime import datetime, date, timedelta
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+import pyarrow.compute as pc
+import pyarrow.ipc as ipc
+import pyarrow.parquet as pq
+from storage import (
+    READING_COLUMNS, AGGREGATE_SENSORS, AGGREGATE_INTERVALS, aggregate_columns, get_storage, page_readings
+)
+
+# Columns of the archived readings. Sensors keep NULL as NaN (not as an Arrow
+# null), so every column is a plain buffer that NumPy/pandas can map as is.
+SCHEMA = pa.schema([
+    ('id', pa.int64()),
+    ('timestamp', pa.timestamp('us')),
+    ('humidity', pa.float64()),
+    ('temperature', pa.float64()),
+    ('light', pa.float64()),
+    ('btn_p', pa.int8()),
+    ('btn_k', pa.int8()),
+    ('relay_status', pa.int8())
+])
+
+# 'arrow': uncompressed Arrow IPC files, memory-mapped and read without copies.
+# 'parquet': compressed (smaller on disk), decoded into memory on read.
+ARCHIVE_FORMATS = {'arrow': 'readings.arrow', 'parquet': 'readings.parquet'}
+MANIFEST_FILE = 'manifest.json'
+PARTITION_PREFIX = 'date='
+
+ONE_DAY = timedelta(days=1)
+ONE_MICROSECOND = timedelta(microseconds=1)
+
+def _day_start(value):
+    """Midnight of the day of value (a date, datetime or pandas Timestamp)"""
+    if isinstance(value, datetime):
+        value = value.date()
+    return datetime.combine(value, datetime.min.time())
+
+def table_from_frame(frame):
+    """Arrow table (SCHEMA) from a get_readings_frame DataFrame, sorted by timestamp"""
+    frame = frame.sort_values('TIMESTAMP', kind='stable')
+    arrays = []
+    for field in SCHEMA:
+        values = frame[field.name.upper()].to_numpy()
+        if field.name == 'timestamp':
+            values = values.astype('datetime64[us]')
+        arrays.append(pa.array(values, type=field.type))
+    return pa.Table.from_arrays(arrays, schema=SCHEMA)
+
+class ReadingArchive:
+    """
+    Columnar archive of closed days of readings, one file per day under
+    <directory>/date=YYYY-MM-DD/ (Hive-style partitions).
+
+    compact() copies the closed days from the database; read() memory-maps
+    the files of a time window and returns an Arrow table whose columns
+    point into the mapped files (format 'arrow'). load_history() joins the
+    archive with the live tail still in the database.
+
+    manifest.json records the rows and file of every archived day; it is
+    rewritten atomically after each day, so an interrupted compaction only
+    repeats the day in progress. A manifest rewritten by another process
+    (e.g. `archive.py compact --purge` while the dashboard runs) is reloaded
+    on the next read.
+    """
+
+    def __init__(self, directory=None, format=None):
+        self.directory = directory or os.getenv('ARCHIVE_DIR') or 'data/archive'
+        self.format = format or os.getenv('ARCHIVE_FORMAT') or 'arrow'
+        if self.format not in ARCHIVE_FORMATS:
+            raise ValueError(f"format must be one of {list(ARCHIVE_FORMATS)}")
+        self.manifest_version = None  # (inode, mtime) of the manifest.json loaded
+        self.manifest = self._load_manifest()
+
+    def _manifest_stat(self):
+        try:
+            stat = os.stat(os.path.join(self.directory, MANIFEST_FILE))
+        except FileNotFoundError:
+            return None
+        return stat.st_ino, stat.st_mtime_ns
+
+    def _load_manifest(self):
+        self.manifest_version = self._manifest_stat()
+        try:
+            with open(os.path.join(self.directory, MANIFEST_FILE)) as f:
+                return json.load(f)
+        except (FileNotFoundError, ValueError):
+            return {}
+
+    def reload(self):
+        """Re-read manifest.json if it changed on disk since it was loaded"""
+        if self._manifest_stat() != self.manifest_version:
+            self.manifest = self._load_manifest()
+
+    def _save_manifest(self):
+        path = os.path.join(self.directory, MANIFEST_FILE)
+        tmp_path = path + '.tmp'
+        with open(tmp_path, 'w') as f:
+            json.dump(self.manifest, f, indent=1, sort_keys=True)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, path)
+        self.manifest_version = self._manifest_stat()
+
+    def path_for(self, day, format=None):
+        return os.path.join(self.directory, f"{PARTITION_PREFIX}{day.isoformat()}",
+                            ARCHIVE_FORMATS[format or self.format])
+
+    def days(self):
+        """Archived days, oldest first"""
+        self.reload()
+        return [date.fromisoformat(day) for day in sorted(self.manifest)]
+
+    def archived_until(self):
+        """Midnight after the newest archived day (None if the archive is empty)"""
+        days = self.days()
+        return _day_start(days[-1]) + ONE_DAY if days else None
+
+    def stats(self):
+        self.reload()
+        return {
+            'days': len(self.manifest),
+            'rows': sum(entry['rows'] for entry in self.manifest.values()),
+            'bytes': sum(entry['bytes'] for entry in self.manifest.values()),
+            'archived_until': self.archived_until()
+        }
+
+    def write_day(self, day, table, source_rows=None):
+        """
+        Write one day's table atomically (replacing the previous file) and
+        record it in the manifest; source_rows is the day's row count in the
+        database, compared by the next compact().
+        """
+        path = self.path_for(day)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        tmp_path = path + '.tmp'
+        if self.format == 'arrow':
+            with pa.OSFile(tmp_path, 'wb') as sink, ipc.new_file(sink, SCHEMA) as writer:
+                # A single record batch keeps every column contiguous (one chunk)
+                writer.write_table(table, max_chunksize=max(len(table), 1))
+        else:
+            pq.write_table(table, tmp_path, compression='zstd')
+        with open(tmp_path, 'rb') as f:
+            os.fsync(f.fileno())
+        os.replace(tmp_path, path)
+
+        previous = self.manifest.get(day.isoformat())
+        if previous and previous['file'] != os.path.basename(path):
+            # Day rewritten in another format
+            try:
+                os.remove(os.path.join(os.path.dirname(path), previous['file']))
+            except FileNotFoundError:
+                pass
+        self.manifest[day.isoformat()] = {
+            'rows': len(table),
+            'bytes': os.path.getsize(path),
+            'source_rows': len(table) if source_rows is None else int(source_rows),
+            'file': os.path.basename(path),
+            'max_id': pc.max(table.column('id')).as_py() if len(table) else 0
+        }
+        self._save_manifest()
+
+    def read_day(self, day, columns=None):
+        """Table of one archived day (memory-mapped; None if not archived)"""
+        self.reload()
+        entry = self.manifest.get(day.isoformat())
+        if entry is None:
+            return None
+        path = os.path.join(os.path.dirname(self.path_for(day)), entry['file'])
+        if entry['file'] == ARCHIVE_FORMATS['arrow']:
+            # The mapping stays open as long as the table's buffers are referenced
+            table = ipc.open_file(pa.memory_map(path, 'r')).read_all()
+            return table.select(columns) if columns else table
+        return pq.read_table(path, columns=columns, memory_map=True)
+
+    def compact(self, db, until=None, purge=False, force=False):
+        """
+        Copy the closed days (before until, default today's midnight) from the
+        database into the archive.
+
+        A day is (re)written when its row count in the database changed since
+        it was archived (new day, late readings), or with force. Rows already
+        archived for that day are kept and merged by id, the database copy
+        winning. With purge, the archived days are then deleted from the
+        database (delete_range), leaving only the live tail there.
+
+        Returns a dict with the days written, rows archived and rows purged.
+        """
+        until = _day_start(until or datetime.now())
+        self.reload()
+        counts = db.aggregate(bucket='day', until=until - ONE_MICROSECOND)['READINGS']
+        written = []
+        rows = 0
+        for bucket, count in counts.items():
+            day = pd.Timestamp(bucket).date()
+            entry = self.manifest.get(day.isoformat())
+            if not count or (entry and entry['source_rows'] == count and not purge and not force):
+                continue
+            since = _day_start(day)
+            frame = db.get_readings_frame(since=since, until=since + ONE_DAY - ONE_MICROSECOND)
+            table = table_from_frame(frame)
+            if entry is not None:
+                table = self._merge(self.read_day(day), table)
+            self.write_day(day, table, source_rows=count)
+            written.append(day)
+            rows += len(frame)
+
+        purged = 0
+        if purge and written:
+            result = db.delete_range(since=_day_start(written[0]), until=_day_start(written[-1]) + ONE_DAY)
+            purged = result['rows']
+        return {'days': written, 'rows': rows, 'purged': purged}
+
+    @staticmethod
+    def _merge(archived, fresh):
+        """Union of two tables of the same day by id (rows of fresh replace archived ones)"""
+        keep = ~np.isin(archived.column('id').to_numpy(), fresh.column('id').to_numpy())
+        merged = pa.concat_tables([archived.filter(pa.array(keep)), fresh]).combine_chunks()
+        order = np.argsort(merged.column('timestamp').to_numpy(), kind='stable')
+        return merged.take(pa.array(order))
+
+    def read(self, since=None, until=None, columns=None):
+        """
+        Archived readings with since <= timestamp <= until as an Arrow table.
+
+        Only the files of the days in the window are opened; each is sliced
+        (without copying) to the window with a binary search on its sorted
+        timestamps. With the 'arrow' format the columns are views of the
+        memory-mapped files.
+        """
+        if columns is None:
+            columns = list(READING_COLUMNS)
+        columns = [column.lower() for column in columns]
+        invalid = [column for column in columns if column not in SCHEMA.names]
+        if invalid:
+            raise ValueError(f"Invalid columns: {invalid}")
+
+        tables = []
+        for day in self.days():
+            if since is not None and _day_start(day) + ONE_DAY <= since:
+                continue
+            if until is not None and _day_start(day) > until:
+                break
+            table = self.read_day(day, columns=sorted(set(columns) | {'timestamp'}, key=SCHEMA.names.index))
+            stamps = table.column('timestamp').to_numpy()
+            start = 0 if since is None else np.searchsorted(stamps, np.datetime64(since, 'us'), 'left')
+            stop = len(stamps) if until is None else np.searchsorted(stamps, np.datetime64(until, 'us'), 'right')
+            if stop > start:
+                tables.append(table.slice(start, stop - start).select(columns))
+        if not tables:
+            return SCHEMA.empty_table().select(columns)
+        return pa.concat_tables(tables)
+
+    def frame(self, since=None, until=None, columns=None):
+        """read() as a pandas DataFrame with the column names and dtypes of get_readings_frame"""
+        table = self.read(since, until, columns)
+        table = table.rename_columns([name.upper() for name in table.column_names])
+        # split_blocks: one block per column, so single-chunk columns are not copied
+        # (but TIMESTAMP, converted to datetime64[ns] like get_readings_frame)
+        return table.to_pandas(split_blocks=True, coerce_temporal_nanoseconds=True)
+
+    def readings(self, since=None, until=None, columns=None, limit=None, descending=False, seek=None):
+        """
+        Archived readings as SensorStorage.get_readings returns them (list of
+        dicts, NULL as None), ordered by (timestamp, id); seek is the keyset of
+        get_page
+        """
+        frame = self.frame(since, until, columns)
+        keys = np.lexsort((frame['ID'].to_numpy(), frame['TIMESTAMP'].to_numpy()))
+        if descending:
+            keys = keys[::-1]
+        frame = frame.take(keys)
+        if seek is not None:
+            stamp, seek_id = pd.Timestamp(seek[0]), int(seek[1])
+            if descending:
+                past = (frame['TIMESTAMP'] < stamp) | ((frame['TIMESTAMP'] == stamp) & (frame['ID'] < seek_id))
+            else:
+                past = (frame['TIMESTAMP'] > stamp) | ((frame['TIMESTAMP'] == stamp) & (frame['ID'] > seek_id))
+            frame = frame[past]
+        if limit is not None:
+            frame = frame.head(limit)
+        rows = frame.astype(object).where(frame.notna(), None).to_dict('records')
+        for row in rows:
+            if row.get('TIMESTAMP') is not None:
+                row['TIMESTAMP'] = row['TIMESTAMP'].to_pydatetime()
+        return rows
+
+    def aggregate(self, bucket='day', since=None, until=None):
+        """Per-day or per-hour statistics of the archived readings (the DataFrame of SensorStorage.aggregate)"""
+        if bucket not in AGGREGATE_INTERVALS:
+            raise ValueError(f"bucket must be one of {list(AGGREGATE_INTERVALS)}")
+        sensors = [sensor.upper() for sensor in AGGREGATE_SENSORS]
+        frame = self.frame(since, until, ['timestamp'] + list(AGGREGATE_SENSORS) + ['relay_status'])
+        groups = frame.groupby(frame['TIMESTAMP'].dt.floor('D' if bucket == 'day' else 'h').rename('BUCKET'))
+        stats = groups[sensors].agg(['mean', 'min', 'max', 'std'])
+        stats.columns = [f"{sensor}_{suffix}" for sensor, suffix in stats.columns]
+        stats['READINGS'] = groups.size()
+        relay = groups['RELAY_STATUS']
+        stats['RELAY_STATUS_mean'] = relay.mean()
+        stats['RELAY_STATUS_sum'] = relay.sum().astype('float64')
+        return stats[aggregate_columns()[1:]]
+
+def load_history(db, archive, since=None, until=None, columns=None):
+    """
+    Readings of [since, until] from the archive plus the live tail from the
+    database (rows from archive.archived_until() on), as one DataFrame in the
+    format of get_readings_frame. Late readings of archived days show up
+    after the next compaction.
+    """
+    boundary = archive.archived_until() if archive is not None else None
+    if boundary is None or (since is not None and since >= boundary):
+        return db.get_readings_frame(since=since, until=until, columns=columns)
+    if until is not None and until < boundary:
+        return archive.frame(since, until, columns)
+    archived = archive.frame(since, boundary - ONE_MICROSECOND, columns)
+    live = db.get_readings_frame(since=boundary, until=until, columns=columns)
+    return pd.concat([archived, live], ignore_index=True) if len(live) else archived
+
+def load_page(db, archive, page_size=20, after=None, before=None, since=None, until=None, columns=None,
+              descending=True):
+    """
+    db.get_page over the archive plus the live tail, split at
+    archive.archived_until() like load_history
+    """
+    boundary = archive.archived_until() if archive is not None else None
+    if boundary is None or (since is not None and since >= boundary):
+        return db.get_page(page_size, after, before, since, until, columns, descending)
+
+    def get_readings(since, until, columns, limit, descending, seek):
+        archived_until = boundary - ONE_MICROSECOND if until is None or until >= boundary else until
+        parts = [
+            lambda limit: archive.readings(since, archived_until, columns, limit, descending, seek),
+            lambda limit: db.get_readings(max(since or boundary, boundary), until, columns, limit=limit,
+                                          descending=descending, seek=seek)
+        ]
+        if until is not None and until < boundary:
+            parts = parts[:1]
+        rows = []
+        # Newest first starts from the live tail, oldest first from the archive
+        for part in (parts[::-1] if descending else parts):
+            rows += part(limit - len(rows))
+            if len(rows) >= limit:
+                break
+        return rows
+
+    return page_readings(get_readings, page_size, after, before, since, until, columns, descending)
+
+def load_aggregate(db, archive, bucket='day', since=None, until=None):
+    """db.aggregate over the archive plus the live tail, split at archive.archived_until()"""
+    boundary = archive.archived_until() if archive is not None else None
+    if boundary is None or (since is not None and since >= boundary):
+        return db.aggregate(bucket=bucket, since=since, until=until)
+    if until is not None and until < boundary:
+        return archive.aggregate(bucket, since, until)
+    archived = archive.aggregate(bucket, since, boundary - ONE_MICROSECOND)
+    live = db.aggregate(bucket=bucket, since=boundary, until=until)
+    return pd.concat([archived, live]) if len(live) else archived
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Columnar archive of closed days of sensor readings")
+    parser.add_argument('command', choices=('compact', 'info'), help='copy closed days to the archive, or show it')
+    parser.add_argument('--directory', default=None, help='archive directory (default: ARCHIVE_DIR or data/archive)')
+    parser.add_argument('--format', choices=list(ARCHIVE_FORMATS), default=None,
+                        help='file format of newly written days (default: ARCHIVE_FORMAT or arrow)')
+    parser.add_argument('--until', type=date.fromisoformat, default=None,
+                        help='archive days before this date (ISO format, default: today)')
+    parser.add_argument('--purge', action='store_true', help='delete the archived days from the database')
+    parser.add_argument('--force', action='store_true', help='rewrite days even if their row count did not change')
+    return parser.parse_args(argv)
+
+def main(argv=None):
+    args = parse_args(argv)
+    archive = ReadingArchive(args.directory, args.format)
+    if args.command == 'compact':
+        with get_storage() as db:
+            result = archive.compact(db, until=args.until, purge=args.purge, force=args.force)
+        print(f"{len(result['days'])} days archived ({result['rows']} rows), {result['purged']} rows purged")
+    stats = archive.stats()
+    print(f"{archive.directory}: {stats['days']} days, {stats['rows']} rows, "
+          f"{stats['bytes'] / 2**20:.1f} MiB, archived until {stats['archived_until']}")
+
+if __name__ == "__main__":
+    main()
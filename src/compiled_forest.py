@@ -0,0 +1,182 @@
+import os
+import json
+import numpy as np
+
+# Array files that make up a compiled forest on disk
+ARRAY_NAMES = ('feature', 'threshold', 'left', 'right', 'value', 'roots')
+
+class CompiledForest:
+    """
+    Flattened random forest evaluated with NumPy only (no sklearn import).
+
+    All trees live in contiguous node arrays; leaves point to themselves so
+    every tree can be walked for a fixed number of levels at once. Thresholds
+    are stored so that "x <= threshold" on the float64 inputs reproduces
+    sklearn's float32 comparison exactly, with the StandardScaler optionally
+    folded in (then the inputs are raw sensor values).
+    """
+
+    def __init__(self, feature, threshold, left, right, value, roots, max_depth,
+                 features, scaler_folded):
+        self.feature = feature
+        self.threshold = threshold
+        self.left = left
+        self.right = right
+        self.value = value
+        self.roots = roots
+        self.max_depth = int(max_depth)
+        self.features = list(features)
+        self.scaler_folded = bool(scaler_folded)
+
+    @property
+    def n_trees(self):
+        return len(self.roots)
+
+    def predict(self, X, chunk_size=10000):
+        """Predict a batch (rows x features); same result as the sklearn forest"""
+        X = np.array(X, dtype=np.float64, ndmin=2)
+        out = np.empty(len(X))
+        for start in range(0, len(X), chunk_size):
+            block = X[start:start + chunk_size]
+            rows = np.arange(len(block))[:, None]
+            nodes = np.broadcast_to(self.roots, (len(block), self.n_trees))
+            for _ in range(self.max_depth):
+                go_left = block[rows, self.feature[nodes]] <= self.threshold[nodes]
+                nodes = np.where(go_left, self.left[nodes], self.right[nodes])
+            # Sum tree by tree (cumsum is sequential), then average, as sklearn does
+            out[start:start + chunk_size] = np.cumsum(self.value[nodes], axis=1)[:, -1] / self.n_trees
+        return out
+
+    def predict_one(self, x):
+        """Predict a single reading given as a feature vector"""
+        x = np.asarray(x, dtype=np.float64)
+        nodes = self.roots
+        for _ in range(self.max_depth):
+            nodes = np.where(x[self.feature[nodes]] <= self.threshold[nodes], self.left[nodes], self.right[nodes])
+        return float(np.cumsum(self.value[nodes])[-1] / self.n_trees)
+
+    def predict_reading(self, reading):
+        """Predict a single reading given as a dict of raw sensor values"""
+        return self.predict_one([reading[feature] for feature in self.features])
+
+    def manifest(self):
+        """Scalar settings needed (with the arrays) to rebuild the forest"""
+        return {
+            'max_depth': self.max_depth,
+            'features': self.features,
+            'scaler_folded': self.scaler_folded
+        }
+
+    def arrays(self):
+        return {name: getattr(self, name) for name in ARRAY_NAMES}
+
+    def save(self, directory):
+        """Write the arrays as .npy files (memory-mappable) plus a JSON manifest"""
+        os.makedirs(directory, exist_ok=True)
+        for name, array in self.arrays().items():
+            np.save(os.path.join(directory, f"{name}.npy"), array)
+        with open(os.path.join(directory, 'forest.json'), 'w') as f:
+            json.dump(self.manifest(), f)
+
+    @classmethod
+    def load(cls, directory, mmap_mode='r'):
+        """Load a saved forest; with mmap_mode='r' the arrays are shared read-only pages"""
+        with open(os.path.join(directory, 'forest.json')) as f:
+            manifest = json.load(f)
+        arrays = {
+            name: np.load(os.path.join(directory, f"{name}.npy"), mmap_mode=mmap_mode)
+            for name in ARRAY_NAMES
+        }
+        return cls(**arrays, **manifest)
+
+def _ordered_keys(values):
+    """Map float64 values to int64 keys with the same ordering"""
+    bits = values.view(np.int64)
+    return np.where(bits < 0, -(bits & 0x7FFFFFFFFFFFFFFF), bits)
+
+def _from_ordered_keys(keys):
+    """Inverse of _ordered_keys"""
+    bits = np.where(keys < 0, (-keys) | np.int64(-0x8000000000000000), keys)
+    return bits.view(np.float64)
+
+def exact_thresholds(threshold, mean, scale):
+    """
+    Raw-space thresholds equivalent to sklearn's split test.
+
+    sklearn scales the input in float64, casts it to float32 and tests
+    "float32((x - mean) / scale) <= threshold". That test is monotonic in x,
+    so it is equivalent to "x <= t" for the largest float64 t that passes;
+    t is found by bisection over the ordered bit patterns of float64.
+    """
+    threshold = np.asarray(threshold, dtype=np.float64)
+    mean = np.asarray(mean, dtype=np.float64)
+    scale = np.asarray(scale, dtype=np.float64)
+
+    def passes(x):
+        return ((x - mean) / scale).astype(np.float32).astype(np.float64) <= threshold
+
+    guess = threshold * scale + mean
+    delta = scale * (np.abs(threshold) + 1) * 1e-6 + np.abs(guess) * 1e-12
+    lo, hi = guess - delta, guess + delta
+    # Widen until lo passes and hi fails
+    for _ in range(64):
+        bad = ~passes(lo) | passes(hi)
+        if not bad.any():
+            break
+        delta = np.where(bad, delta * 4, delta)
+        lo, hi = guess - delta, guess + delta
+
+    lo_key, hi_key = _ordered_keys(lo), _ordered_keys(hi)
+    while True:
+        active = hi_key - lo_key > 1
+        if not active.any():
+            break
+        mid_key = lo_key + (hi_key - lo_key) // 2
+        mid_passes = passes(_from_ordered_keys(mid_key))
+        lo_key = np.where(active & mid_passes, mid_key, lo_key)
+        hi_key = np.where(active & ~mid_passes, mid_key, hi_key)
+    return _from_ordered_keys(lo_key)
+
+def export_forest(model, features, scaler=None):
+    """
+    Flatten a fitted RandomForestRegressor into a CompiledForest.
+
+    With a StandardScaler the scaling is folded into the thresholds, so the
+    compiled forest takes raw sensor values; without one it takes the same
+    (already scaled) inputs as the sklearn model.
+    """
+    trees = [estimator.tree_ for estimator in model.estimators_]
+    counts = np.array([tree.node_count for tree in trees])
+    roots = np.concatenate(([0], np.cumsum(counts)[:-1])).astype(np.int64)
+
+    feature, threshold, left, right, value = [], [], [], [], []
+    for root, tree in zip(roots, trees):
+        nodes = np.arange(tree.node_count) + root
+        is_leaf = tree.children_left < 0
+        # Leaves loop back to themselves and test feature 0 against +inf
+        feature.append(np.where(is_leaf, 0, tree.feature))
+        threshold.append(np.where(is_leaf, np.inf, tree.threshold))
+        left.append(np.where(is_leaf, nodes, tree.children_left + root))
+        right.append(np.where(is_leaf, nodes, tree.children_right + root))
+        value.append(tree.value[:, 0, 0])
+
+    feature = np.concatenate(feature).astype(np.int64)
+    threshold = np.concatenate(threshold)
+    internal = np.isfinite(threshold)
+    if scaler is not None:
+        mean, scale = scaler.mean_[feature[internal]], scaler.scale_[feature[internal]]
+    else:
+        mean, scale = 0.0, 1.0
+    threshold[internal] = exact_thresholds(threshold[internal], mean, scale)
+
+    return CompiledForest(
+        feature=feature,
+        threshold=threshold,
+        left=np.concatenate(left).astype(np.int64),
+        right=np.concatenate(right).astype(np.int64),
+        value=np.concatenate(value).astype(np.float64),
+        roots=roots,
+        max_depth=max(tree.max_depth for tree in trees),
+        features=features,
+        scaler_folded=scaler is not None
+    )
@@ -1,145 +1,181 @@
-import os
-from datetime import datetime, timedelta
-import random
+import argparse
+from datetime import datetime
 import numpy as np
-from database import DatabaseManager
+from storage import INSERT_COLUMNS, get_storage
 from dotenv import load_dotenv
 
-def generate_realistic_data(start_date, end_date, readings_per_hour=3):
+def generate_realistic_chunks(start_date, end_date, readings_per_hour=3, chunk_days=7, seed=None):
     """
-    Generate realistic sensor data with daily patterns and weather variations.
+    Generate realistic sensor data with daily patterns and weather variations,
+    as NumPy arrays covering whole days at a time.
     
     Args:
         start_date: Starting date for data generation
         end_date: Ending date for data generation
         readings_per_hour: Number of readings per hour (default: 3, meaning every 20 minutes)
+        chunk_days: Number of days generated (and yielded) per chunk
+        seed: Seed for the random generator, for reproducible data
+    
+    Yields:
+        dict mapping each column in INSERT_COLUMNS to a NumPy array, in timestamp order
     """
-    data = []
+    rng = np.random.default_rng(seed)
     
     # Base values and seasonal patterns
     base_temp = 25  # Base temperature in Celsius
     base_humidity = 60  # Base humidity percentage
     
-    # Generate data for each day
-    current_date = start_date
-    while current_date <= end_date:
-        print(f"Generating data for {current_date.date()}")
+    # Reading slots within a day
+    slots = np.arange(24 * readings_per_hour)
+    hours = slots // readings_per_hour
+    readings = slots % readings_per_hour
+    minutes = (readings * 60) // readings_per_hour
+    slot_offsets = (hours * 60 + minutes).astype('timedelta64[m]')
+    fractional_hours = hours + readings / readings_per_hour
+    
+    # Daily cycles: coolest at 4AM, warmest at 2PM; humidity is the inverse
+    cycle = np.cos((hours - 14) * 2 * np.pi / 24)
+    hour_temp_offset = -5 * cycle
+    hour_humidity_offset = 15 * cycle
+    
+    # Light level based on time of day
+    morning = (hours >= 6) & (hours < 10)
+    midday = (hours >= 10) & (hours < 15)
+    afternoon = (hours >= 15) & (hours < 18)
+    daytime = (hours >= 6) & (hours < 18)
+    ramp_light = np.where(
+        morning,
+        np.interp(fractional_hours, [6, 10], [50, 600]),
+        np.interp(fractional_hours, [15, 18], [500, 50])
+    )
+    daytime_factor = np.where(daytime, 0.7, 0.3)
+    
+    n_days = (end_date - start_date).days + 1 if end_date >= start_date else 0
+    first_day = np.datetime64(start_date.date(), 'D')
+    
+    for chunk_start in range(0, n_days, chunk_days):
+        days = min(chunk_days, n_days - chunk_start)
+        shape = (days, len(slots))
+        day_starts = first_day + np.arange(chunk_start, chunk_start + days)
+        print(f"Generating data for {day_starts[0]} to {day_starts[-1]}")
+        
+        # Day-to-day variation (weather patterns) and rainy days (30% chance)
+        daily_temp_offset = rng.uniform(-3, 3, days)
+        daily_humidity_offset = rng.uniform(-10, 10, days)
+        is_rainy_day = rng.random(days) < 0.3
+        daily_humidity_offset += np.where(is_rainy_day, rng.uniform(10, 20, days), 0)
+        daily_temp_offset -= np.where(is_rainy_day, rng.uniform(2, 5, days), 0)
+        rainy = is_rainy_day[:, None]
+        
+        # Temperature and humidity with random noise
+        temperature = base_temp + daily_temp_offset[:, None] + hour_temp_offset + rng.uniform(-0.5, 0.5, shape)
+        humidity = base_humidity + daily_humidity_offset[:, None] + hour_humidity_offset + rng.uniform(-2, 2, shape)
         
-        # Add some day-to-day variation (weather patterns)
-        daily_temp_offset = random.uniform(-3, 3)
-        daily_humidity_offset = random.uniform(-10, 10)
+        # Daytime light (ramps or random mid-day) with cloud coverage; random at night
+        light = np.where(midday, rng.uniform(500, 700, shape), ramp_light)
+        cloud = np.where(rainy, rng.uniform(0.3, 0.6, shape), rng.uniform(0.7, 1.0, shape))
+        light = np.where(daytime, light * cloud, rng.uniform(0, 50, shape))
         
-        # Simulate weather events (e.g., rainy days)
-        is_rainy_day = random.random() < 0.3  # 30% chance of a rainy day
-        if is_rainy_day:
-            daily_humidity_offset += random.uniform(10, 20)
-            daily_temp_offset -= random.uniform(2, 5)
+        # Button states (P and K sensors)
+        # More likely to be active during daytime and when not raining
+        activation = daytime_factor * np.where(rainy, 0.5, 1.0)
+        btn_p = (rng.random(shape) < activation).astype(np.int8)
+        btn_k = (rng.random(shape) < activation * 0.8).astype(np.int8)
         
-        # Generate readings throughout the day
-        for hour in range(24):
-            for reading in range(readings_per_hour):
-                # Calculate exact timestamp
-                minutes = (reading * 60) // readings_per_hour
-                timestamp = current_date.replace(hour=hour, minute=minutes, second=0, microsecond=0)
-                
-                # Temperature variation
-                # Daily cycle: coolest at 4AM, warmest at 2PM
-                hour_temp_offset = -5 * np.cos((hour - 14) * 2 * np.pi / 24)
-                temperature = base_temp + daily_temp_offset + hour_temp_offset
-                # Add some random noise
-                temperature += random.uniform(-0.5, 0.5)
-                
-                # Humidity variation (inverse to temperature)
-                # Higher at night, lower during day
-                hour_humidity_offset = 15 * np.cos((hour - 14) * 2 * np.pi / 24)
-                humidity = base_humidity + daily_humidity_offset + hour_humidity_offset
-                # Add some random noise
-                humidity += random.uniform(-2, 2)
-                
-                # Light level based on time of day
-                if 6 <= hour < 18:  # Daytime
-                    if 6 <= hour < 10:  # Morning ramp up
-                        light = np.interp(hour + reading/readings_per_hour, [6, 10], [50, 600])
-                    elif 10 <= hour < 15:  # Mid-day
-                        light = random.uniform(500, 700)
-                    else:  # Afternoon ramp down
-                        light = np.interp(hour + reading/readings_per_hour, [15, 18], [500, 50])
-                    # Add cloud coverage variation
-                    if is_rainy_day:
-                        light *= random.uniform(0.3, 0.6)  # Heavy cloud coverage
-                    else:
-                        light *= random.uniform(0.7, 1.0)  # Light cloud coverage
-                else:  # Night time
-                    light = random.uniform(0, 50)
-                
-                # Button states (P and K sensors)
-                # More likely to be active during daytime and when not raining
-                daytime_factor = 0.7 if 6 <= hour < 18 else 0.3
-                weather_factor = 0.5 if is_rainy_day else 1.0
-                btn_p = 1 if random.random() < (daytime_factor * weather_factor) else 0
-                btn_k = 1 if random.random() < (daytime_factor * weather_factor * 0.8) else 0
-                
-                # Ensure values are within valid ranges
-                temperature = max(10, min(50, temperature))
-                humidity = max(30, min(80, humidity))
-                light = max(0, min(700, light))
-                
-                # Determine relay status based on conditions
-                relay_status = 1 if (
-                    30 <= humidity <= 80 and
-                    10 <= temperature <= 50 and
-                    0 <= light <= 700 and
-                    (btn_p == 1 or btn_k == 1) and
-                    not is_rainy_day  # Don't irrigate on rainy days
-                ) else 0
-                
-                data.append({
-                    'timestamp': timestamp,
-                    'temperature': round(temperature, 2),
-                    'humidity': round(humidity, 2),
-                    'light': round(light, 2),
-                    'btn_p': btn_p,
-                    'btn_k': btn_k,
-                    'relay_status': relay_status
-                })
+        # Ensure values are within valid ranges
+        temperature = np.clip(temperature, 10, 50)
+        humidity = np.clip(humidity, 30, 80)
+        light = np.clip(light, 0, 700)
         
-        current_date += timedelta(days=1)
+        # Determine relay status based on conditions
+        relay_status = (
+            (humidity >= 30) & (humidity <= 80) &
+            (temperature >= 10) & (temperature <= 50) &
+            (light >= 0) & (light <= 700) &
+            ((btn_p == 1) | (btn_k == 1)) &
+            ~rainy  # Don't irrigate on rainy days
+        ).astype(np.int8)
+        
+        yield {
+            'timestamp': (day_starts[:, None] + slot_offsets).ravel().astype('datetime64[us]'),
+            'humidity': np.round(humidity, 2).ravel(),
+            'temperature': np.round(temperature, 2).ravel(),
+            'light': np.round(light, 2).ravel(),
+            'btn_p': btn_p.ravel(),
+            'btn_k': btn_k.ravel(),
+            'relay_status': relay_status.ravel()
+        }
+
+def chunk_rows(chunk):
+    """Convert a generated chunk to row tuples of Python values, in INSERT_COLUMNS order"""
+    return zip(*(chunk[column].tolist() for column in INSERT_COLUMNS))
+
+def generate_realistic_data(start_date, end_date, readings_per_hour=3, seed=None):
+    """
+    Generate realistic sensor data with daily patterns and weather variations.
+    
+    Args:
+        start_date: Starting date for data generation
+        end_date: Ending date for data generation
+        readings_per_hour: Number of readings per hour (default: 3, meaning every 20 minutes)
+        seed: Seed for the random generator, for reproducible data
     
-    # Sort data by timestamp
-    data.sort(key=lambda x: x['timestamp'])
+    Returns:
+        List of reading dicts sorted by timestamp
+    """
+    data = []
+    for chunk in generate_realistic_chunks(start_date, end_date, readings_per_hour, seed=seed):
+        data.extend(dict(zip(INSERT_COLUMNS, row)) for row in chunk_rows(chunk))
     return data
 
+def parse_args():
+    parser = argparse.ArgumentParser(description="Generate mock sensor data and load it into the database")
+    parser.add_argument('--start', type=datetime.fromisoformat, default=datetime(2024, 12, 1, 0, 0, 0),
+                        help="first day (ISO format, default: 2024-12-01)")
+    parser.add_argument('--end', type=datetime.fromisoformat, default=datetime(2024, 12, 6, 23, 59, 59),
+                        help="last day (ISO format, default: 2024-12-06T23:59:59)")
+    parser.add_argument('--readings-per-hour', type=int, default=3,
+                        help="readings per hour (default: 3, every 20 minutes; 60 = one per minute)")
+    parser.add_argument('--chunk-days', type=int, default=7, help="days generated per chunk")
+    parser.add_argument('--batch-size', type=int, default=1000, help="rows per insert round trip")
+    parser.add_argument('--seed', type=int, default=None, help="random seed for reproducible data")
+    return parser.parse_args()
+
 def main():
+    args = parse_args()
+    
     # Load environment variables
     load_dotenv()
     
+    db = get_storage()
     try:
         # Connect to database
         print("Connecting to database...")
-        db = DatabaseManager()
         db.connect()
         
         # Delete existing data
         print("Deleting existing data...")
         db.delete_all_readings()
         
-        # Generate data from December 1st to December 6th, 2024
+        # Generate and insert chunk by chunk, so memory stays bounded for long histories
         print("Generating mock data...")
-        start_date = datetime(2024, 12, 1, 0, 0, 0)
-        end_date = datetime(2024, 12, 6, 23, 59, 59)
-        mock_data = generate_realistic_data(start_date, end_date, readings_per_hour=3)
-        
-        # Insert mock data
-        print(f"Inserting {len(mock_data)} readings...")
-        for reading in mock_data:
-            timestamp = reading.pop('timestamp')  # Remove timestamp from dict
-            db.insert_sensor_data(timestamp=timestamp, **reading)
+        start_date, end_date = args.start, args.end
+        chunks = generate_realistic_chunks(
+            start_date, end_date,
+            readings_per_hour=args.readings_per_hour,
+            chunk_days=args.chunk_days,
+            seed=args.seed
+        )
+        stats = db.insert_many(
+            (row for chunk in chunks for row in chunk_rows(chunk)),
+            batch_size=args.batch_size
+        )
         
         print("Mock data generation complete!")
-        print(f"Generated {len(mock_data)} readings over {(end_date - start_date).days + 1} days")
+        print(f"Generated {stats['rows']} readings over {(end_date - start_date).days + 1} days")
         print(f"Date range: {start_date} to {end_date}")
-        print(f"Readings per hour: 3 (every 20 minutes)")
-        print(f"Total readings per day: {3 * 24}")
+        print(f"Readings per hour: {args.readings_per_hour} (every {60 // args.readings_per_hour} minutes)")
+        print(f"Total readings per day: {args.readings_per_hour * 24}")
         
     except Exception as e:
         print(f"Error: {str(e)}")
@@ -1,10 +1,13 @@
+import os
 import streamlit as st
+import numpy as np
 import pandas as pd
-import plotly.express as px
 import plotly.graph_objects as go
 from datetime import datetime, timedelta
-from database import DatabaseManager
-from ml_model import IrrigationPredictor, generate_sample_data
+from storage import get_storage
+from tail_cache import TailCache
+from model_registry import ModelRegistry
+import metrics
 
 # Page configuration
 st.set_page_config(
@@ -52,19 +55,69 @@ st.markdown("""
     </style>
 """, unsafe_allow_html=True)
 
-# Initialize session state
-if 'predictor' not in st.session_state:
-    st.session_state.predictor = IrrigationPredictor()
+def add_derived_columns(df):
+    """Add the calendar columns used by the dashboard sections"""
+    df = df.copy()
+    df['Date'] = df['TIMESTAMP'].dt.date
+    df['Hour'] = df['TIMESTAMP'].dt.hour
+    df['Day'] = df['TIMESTAMP'].dt.day
+    df['DayOfWeek'] = df['TIMESTAMP'].dt.day_name()
+    df['TimeOfDay'] = pd.cut(
+        df['Hour'],
+        bins=[-1, 5, 11, 16, 21, 24],
+        labels=['Night', 'Morning', 'Midday', 'Afternoon', 'Evening']
+    )
+    return df
+
+@st.cache_resource
+def get_readings_cache():
+    """Readings cache shared by every session of this Streamlit process"""
+    max_mb = os.getenv('DASHBOARD_CACHE_MAX_MB')
+    max_rows = os.getenv('DASHBOARD_CACHE_MAX_ROWS')
+    archive = get_archive()
+    load = None
+    if archive is not None:
+        # Full (re)loads include the days already purged into the archive
+        from archive import load_history
+        load = lambda db: load_history(db, archive)
+    return TailCache(
+        transform=add_derived_columns,
+        max_rows=int(max_rows) if max_rows else None,
+        max_bytes=int(max_mb) * 2**20 if max_mb else 512 * 2**20,
+        verify_interval=int(os.getenv('DASHBOARD_CACHE_VERIFY_SECONDS', '60')),
+        load=load
+    )
+
+@st.cache_resource
+def get_model_registry():
+    """Model registry shared by every session of this Streamlit process"""
+    return ModelRegistry(
+        directory=os.getenv('MODEL_REGISTRY_DIR', 'models/registry'),
+        max_artifacts=int(os.getenv('MODEL_REGISTRY_MAX_ARTIFACTS', '5')),
+        artifact_format=os.getenv('MODEL_ARTIFACT_FORMAT', 'joblib')
+    )
+
+SECTION_HELP = 'Render time of dashboard sections'
+
+@st.cache_resource
+def start_metrics_server():
+    """Prometheus/JSON metrics endpoint of this Streamlit process (only with METRICS_ENABLED)"""
+    return metrics.start_http_server() if metrics.is_enabled() else None
+
+@st.cache_resource
+def get_archive():
+    """Columnar archive of closed days (None unless ARCHIVE_DIR is set)"""
+    if not os.getenv('ARCHIVE_DIR'):
+        return None
+    from archive import ReadingArchive
+    return ReadingArchive()
 
 def load_data():
-    """Load data from database"""
+    """Load data from database (only rows newer than the shared cache are fetched)"""
     try:
         loading_msg = st.info("Carregando dados...")
-        db = DatabaseManager()
-        db.connect()
-        data = db.get_all_readings()
-        df = pd.DataFrame(data)
-        db.disconnect()
+        with get_storage(pooled=True) as db:
+            df = get_readings_cache().refresh(db)
         
         if df.empty:
             loading_msg.empty()
@@ -73,20 +126,6 @@ def load_data():
         
         loading_msg.empty()
         st.success("Dados carregados com sucesso!")
-        
-        # Convert timestamp to datetime and add derived columns
-        if 'TIMESTAMP' in df.columns:
-            df['TIMESTAMP'] = pd.to_datetime(df['TIMESTAMP'])
-            df['Date'] = df['TIMESTAMP'].dt.date
-            df['Hour'] = df['TIMESTAMP'].dt.hour
-            df['Day'] = df['TIMESTAMP'].dt.day
-            df['DayOfWeek'] = df['TIMESTAMP'].dt.day_name()
-            df['TimeOfDay'] = pd.cut(
-                df['Hour'],
-                bins=[-1, 5, 11, 16, 21, 24],
-                labels=['Night', 'Morning', 'Midday', 'Afternoon', 'Evening']
-            )
-            
         return df
     except Exception as e:
         if 'loading_msg' in locals():
@@ -94,39 +133,169 @@ def load_data():
         st.error(f"Error loading data: {str(e)}")
         return pd.DataFrame()
 
-def create_sensor_chart(df, sensor_name, color, y_label):
-    """Create a line chart for sensor data"""
+# Colunas usadas pelos gráficos de sensores (hover inclui todos os sensores e o relé)
+CHART_COLUMNS = ['TIMESTAMP', 'TEMPERATURE', 'HUMIDITY', 'LIGHT', 'RELAY_STATUS']
+
+def load_window(start_time=None, end_time=None, columns=CHART_COLUMNS):
+    """
+    Load only the readings (and columns) inside a time window: windows
+    reaching archived days are read through the archive (memory-mapped), the
+    others sliced from the shared cache when it holds the whole window, else
+    queried
+    """
+    try:
+        archive = get_archive()
+        boundary = archive.archived_until() if archive is not None else None
+        if boundary is not None and (start_time is None or start_time < boundary):
+            from archive import load_history
+            with get_storage(pooled=True) as db:
+                return load_history(db, archive, start_time, end_time, [column.lower() for column in columns])
+        cached = get_readings_cache().window(start_time, end_time)
+        if cached is not None:
+            return cached[columns]
+        with get_storage(pooled=True) as db:
+            return db.get_readings_frame(since=start_time, until=end_time, columns=columns)
+    except Exception as e:
+        st.error(f"Error loading data: {str(e)}")
+        return pd.DataFrame(columns=columns)
+
+def load_daily_stats():
+    """Load daily statistics aggregated in the database"""
+    try:
+        with get_storage(pooled=True) as db:
+            archive = get_archive()
+            if archive is not None:
+                from archive import load_aggregate
+                stats = load_aggregate(db, archive, bucket='day')
+            else:
+                stats = db.aggregate(bucket='day')
+        stats.index = pd.to_datetime(stats.index).date
+        stats.index.name = 'Date'
+        return stats.drop(columns='READINGS')
+    except Exception as e:
+        st.error(f"Error loading statistics: {str(e)}")
+        return pd.DataFrame()
+
+def load_history_page(day, page_size, after=None, before=None):
+    """One page of a day's readings, newest first (keyset pagination on TIMESTAMP, ID)"""
+    since = datetime.combine(day, datetime.min.time())
+    try:
+        until = since + timedelta(days=1) - timedelta(microseconds=1)
+        with get_storage(pooled=True) as db:
+            archive = get_archive()
+            if archive is not None:
+                # Archived (and possibly purged) days are paged from the archive
+                from archive import load_page
+                page = load_page(db, archive, page_size=page_size, after=after, before=before,
+                                 since=since, until=until)
+            else:
+                page = db.get_page(page_size=page_size, after=after, before=before, since=since, until=until)
+        df = pd.DataFrame(page['rows'])
+        if not df.empty:
+            df['TIMESTAMP'] = pd.to_datetime(df['TIMESTAMP'])
+        return df, page['prev'], page['next']
+    except Exception as e:
+        st.error(f"Error loading data: {str(e)}")
+        return pd.DataFrame(), None, None
+
+# Above this many points per series the charts are downsampled with LTTB
+MAX_CHART_POINTS = 2000
+
+def lttb_downsample(x, y, n_out):
+    """
+    Largest-Triangle-Three-Buckets downsampling.
+
+    Keeps the first and last points and, for each of the n_out - 2 buckets in
+    between, the point forming the largest triangle with the previously kept
+    point and the average of the next bucket.
+    Returns the kept indices and the n_out + 1 bucket edges (the first and last
+    points are single-point buckets).
+    """
+    n = len(x)
+    if n_out >= n or n_out < 3:
+        return np.arange(n), np.arange(n + 1)
+    
+    edges = (np.arange(n_out - 1) * (n - 2) / (n_out - 2)).astype(np.int64) + 1
+    edges[-1] = n - 1
+    starts, ends = edges[:-1], edges[1:]
+    counts = ends - starts
+    x_means = np.add.reduceat(x[:-1], starts) / counts
+    y_means = np.add.reduceat(y[:-1], starts) / counts
+    
+    indices = np.empty(n_out, dtype=np.int64)
+    indices[0], indices[-1] = 0, n - 1
+    a = 0
+    for i in range(n_out - 2):
+        # Average of the next bucket (the last point for the final bucket)
+        next_x = x_means[i + 1] if i + 1 < len(starts) else x[-1]
+        next_y = y_means[i + 1] if i + 1 < len(starts) else y[-1]
+        bucket_x = x[starts[i]:ends[i]]
+        bucket_y = y[starts[i]:ends[i]]
+        areas = np.abs((x[a] - next_x) * (bucket_y - y[a]) - (x[a] - bucket_x) * (next_y - y[a]))
+        a = starts[i] + int(np.argmax(areas))
+        indices[i + 1] = a
+    return indices, np.concatenate(([0], edges, [n]))
+
+def build_hover_text(df, sensor_name):
+    """Build the hover strings for a chart with vectorized string operations"""
+    def fmt(column, spec):
+        return np.char.mod(spec, df[column].to_numpy(dtype=float))
+    
+    irrigation = np.where(df['RELAY_STATUS'].to_numpy() != 0, 'ON', 'OFF')
+    return (
+        "Time: " + df['TIMESTAMP'].dt.strftime('%Y-%m-%d %H:%M:%S') + "<br>" +
+        "Value: " + fmt(sensor_name, '%.2f') + "<br>" +
+        "Temperature: " + fmt('TEMPERATURE', '%.1f') + "°C<br>" +
+        "Humidity: " + fmt('HUMIDITY', '%.1f') + "%<br>" +
+        "Light: " + fmt('LIGHT', '%.0f') + "<br>" +
+        "Irrigation: " + irrigation
+    ).tolist()
+
+def create_sensor_chart(df, sensor_name, color, y_label, max_points=MAX_CHART_POINTS):
+    """
+    Create a line chart for sensor data.
+
+    Series longer than max_points are downsampled with LTTB and drawn with
+    WebGL traces; the trend line is then the mean of each LTTB bucket.
+    """
     fig = go.Figure()
+    df = df.reset_index(drop=True)
     
-    # Add raw data points with hover text
-    hover_text = [
-        f"Time: {row['TIMESTAMP'].strftime('%Y-%m-%d %H:%M:%S')}<br>" +
-        f"Value: {row[sensor_name]:.2f}<br>" +
-        f"Temperature: {row['TEMPERATURE']:.1f}°C<br>" +
-        f"Humidity: {row['HUMIDITY']:.1f}%<br>" +
-        f"Light: {row['LIGHT']:.0f}<br>" +
-        f"Irrigation: {'ON' if row['RELAY_STATUS'] else 'OFF'}"
-        for _, row in df.iterrows()
-    ]
+    if max_points and len(df) > max_points:
+        # Downsampled rendering: LTTB points + bucket-mean trend on the same grid
+        x = df['TIMESTAMP'].to_numpy(dtype='datetime64[ns]').astype(np.int64).astype(float)
+        y = df[sensor_name].to_numpy(dtype=float)
+        indices, edges = lttb_downsample(x, y, max_points)
+        points = df.iloc[indices]
+        
+        starts = edges[:-1]
+        counts = np.diff(edges)
+        trend_x = pd.to_datetime((np.add.reduceat(x, starts) / counts).astype(np.int64))
+        trend_y = np.add.reduceat(y, starts) / counts
+        scatter = go.Scattergl
+    else:
+        points = df
+        # Smoothed line (rolling average)
+        window_size = '1H'  # 1-hour window
+        df_smooth = df.set_index('TIMESTAMP')[[sensor_name]].rolling(window=window_size, center=True).mean()
+        trend_x = df_smooth.index
+        trend_y = df_smooth[sensor_name]
+        scatter = go.Scatter
     
-    # Add raw data points
-    fig.add_trace(go.Scatter(
-        x=df['TIMESTAMP'],
-        y=df[sensor_name],
+    # Add raw data points with hover text
+    fig.add_trace(scatter(
+        x=points['TIMESTAMP'],
+        y=points[sensor_name],
         mode='markers',
         name='Raw Data',
         marker=dict(color=color, size=6, opacity=0.5),
-        hovertext=hover_text,
+        hovertext=build_hover_text(points, sensor_name),
         hoverinfo='text'
     ))
     
-    # Add smoothed line (rolling average)
-    window_size = '1H'  # 1-hour window
-    df_smooth = df.set_index('TIMESTAMP')[[sensor_name]].rolling(window=window_size, center=True).mean()
-    
-    fig.add_trace(go.Scatter(
-        x=df_smooth.index,
-        y=df_smooth[sensor_name],
+    fig.add_trace(scatter(
+        x=trend_x,
+        y=trend_y,
         mode='lines',
         name='Trend',
         line=dict(color=color, width=2),
@@ -203,18 +372,38 @@ def create_sensor_chart(df, sensor_name, color, y_label):
     
     return fig
 
-def create_prediction_section(df, latest, predictor):
+def get_predictor():
+    """Predictor of this session (ml_model, and so sklearn, is only imported here)"""
+    if 'predictor' not in st.session_state:
+        from ml_model import IrrigationPredictor
+        st.session_state.predictor = IrrigationPredictor()
+    return st.session_state.predictor
+
+def create_prediction_section(df, latest):
     """Create ML prediction section"""
     st.markdown("## ML Predictions & Insights")
     
     # Train model if we have enough data
     if len(df) > 50:  # Minimum data requirement
+        predictor = get_predictor()
         try:
-            # Prepare data for ML model (lowercase column names)
-            ml_data = df.copy()
-            ml_data.columns = ml_data.columns.str.lower()
+            def training_data():
+                archive = get_archive()
+                if archive is not None:
+                    # Full history: archived days memory-mapped, the rest from the database
+                    from archive import load_history
+                    with get_storage(pooled=True) as db:
+                        return load_history(db, archive)
+                # Prepare data for ML model (lowercase column names)
+                ml_data = df.copy()
+                ml_data.columns = ml_data.columns.str.lower()
+                return ml_data
             
-            metrics = predictor.train(ml_data.to_dict('records'))
+            # Reuse the stored model unless the data or configuration changed
+            model_metrics, _ = get_model_registry().get_or_train(
+                predictor, len(df), int(df['ID'].max()), training_data,
+                incremental=os.getenv('MODEL_INCREMENTAL', 'false').lower() in ('1', 'true', 'yes')
+            )
             
             # Current prediction
             current_reading = {
@@ -241,14 +430,14 @@ def create_prediction_section(df, latest, predictor):
                 # Model performance
                 st.metric(
                     "Model Accuracy",
-                    f"{metrics['r2']:.1%}",
+                    f"{model_metrics['r2']:.1%}",
                     delta="R² Score"
                 )
             
             with col2:
                 st.markdown("### Feature Importance")
                 importance_df = pd.DataFrame(
-                    metrics['feature_importance'].items(),
+                    model_metrics['feature_importance'].items(),
                     columns=['Feature', 'Importance']
                 ).sort_values('Importance', ascending=True)
                 
@@ -272,7 +461,7 @@ def create_prediction_section(df, latest, predictor):
             # Add insights based on feature importance
             st.markdown("### Key Insights")
             insights = []
-            for feature, importance in metrics['feature_importance'].items():
+            for feature, importance in model_metrics['feature_importance'].items():
                 if importance > 0.2:  # Significant features
                     current_value = latest[feature.upper()]
                     if feature == 'humidity':
@@ -302,6 +491,8 @@ def create_prediction_section(df, latest, predictor):
         st.warning("Not enough data for ML predictions yet. Need at least 50 readings.")
 
 def main():
+    start_metrics_server()
+    
     # Header
     with st.container():
         st.markdown('<div class="header-container">', unsafe_allow_html=True)
@@ -310,7 +501,8 @@ def main():
         st.markdown('</div>', unsafe_allow_html=True)
     
     # Load data
-    df = load_data()
+    with metrics.timer('dashboard_section_seconds', SECTION_HELP, section='load_data'):
+        df = load_data()
     
     if df.empty:
         st.error("No data available.")
@@ -331,188 +523,204 @@ def main():
         st.write("Latest Reading:", latest.to_dict())
 
     # Current Status Section
-    st.markdown('<div class="section-container">', unsafe_allow_html=True)
-    st.markdown("## Current Status")
-    col1, col2, col3 = st.columns(3)
+    with metrics.timer('dashboard_section_seconds', SECTION_HELP, section='current_status'):
+        st.markdown('<div class="section-container">', unsafe_allow_html=True)
+        st.markdown("## Current Status")
+        col1, col2, col3 = st.columns(3)
     
-    # Current Readings
-    with col1:
-        st.markdown("### Current Readings")
-        st.metric(
-            "Temperature",
-            f"{latest['TEMPERATURE']:.1f}°C",
-            delta=f"{latest['TEMPERATURE'] - df['TEMPERATURE'].mean():.1f}°C"
-        )
-        st.metric(
-            "Humidity",
-            f"{latest['HUMIDITY']:.1f}%",
-            delta=f"{latest['HUMIDITY'] - df['HUMIDITY'].mean():.1f}%"
-        )
-        st.metric(
-            "Light Level",
-            f"{latest['LIGHT']:.0f}",
-            delta=f"{latest['LIGHT'] - df['LIGHT'].mean():.0f}"
-        )
+        # Current Readings
+        with col1:
+            st.markdown("### Current Readings")
+            st.metric(
+                "Temperature",
+                f"{latest['TEMPERATURE']:.1f}°C",
+                delta=f"{latest['TEMPERATURE'] - df['TEMPERATURE'].mean():.1f}°C"
+            )
+            st.metric(
+                "Humidity",
+                f"{latest['HUMIDITY']:.1f}%",
+                delta=f"{latest['HUMIDITY'] - df['HUMIDITY'].mean():.1f}%"
+            )
+            st.metric(
+                "Light Level",
+                f"{latest['LIGHT']:.0f}",
+                delta=f"{latest['LIGHT'] - df['LIGHT'].mean():.0f}"
+            )
 
-    # System Status
-    with col2:
-        st.markdown("### System Status")
-        st.metric(
-            "Phosphorus (P)",
-            "Active" if latest['BTN_P'] else "Inactive",
-            delta="ON" if latest['BTN_P'] else "OFF"
-        )
-        st.metric(
-            "Potassium (K)",
-            "Active" if latest['BTN_K'] else "Inactive",
-            delta="ON" if latest['BTN_K'] else "OFF"
-        )
-        st.metric(
-            "Irrigation",
-            "ON" if latest['RELAY_STATUS'] else "OFF",
-            delta="Active" if latest['RELAY_STATUS'] else "Inactive"
-        )
+        # System Status
+        with col2:
+            st.markdown("### System Status")
+            st.metric(
+                "Phosphorus (P)",
+                "Active" if latest['BTN_P'] else "Inactive",
+                delta="ON" if latest['BTN_P'] else "OFF"
+            )
+            st.metric(
+                "Potassium (K)",
+                "Active" if latest['BTN_K'] else "Inactive",
+                delta="ON" if latest['BTN_K'] else "OFF"
+            )
+            st.metric(
+                "Irrigation",
+                "ON" if latest['RELAY_STATUS'] else "OFF",
+                delta="Active" if latest['RELAY_STATUS'] else "Inactive"
+            )
 
-    # Statistics
-    with col3:
-        st.markdown("### Statistics")
-        days_of_data = (df['TIMESTAMP'].max() - df['TIMESTAMP'].min()).days
-        total_readings = len(df)
-        irrigation_time = (df['RELAY_STATUS'] == 1).mean() * 100
+        # Statistics
+        with col3:
+            st.markdown("### Statistics")
+            days_of_data = (df['TIMESTAMP'].max() - df['TIMESTAMP'].min()).days
+            total_readings = len(df)
+            irrigation_time = (df['RELAY_STATUS'] == 1).mean() * 100
         
-        st.metric(
-            "Data Period",
-            f"{days_of_data + 1} days",
-            delta=f"{total_readings} readings"
-        )
-        st.metric(
-            "Irrigation Active",
-            f"{irrigation_time:.1f}%",
-            delta=f"of total time"
-        )
-        st.metric(
-            "Reading Frequency",
-            "Every 20 min",
-            delta=f"{total_readings // (days_of_data + 1)} per day"
-        )
-    st.markdown('</div>', unsafe_allow_html=True)
+            st.metric(
+                "Data Period",
+                f"{days_of_data + 1} days",
+                delta=f"{total_readings} readings"
+            )
+            st.metric(
+                "Irrigation Active",
+                f"{irrigation_time:.1f}%",
+                delta=f"of total time"
+            )
+            st.metric(
+                "Reading Frequency",
+                "Every 20 min",
+                delta=f"{total_readings // (days_of_data + 1)} per day"
+            )
+        st.markdown('</div>', unsafe_allow_html=True)
 
     # Sensor Trends Section
-    st.markdown('<div class="section-container">', unsafe_allow_html=True)
-    st.markdown("## Sensor Trends")
+    with metrics.timer('dashboard_section_seconds', SECTION_HELP, section='sensor_trends'):
+        st.markdown('<div class="section-container">', unsafe_allow_html=True)
+        st.markdown("## Sensor Trends")
     
-    # Time range selector
-    time_range = st.selectbox(
-        "Select Time Range",
-        ["Last 12 Hours", "Last Day", "Last 2 Days", "Last 4 Days", "All Time"],
-        index=4  # Default to "All Time"
-    )
+        # Time range selector
+        time_range = st.selectbox(
+            "Select Time Range",
+            ["Last 12 Hours", "Last Day", "Last 2 Days", "Last 4 Days", "All Time"],
+            index=4  # Default to "All Time"
+        )
     
-    # Filter data based on time range
-    end_time = df['TIMESTAMP'].max()
-    if time_range == "Last 12 Hours":
-        start_time = end_time - timedelta(hours=12)
-    elif time_range == "Last Day":
-        start_time = end_time - timedelta(days=1)
-    elif time_range == "Last 2 Days":
-        start_time = end_time - timedelta(days=2)
-    elif time_range == "Last 4 Days":
-        start_time = end_time - timedelta(days=4)
-    else:
-        start_time = df['TIMESTAMP'].min()
+        # Filter data based on time range
+        end_time = df['TIMESTAMP'].max()
+        if time_range == "Last 12 Hours":
+            start_time = end_time - timedelta(hours=12)
+        elif time_range == "Last Day":
+            start_time = end_time - timedelta(days=1)
+        elif time_range == "Last 2 Days":
+            start_time = end_time - timedelta(days=2)
+        elif time_range == "Last 4 Days":
+            start_time = end_time - timedelta(days=4)
+        else:
+            start_time = None  # No lower bound
     
-    df_filtered = df[df['TIMESTAMP'].between(start_time, end_time)]
+        # Push the window down to the database instead of slicing the full history
+        df_filtered = load_window(start_time, end_time)
     
-    # Temperature Chart
-    st.markdown('<div class="chart-container">', unsafe_allow_html=True)
-    st.plotly_chart(
-        create_sensor_chart(df_filtered, 'TEMPERATURE', '#ff4b4b', 'Temperature (°C)'),
-        use_container_width=True
-    )
-    st.markdown('</div>', unsafe_allow_html=True)
+        # Temperature Chart
+        st.markdown('<div class="chart-container">', unsafe_allow_html=True)
+        st.plotly_chart(
+            create_sensor_chart(df_filtered, 'TEMPERATURE', '#ff4b4b', 'Temperature (°C)'),
+            use_container_width=True
+        )
+        st.markdown('</div>', unsafe_allow_html=True)
     
-    # Humidity Chart
-    st.markdown('<div class="chart-container">', unsafe_allow_html=True)
-    st.plotly_chart(
-        create_sensor_chart(df_filtered, 'HUMIDITY', '#36a2eb', 'Humidity (%)'),
-        use_container_width=True
-    )
-    st.markdown('</div>', unsafe_allow_html=True)
+        # Humidity Chart
+        st.markdown('<div class="chart-container">', unsafe_allow_html=True)
+        st.plotly_chart(
+            create_sensor_chart(df_filtered, 'HUMIDITY', '#36a2eb', 'Humidity (%)'),
+            use_container_width=True
+        )
+        st.markdown('</div>', unsafe_allow_html=True)
     
-    # Light Level Chart
-    st.markdown('<div class="chart-container">', unsafe_allow_html=True)
-    st.plotly_chart(
-        create_sensor_chart(df_filtered, 'LIGHT', '#ffcd56', 'Light Level'),
-        use_container_width=True
-    )
-    st.markdown('</div>', unsafe_allow_html=True)
-    st.markdown('</div>', unsafe_allow_html=True)
+        # Light Level Chart
+        st.markdown('<div class="chart-container">', unsafe_allow_html=True)
+        st.plotly_chart(
+            create_sensor_chart(df_filtered, 'LIGHT', '#ffcd56', 'Light Level'),
+            use_container_width=True
+        )
+        st.markdown('</div>', unsafe_allow_html=True)
+        st.markdown('</div>', unsafe_allow_html=True)
 
     # Data Analysis Section
-    st.markdown('<div class="section-container">', unsafe_allow_html=True)
-    st.markdown("## Data Analysis")
-    
-    # Daily Statistics
-    daily_stats = df.groupby('Date').agg({
-        'TEMPERATURE': ['mean', 'min', 'max', 'std'],
-        'HUMIDITY': ['mean', 'min', 'max', 'std'],
-        'LIGHT': ['mean', 'min', 'max', 'std'],
-        'RELAY_STATUS': ['mean', 'sum']
-    }).round(2)
+    with metrics.timer('dashboard_section_seconds', SECTION_HELP, section='data_analysis'):
+        st.markdown('<div class="section-container">', unsafe_allow_html=True)
+        st.markdown("## Data Analysis")
     
-    # Rename columns for better display
-    daily_stats.columns = [
-        f"{col[0]}_{col[1]}".title().replace('_', ' ')
-        for col in daily_stats.columns
-    ]
+        # Daily Statistics (aggregated in the database, no raw rows needed)
+        daily_stats = load_daily_stats().round(2)
     
-    # Convert relay status mean to percentage and sum to hours
-    daily_stats['Irrigation Time (%)'] = (daily_stats['Relay Status Mean'] * 100).round(1)
-    daily_stats['Irrigation Hours'] = (daily_stats['Relay Status Sum'] * 20 / 60).round(1)  # 20 min intervals
-    
-    # Drop original relay status columns
-    daily_stats = daily_stats.drop(['Relay Status Mean', 'Relay Status Sum'], axis=1)
-    
-    st.dataframe(daily_stats, use_container_width=True)
-    st.markdown('</div>', unsafe_allow_html=True)
+        if not daily_stats.empty:
+            # Rename columns for better display
+            daily_stats.columns = [
+                col.title().replace('_', ' ')
+                for col in daily_stats.columns
+            ]
+        
+            # Convert relay status mean to percentage and sum to hours
+            daily_stats['Irrigation Time (%)'] = (daily_stats['Relay Status Mean'] * 100).round(1)
+            daily_stats['Irrigation Hours'] = (daily_stats['Relay Status Sum'] * 20 / 60).round(1)  # 20 min intervals
+        
+            # Drop original relay status columns
+            daily_stats = daily_stats.drop(['Relay Status Mean', 'Relay Status Sum'], axis=1)
+        
+            st.dataframe(daily_stats, use_container_width=True)
+        st.markdown('</div>', unsafe_allow_html=True)
 
     # Historical Data Section
-    st.markdown('<div class="section-container">', unsafe_allow_html=True)
-    st.markdown("## Historical Data")
+    with metrics.timer('dashboard_section_seconds', SECTION_HELP, section='historical_data'):
+        st.markdown('<div class="section-container">', unsafe_allow_html=True)
+        st.markdown("## Historical Data")
     
-    # Add filters
-    col1, col2 = st.columns(2)
-    with col1:
-        selected_date = st.date_input(
-            "Select Date",
-            value=latest['TIMESTAMP'].date(),
-            min_value=df['TIMESTAMP'].min().date(),
-            max_value=df['TIMESTAMP'].max().date()
+        # Add filters
+        col1, col2 = st.columns(2)
+        with col1:
+            selected_date = st.date_input(
+                "Select Date",
+                value=latest['TIMESTAMP'].date(),
+                min_value=df['TIMESTAMP'].min().date(),
+                max_value=df['TIMESTAMP'].max().date()
+            )
+        with col2:
+            records = st.slider('Number of records to display', 5, 100, 20)
+    
+        # Cursor of the page shown; back to the first page when the filters change
+        if st.session_state.get('history_filters') != (selected_date, records):
+            st.session_state.history_filters = (selected_date, records)
+            st.session_state.history_cursor = {}
+        df_selected, prev_key, next_key = load_history_page(
+            selected_date, records, **st.session_state.history_cursor
         )
-    with col2:
-        records = st.slider('Number of records to display', 5, 100, 20)
     
-    # Filter data
-    df_selected = df[df['Date'] == selected_date]
+        # Display data table
+        st.dataframe(
+            df_selected
+            .style.format({
+                'TEMPERATURE': '{:.1f}°C',
+                'HUMIDITY': '{:.1f}%',
+                'LIGHT': '{:.0f}',
+                'TIMESTAMP': lambda x: x.strftime('%Y-%m-%d %H:%M:%S')
+            }),
+            use_container_width=True
+        )
     
-    # Display data table
-    st.dataframe(
-        df_selected.sort_values('TIMESTAMP', ascending=False)
-        .head(records)
-        .style.format({
-            'TEMPERATURE': '{:.1f}°C',
-            'HUMIDITY': '{:.1f}%',
-            'LIGHT': '{:.0f}',
-            'TIMESTAMP': lambda x: x.strftime('%Y-%m-%d %H:%M:%S')
-        }),
-        use_container_width=True
-    )
-    st.markdown('</div>', unsafe_allow_html=True)
+        col1, col2, _ = st.columns([1, 1, 4])
+        with col1:
+            if st.button("⬅️ Newer", disabled=prev_key is None):
+                st.session_state.history_cursor = {'before': prev_key}
+                st.rerun()
+        with col2:
+            if st.button("Older ➡️", disabled=next_key is None):
+                st.session_state.history_cursor = {'after': next_key}
+                st.rerun()
+        st.markdown('</div>', unsafe_allow_html=True)
 
     # ML Predictions Section
-    st.markdown('<div class="section-container">', unsafe_allow_html=True)
-    create_prediction_section(df, latest, st.session_state.predictor)
-    st.markdown('</div>', unsafe_allow_html=True)
+    with metrics.timer('dashboard_section_seconds', SECTION_HELP, section='ml_predictions'):
+        st.markdown('<div class="section-container">', unsafe_allow_html=True)
+        create_prediction_section(df, latest)
+        st.markdown('</div>', unsafe_allow_html=True)
 
     # Refresh button
     col1, col2 = st.columns([1, 5])
@@ -1,80 +1,340 @@
 import os
+import re
 import cx_Oracle
-import random
-from dotenv import load_dotenv
-from datetime import datetime
-
-# Load environment variables first
-print("Loading .env file...")
-load_dotenv(override=True)
-
-# Get Oracle home from .env
-instant_client_path = os.getenv('ORACLE_HOME')
-if not instant_client_path:
-    raise Exception("ORACLE_HOME not set in .env file")
-
-# Initialize Oracle Client before any database operations
-try:
-    cx_Oracle.init_oracle_client(
-        lib_dir=instant_client_path,
-        config_dir=None,
-        error_url=None,
-        driver_name=None
-    )
-except Exception as e:
-    # Ignore "already initialized" error
-    if "already initialized" not in str(e):
-        print(f"Warning: {str(e)}")
-
-def generate_random_data():
-    """Gera dados aleatórios simulando sensores."""
-    return {
-        'humidity': round(random.uniform(30, 80), 2),
-        'temperature': round(random.uniform(10, 50), 2),
-        'light': round(random.uniform(0, 700), 2),
-        'btn_p': random.choice([0, 1]),
-        'btn_k': random.choice([0, 1]),
-        'relay_status': random.choice([0, 1])
-    }
-
-class DatabaseManager:
-    def __init__(self):
-        """Inicializa o gerenciador de banco de dados."""
+import threading
+import time
+from datetime import datetime, timedelta
+from storage import (
+    SensorStorage, INSERT_COLUMNS, READING_COLUMNS, AGGREGATE_SENSORS,
+    aggregate_columns, frame_from_values, generate_random_data, get_storage
+)
+
+# O Instant Client é inicializado na primeira conexão (ver init_oracle_client),
+# assim importar este módulo não carrega a biblioteca nativa nem exige ORACLE_HOME
+_oracle_client_ready = False
+_oracle_client_lock = threading.Lock()
+
+# Pool de sessões compartilhado pelo processo (criado sob demanda)
+_session_pool = None
+_session_pool_lock = threading.Lock()
+
+def _env_flag(name, default=False):
+    """Lê uma variável de ambiente booleana (1/true/yes/sim)."""
+    value = os.getenv(name)
+    if value is None:
+        return default
+    return value.strip().lower() in ('1', 'true', 'yes', 'sim')
+
+def init_oracle_client():
+    """
+    Inicializa o Oracle Instant Client (ORACLE_HOME do .env) uma única vez por processo.
+    
+    Chamado por connect() e get_session_pool() antes da primeira conexão.
+    """
+    global _oracle_client_ready
+    if _oracle_client_ready:
+        return
+    with _oracle_client_lock:
+        if _oracle_client_ready:
+            return
+        instant_client_path = os.getenv('ORACLE_HOME')
+        if not instant_client_path:
+            raise Exception("ORACLE_HOME not set in .env file")
+        try:
+            cx_Oracle.init_oracle_client(
+                lib_dir=instant_client_path,
+                config_dir=None,
+                error_url=None,
+                driver_name=None
+            )
+        except Exception as e:
+            # Ignore "already initialized" error
+            if "already initialized" not in str(e):
+                print(f"Warning: {str(e)}")
+        _oracle_client_ready = True
+
+def get_session_pool():
+    """
+    Retorna o pool de sessões do processo, criando-o na primeira chamada.
+    
+    Tamanhos configuráveis via .env: DB_POOL_MIN, DB_POOL_MAX, DB_POOL_INCREMENT.
+    Conexões ociosas há mais de DB_POOL_PING_INTERVAL segundos são verificadas
+    (ping) antes de serem entregues.
+    """
+    global _session_pool
+    if _session_pool is None:
+        with _session_pool_lock:
+            if _session_pool is None:
+                init_oracle_client()
+                try:
+                    _session_pool = cx_Oracle.SessionPool(
+                        user=os.getenv('DB_USER'),
+                        password=os.getenv('DB_PASSWORD'),
+                        dsn=os.getenv('DB_DSN'),
+                        min=int(os.getenv('DB_POOL_MIN', '1')),
+                        max=int(os.getenv('DB_POOL_MAX', '4')),
+                        increment=int(os.getenv('DB_POOL_INCREMENT', '1')),
+                        threaded=True,
+                        getmode=cx_Oracle.SPOOL_ATTRVAL_WAIT,
+                        ping_interval=int(os.getenv('DB_POOL_PING_INTERVAL', '60'))
+                    )
+                    print("Pool de conexões criado com sucesso!")
+                except cx_Oracle.Error as error:
+                    print(f"Erro ao criar pool de conexões: {error}")
+                    raise
+    return _session_pool
+
+def close_session_pool():
+    """Fecha o pool de sessões do processo, se existir."""
+    global _session_pool
+    with _session_pool_lock:
+        if _session_pool is not None:
+            try:
+                _session_pool.close(force=True)
+            except cx_Oracle.Error as error:
+                print(f"Erro ao fechar pool de conexões: {error}")
+            _session_pool = None
+
+INSERT_SQL = """
+    INSERT INTO sensor_data 
+    (timestamp, humidity, temperature, light, btn_p, btn_k, relay_status)
+    VALUES (:1, :2, :3, :4, :5, :6, :7)
+"""
+
+# INSERT idempotente: leituras com reading_key já gravada são ignoradas (reenvios
+# após falhas, ex.: replay do spool em src/spool.py). O índice único
+# uq_sensor_data_reading_key garante isso também entre sessões concorrentes
+UPSERT_SQL = """
+    MERGE INTO sensor_data d
+    USING (
+        SELECT :1 AS timestamp, :2 AS humidity, :3 AS temperature, :4 AS light,
+               :5 AS btn_p, :6 AS btn_k, :7 AS relay_status, :8 AS reading_key
+        FROM dual
+    ) s
+    ON (d.reading_key = s.reading_key)
+    WHEN NOT MATCHED THEN INSERT
+        (timestamp, humidity, temperature, light, btn_p, btn_k, relay_status, reading_key)
+    VALUES
+        (s.timestamp, s.humidity, s.temperature, s.light, s.btn_p, s.btn_k, s.relay_status, s.reading_key)
+"""
+
+# ORA-00001: outra sessão gravou a mesma reading_key entre o MERGE e o commit
+UNIQUE_VIOLATION = 1
+
+# Formato do TRUNC do Oracle para cada granularidade de aggregate()
+AGGREGATE_BUCKETS = {'day': 'DD', 'hour': 'HH24'}
+
+# Tabelas de agregação (rollup) mantidas a cada inserção, uma por granularidade
+ROLLUP_TABLES = {'hour': 'sensor_rollup_hourly', 'day': 'sensor_rollup_daily'}
+ROLLUP_STATS = ('count', 'sum', 'sumsq', 'min', 'max')
+ROLLUP_COLUMNS = (
+    ('readings',)
+    + tuple(f"{sensor}_{stat}" for sensor in AGGREGATE_SENSORS for stat in ROLLUP_STATS)
+    + ('relay_on',)
+)
+
+# Índices de sensor_data (nome -> colunas); LOCAL quando a tabela é particionada
+READING_INDEXES = {
+    'idx_sensor_data_timestamp': 'timestamp',
+    'idx_sensor_data_ts_id': 'timestamp, id'
+}
+
+# Particionamento por intervalo de sensor_data (create_tables / DB_PARTITIONING)
+PARTITION_INTERVALS = {
+    'day': "NUMTODSINTERVAL(1, 'DAY')",
+    'month': "NUMTOYMINTERVAL(1, 'MONTH')"
+}
+# Limite da partição inicial; as demais são criadas pelo Oracle conforme os dados chegam
+PARTITION_START = "TIMESTAMP '2000-01-01 00:00:00'"
+
+# HIGH_VALUE das partições (texto), ex.: TIMESTAMP' 2024-01-02 00:00:00'
+_HIGH_VALUE_PATTERN = re.compile(r"TIMESTAMP'\s*(\d{4}-\d{2}-\d{2} \d{2}:\d{2}:\d{2})")
+
+# Timestamp convertido no Oracle para microssegundos desde 1970, para ser buscado
+# como número e convertido para datetime64 sem criar objetos datetime. Usa o
+# INTERVAL (timestamp - 1970) campo a campo: CAST AS DATE arredondaria os
+# segundos e perderia a fração.
+_EPOCH_INTERVAL_SQL = "(timestamp - TIMESTAMP '1970-01-01 00:00:00')"
+TIMESTAMP_US_SQL = (
+    f"EXTRACT(DAY FROM {_EPOCH_INTERVAL_SQL}) * 86400000000"
+    f" + EXTRACT(HOUR FROM {_EPOCH_INTERVAL_SQL}) * 3600000000"
+    f" + EXTRACT(MINUTE FROM {_EPOCH_INTERVAL_SQL}) * 60000000"
+    f" + ROUND(EXTRACT(SECOND FROM {_EPOCH_INTERVAL_SQL}) * 1000000)"
+)
+
+def _rollup_merge_sql(table):
+    """Monta o MERGE que soma um delta (um intervalo) na tabela de rollup."""
+    source = ", ".join(f":{column} AS {column}" for column in ('bucket_start',) + ROLLUP_COLUMNS)
+    updates = []
+    for column in ROLLUP_COLUMNS:
+        if column.endswith('_min'):
+            updates.append(f"r.{column} = LEAST(NVL(r.{column}, s.{column}), NVL(s.{column}, r.{column}))")
+        elif column.endswith('_max'):
+            updates.append(f"r.{column} = GREATEST(NVL(r.{column}, s.{column}), NVL(s.{column}, r.{column}))")
+        else:
+            updates.append(f"r.{column} = r.{column} + s.{column}")
+    columns = ('bucket_start',) + ROLLUP_COLUMNS
+    merge = f"""
+        MERGE INTO {table} r
+        USING (SELECT {source} FROM dual) s
+        ON (r.bucket_start = s.bucket_start)
+        WHEN MATCHED THEN UPDATE SET {', '.join(updates)}
+        WHEN NOT MATCHED THEN INSERT ({', '.join(columns)})
+            VALUES ({', '.join(f's.{column}' for column in columns)})
+    """
+    # Duas sessões podem não encontrar o intervalo e inserir ao mesmo tempo: a
+    # segunda recebe ORA-00001 (a instrução é desfeita) e repete o MERGE, que
+    # agora encontra a linha e faz UPDATE
+    merge = merge.strip()
+    return f"""
+        BEGIN
+            {merge};
+        EXCEPTION
+            WHEN DUP_VAL_ON_INDEX THEN
+                {merge};
+        END;
+    """
+
+ROLLUP_MERGE_SQL = {bucket: _rollup_merge_sql(table) for bucket, table in ROLLUP_TABLES.items()}
+
+def _rollup_deltas(rows, bucket, deltas=None):
+    """
+    Agrega linhas (na ordem de INSERT_COLUMNS) por início de intervalo ('hour' ou 'day').
+    Retorna {início: delta}; com deltas, soma as linhas aos deltas já acumulados.
+    """
+    sensor_indexes = [(sensor, INSERT_COLUMNS.index(sensor)) for sensor in AGGREGATE_SENSORS]
+    relay_index = INSERT_COLUMNS.index('relay_status')
+    if deltas is None:
+        deltas = {}
+    for row in rows:
+        start = row[0].replace(minute=0, second=0, microsecond=0)
+        if bucket == 'day':
+            start = start.replace(hour=0)
+        delta = deltas.get(start)
+        if delta is None:
+            delta = dict.fromkeys(ROLLUP_COLUMNS, 0)
+            for sensor, _ in sensor_indexes:
+                delta[f"{sensor}_min"] = None
+                delta[f"{sensor}_max"] = None
+            delta['bucket_start'] = start
+            deltas[start] = delta
+        
+        delta['readings'] += 1
+        for sensor, index in sensor_indexes:
+            if row[index] is None:
+                continue
+            value = float(row[index])
+            delta[f"{sensor}_count"] += 1
+            delta[f"{sensor}_sum"] += value
+            delta[f"{sensor}_sumsq"] += value * value
+            current_min = delta[f"{sensor}_min"]
+            current_max = delta[f"{sensor}_max"]
+            delta[f"{sensor}_min"] = value if current_min is None else min(current_min, value)
+            delta[f"{sensor}_max"] = value if current_max is None else max(current_max, value)
+        if row[relay_index] is not None and float(row[relay_index]) > 0:
+            delta['relay_on'] += 1
+    return deltas
+
+def _binary_double_output_handler(cursor, name, default_type, size, precision, scale):
+    """Busca colunas NUMBER como double nativo (evita Decimal/int e conversões por linha)."""
+    if default_type == cx_Oracle.DB_TYPE_NUMBER:
+        return cursor.var(cx_Oracle.DB_TYPE_BINARY_DOUBLE, arraysize=cursor.arraysize)
+
+class DatabaseManager(SensorStorage):
+    def __init__(self, pooled=None):
+        """
+        Inicializa o gerenciador de banco de dados Oracle (backend 'oracle' de storage.py).
+        
+        Args:
+            pooled: Se True, as conexões são obtidas do pool de sessões do processo
+                em connect() e devolvidas em disconnect(). Se None, usa DB_POOLED do .env.
+        """
         self.user = os.getenv('DB_USER')
         self.password = os.getenv('DB_PASSWORD')
         self.dsn = os.getenv('DB_DSN')
+        self.pooled = _env_flag('DB_POOLED') if pooled is None else pooled
         self.connection = None
         self.cursor = None
+        # Deltas de rollup das linhas inseridas e ainda não confirmadas (ver _commit)
+        self._pending_rollups = {bucket: {} for bucket in ROLLUP_TABLES}
 
     def connect(self):
-        """Estabelece conexão com o banco de dados."""
+        """Estabelece conexão com o banco de dados (ou obtém uma do pool)."""
         try:
-            self.connection = cx_Oracle.connect(
-                user=self.user,
-                password=self.password,
-                dsn=self.dsn
-            )
+            if self.pooled:
+                self.connection = get_session_pool().acquire()
+            else:
+                init_oracle_client()
+                self.connection = cx_Oracle.connect(
+                    user=self.user,
+                    password=self.password,
+                    dsn=self.dsn
+                )
+                print("Conexão estabelecida com sucesso!")
             self.cursor = self.connection.cursor()
-            print("Conexão estabelecida com sucesso!")
         except cx_Oracle.Error as error:
             print(f"Erro ao conectar ao banco de dados: {error}")
             raise
 
     def disconnect(self):
-        """Fecha a conexão com o banco de dados."""
+        """Fecha a conexão com o banco de dados (ou a devolve ao pool)."""
         try:
             if self.cursor:
                 self.cursor.close()
             if self.connection:
-                self.connection.close()
-                print("Conexão fechada com sucesso!")
+                if self.pooled:
+                    get_session_pool().release(self.connection)
+                else:
+                    self.connection.close()
+                    print("Conexão fechada com sucesso!")
         except cx_Oracle.Error as error:
             print(f"Erro ao fechar conexão: {error}")
+        finally:
+            self.cursor = None
+            self.connection = None
+            # A transação não confirmada foi desfeita junto com a conexão
+            for deltas in self._pending_rollups.values():
+                deltas.clear()
 
-    def create_tables(self):
-        """Cria as tabelas necessárias se não existirem."""
+    def health_check(self):
+        """Verifica a conexão atual e, no modo pool, o estado do pool."""
+        status = {'pooled': self.pooled, 'connected': False}
+        if self.connection is not None:
+            try:
+                self.connection.ping()
+                status['connected'] = True
+            except cx_Oracle.Error as error:
+                status['error'] = str(error)
+        if self.pooled and _session_pool is not None:
+            status['pool_opened'] = _session_pool.opened
+            status['pool_busy'] = _session_pool.busy
+            status['pool_max'] = _session_pool.max
+        return status
+
+    def create_tables(self, partitioning=None):
+        """
+        Cria as tabelas necessárias se não existirem.
+        
+        Args:
+            partitioning: 'day' ou 'month' para particionar sensor_data por intervalo
+                de timestamp (índices locais), permitindo retenção por partição
+                (apply_retention / delete_range). None usa DB_PARTITIONING do .env;
+                vazio mantém a tabela sem partições. Uma tabela existente sem
+                partições é convertida (ALTER TABLE ... MODIFY, online).
+        """
+        if partitioning is None:
+            partitioning = os.getenv('DB_PARTITIONING', '').strip().lower() or None
+        if partitioning is not None and partitioning not in PARTITION_INTERVALS:
+            raise ValueError(f"Particionamento inválido: {partitioning} (use {', '.join(PARTITION_INTERVALS)})")
+        
         try:
-            self.cursor.execute("""
+            partition_clause = ""
+            if partitioning:
+                partition_clause = (
+                    f"PARTITION BY RANGE (timestamp) INTERVAL ({PARTITION_INTERVALS[partitioning]}) "
+                    f"(PARTITION p_initial VALUES LESS THAN ({PARTITION_START}))"
+                ).replace("'", "''")
+            self.cursor.execute(f"""
                 BEGIN
                     EXECUTE IMMEDIATE 'CREATE TABLE sensor_data (
                         id NUMBER GENERATED ALWAYS AS IDENTITY PRIMARY KEY,
@@ -84,8 +344,9 @@ class DatabaseManager:
                         light NUMBER,
                         btn_p NUMBER(1),
                         btn_k NUMBER(1),
-                        relay_status NUMBER(1)
-                    )';
+                        relay_status NUMBER(1),
+                        reading_key VARCHAR2(32)
+                    ) {partition_clause}';
                 EXCEPTION
                     WHEN OTHERS THEN
                         IF SQLCODE = -955 THEN
@@ -96,16 +357,84 @@ class DatabaseManager:
                 END;
             """)
             
-            # Create index on timestamp for better performance
+            # Tabela anterior ao upsert por reading_key: adiciona a coluna (ORA-01430: já existe)
+            self.cursor.execute("""
+                BEGIN
+                    EXECUTE IMMEDIATE 'ALTER TABLE sensor_data ADD (reading_key VARCHAR2(32))';
+                EXCEPTION
+                    WHEN OTHERS THEN
+                        IF SQLCODE = -1430 THEN
+                            NULL;
+                        ELSE
+                            RAISE;
+                        END IF;
+                END;
+            """)
+            
+            # Chave do upsert_many: índice único global (leituras sem chave, NULL, não entram)
             try:
                 self.cursor.execute("""
-                    CREATE INDEX idx_sensor_data_timestamp 
-                    ON sensor_data(timestamp)
+                    CREATE UNIQUE INDEX uq_sensor_data_reading_key
+                    ON sensor_data(reading_key)
                 """)
             except cx_Oracle.Error:
                 pass  # Index might already exist
             
-            self.connection.commit()
+            # Create indexes for better performance: timestamp, e (timestamp, id) para
+            # a paginação por keyset (ORDER BY timestamp, id sem sort). LOCAL em tabela
+            # particionada: manutenção de partições não invalida o índice
+            partitioned = self.get_partitioning() is not None
+            for index, columns in READING_INDEXES.items():
+                try:
+                    self.cursor.execute(f"""
+                        CREATE INDEX {index}
+                        ON sensor_data({columns}) {'LOCAL' if partitioned else ''}
+                    """)
+                except cx_Oracle.Error:
+                    pass  # Index might already exist
+            
+            if partitioning and not partitioned:
+                # Tabela criada antes da opção: particiona sem interromper leituras/escritas
+                local_indexes = ", ".join(f"{index} LOCAL" for index in READING_INDEXES)
+                self.cursor.execute(f"""
+                    ALTER TABLE sensor_data MODIFY
+                    PARTITION BY RANGE (timestamp) INTERVAL ({PARTITION_INTERVALS[partitioning]})
+                    (PARTITION p_initial VALUES LESS THAN ({PARTITION_START}))
+                    ONLINE UPDATE INDEXES ({local_indexes})
+                """)
+                print(f"Tabela sensor_data particionada por {partitioning}.")
+            
+            # Tabelas de rollup por hora e por dia
+            rollup_columns = ", ".join(f"{column} NUMBER" for column in ROLLUP_COLUMNS)
+            for table in ROLLUP_TABLES.values():
+                self.cursor.execute(f"""
+                    BEGIN
+                        EXECUTE IMMEDIATE 'CREATE TABLE {table} (
+                            bucket_start TIMESTAMP PRIMARY KEY,
+                            {rollup_columns}
+                        )';
+                    EXCEPTION
+                        WHEN OTHERS THEN
+                            IF SQLCODE = -955 THEN
+                                NULL;
+                            ELSE
+                                RAISE;
+                            END IF;
+                    END;
+                """)
+            
+            # Rollups vazios com leituras existentes (ex.: banco anterior aos rollups): backfill
+            self.cursor.execute(f"""
+                SELECT
+                    (SELECT COUNT(*) FROM {ROLLUP_TABLES['day']} WHERE ROWNUM = 1),
+                    (SELECT COUNT(*) FROM sensor_data WHERE ROWNUM = 1)
+                FROM dual
+            """)
+            has_rollups, has_readings = self.cursor.fetchone()
+            if has_readings and not has_rollups:
+                self._rebuild_rollups()
+            
+            self._commit()
             print("Tabelas criadas/verificadas com sucesso!")
         except cx_Oracle.Error as error:
             print(f"Erro ao criar tabelas: {error}")
@@ -117,21 +446,294 @@ class DatabaseManager:
             if timestamp is None:
                 timestamp = datetime.now()
                 
-            self.cursor.execute("""
-                INSERT INTO sensor_data 
-                (timestamp, humidity, temperature, light, btn_p, btn_k, relay_status)
-                VALUES (:1, :2, :3, :4, :5, :6, :7)
-            """, (timestamp, humidity, temperature, light, btn_p, btn_k, relay_status))
+            row = (timestamp, humidity, temperature, light, btn_p, btn_k, relay_status)
+            self.cursor.execute(INSERT_SQL, row)
+            self._apply_rollups([row])
             
-            self.connection.commit()
+            self._commit()
         except cx_Oracle.Error as error:
             print(f"Erro ao inserir dados: {error}")
             raise
 
-    def get_all_readings(self):
-        """Recupera todas as leituras dos sensores."""
+    def insert_many(self, readings, batch_size=1000, commit_every=1):
+        """
+        Insere leituras em lote usando array DML (executemany).
+        
+        Args:
+            readings: Iterável de dicts (mesmas chaves de insert_sensor_data) ou de
+                tuplas na ordem de INSERT_COLUMNS
+            batch_size: Número de linhas enviadas por round trip
+            commit_every: Número de lotes entre commits (0 = commit apenas no final)
+        
+        Returns:
+            dict com o total de linhas, o tempo gasto e as linhas por segundo
+        """
+        if batch_size < 1:
+            raise ValueError("batch_size deve ser maior que zero")
+        
+        total_rows = 0
+        batches = 0
+        start = time.perf_counter()
+        
+        try:
+            batch = []
+            for reading in readings:
+                batch.append(self._reading_to_row(reading))
+                if len(batch) >= batch_size:
+                    self._execute_batch(batch)
+                    total_rows += len(batch)
+                    batches += 1
+                    batch = []
+                    if commit_every and batches % commit_every == 0:
+                        self._commit()
+            
+            if batch:
+                self._execute_batch(batch)
+                total_rows += len(batch)
+                batches += 1
+            
+            self._commit()
+        except cx_Oracle.Error as error:
+            print(f"Erro ao inserir dados em lote: {error}")
+            raise
+        
+        elapsed = time.perf_counter() - start
+        rows_per_second = total_rows / elapsed if elapsed > 0 else float('inf')
+        print(f"{total_rows} registros inseridos em {elapsed:.2f}s ({rows_per_second:.0f} registros/s)")
+        return {
+            'rows': total_rows,
+            'batches': batches,
+            'seconds': elapsed,
+            'rows_per_second': rows_per_second
+        }
+
+    def upsert_many(self, readings, batch_size=1000):
+        """
+        Insere leituras em lote ignorando as que já existem (mesma reading_key).
+        
+        Idempotente: reenviar o mesmo lote (ex.: após uma falha antes do commit
+        ter sido confirmado) não duplica leituras nem os rollups, mesmo com
+        sessões concorrentes (índice único uq_sensor_data_reading_key). Leituras
+        distintas com o mesmo timestamp são todas gravadas. Faz um único commit
+        no final.
+        
+        Args:
+            readings: Iterável de dicts (com 'reading_key') ou de tuplas na ordem
+                de UPSERT_COLUMNS
+            batch_size: Número de linhas enviadas por round trip
+        
+        Returns:
+            dict com o total de linhas, as inseridas, as duplicadas e o tempo gasto
+        """
+        if batch_size < 1:
+            raise ValueError("batch_size deve ser maior que zero")
+        
+        total_rows = 0
+        inserted = 0
+        start = time.perf_counter()
+        
+        try:
+            batch = []
+            for reading in readings:
+                batch.append(self._reading_to_upsert_row(reading))
+                if len(batch) >= batch_size:
+                    inserted += self._upsert_batch(batch)
+                    total_rows += len(batch)
+                    batch = []
+            
+            if batch:
+                inserted += self._upsert_batch(batch)
+                total_rows += len(batch)
+            
+            self._commit()
+        except cx_Oracle.Error as error:
+            print(f"Erro ao inserir dados em lote (upsert): {error}")
+            raise
+        
+        return {
+            'rows': total_rows,
+            'inserted': inserted,
+            'duplicates': total_rows - inserted,
+            'seconds': time.perf_counter() - start
+        }
+
+    def _set_row_input_sizes(self, keyed=False):
+        """Tipos dos binds posicionais das tuplas de INSERT_COLUMNS (UPSERT_COLUMNS com keyed)."""
+        sizes = [
+            cx_Oracle.DB_TYPE_TIMESTAMP,
+            cx_Oracle.DB_TYPE_NUMBER,
+            cx_Oracle.DB_TYPE_NUMBER,
+            cx_Oracle.DB_TYPE_NUMBER,
+            cx_Oracle.DB_TYPE_NUMBER,
+            cx_Oracle.DB_TYPE_NUMBER,
+            cx_Oracle.DB_TYPE_NUMBER
+        ]
+        if keyed:
+            sizes.append(32)
+        self.cursor.setinputsizes(*sizes)
+
+    def _execute_batch(self, batch):
+        """Envia um lote de linhas em um único round trip."""
+        self._set_row_input_sizes()
+        self.cursor.executemany(INSERT_SQL, batch)
+        self._apply_rollups(batch)
+
+    def _upsert_batch(self, batch):
+        """
+        MERGE de um lote; só as linhas de fato inseridas entram nos rollups. Retorna quantas.
+        
+        Com batcherrors, uma chave gravada por outra sessão ao mesmo tempo (ORA-00001
+        no índice único) conta como duplicada sem abortar o lote; outros erros sobem.
+        """
+        self._set_row_input_sizes(keyed=True)
+        self.cursor.executemany(UPSERT_SQL, batch, batcherrors=True, arraydmlrowcounts=True)
+        failed = set()
+        for error in self.cursor.getbatcherrors():
+            if error.code != UNIQUE_VIOLATION:
+                raise cx_Oracle.DatabaseError(error)
+            failed.add(error.offset)
+        counts = self.cursor.getarraydmlrowcounts()
+        inserted = [
+            row[:-1] for offset, (row, count) in enumerate(zip(batch, counts))
+            if count and offset not in failed
+        ]
+        self._apply_rollups(inserted)
+        return len(inserted)
+
+    def _apply_rollups(self, rows):
+        """Acumula as linhas recém-inseridas nos deltas de rollup, aplicados em _commit."""
+        if not rows:
+            return
+        for bucket, deltas in self._pending_rollups.items():
+            _rollup_deltas(rows, bucket, deltas)
+
+    def _flush_rollups(self):
+        """
+        Soma os deltas acumulados nas tabelas de rollup (mesma transação dos INSERTs).
+        
+        Um MERGE por intervalo tocado desde o último commit, logo antes dele: as
+        linhas de rollup (disputadas por todos os escritores) ficam bloqueadas só
+        por um round trip, e em ordem de intervalo, sem deadlock entre sessões.
+        """
+        for bucket, deltas in self._pending_rollups.items():
+            if not deltas:
+                continue
+            # Tipos explícitos: min/max podem ser None na primeira linha do lote
+            self.cursor.setinputsizes(
+                bucket_start=cx_Oracle.DB_TYPE_TIMESTAMP,
+                **dict.fromkeys(ROLLUP_COLUMNS, cx_Oracle.DB_TYPE_NUMBER)
+            )
+            self.cursor.executemany(ROLLUP_MERGE_SQL[bucket], [deltas[start] for start in sorted(deltas)])
+            deltas.clear()
+
+    def _commit(self):
+        """Aplica os rollups pendentes e faz commit."""
+        self._flush_rollups()
+        self.connection.commit()
+
+    def rebuild_rollups(self, since=None, until=None):
+        """
+        Recalcula as tabelas de rollup a partir de sensor_data (backfills e correções).
+        
+        Args:
+            since, until: Janela de tempo a recalcular; os intervalos que a tocam são
+                recalculados por inteiro. None recalcula tudo.
+        """
+        try:
+            self._rebuild_rollups(since, until)
+            self._commit()
+            print("Agregações reconstruídas com sucesso!")
+        except cx_Oracle.Error as error:
+            print(f"Erro ao reconstruir agregações: {error}")
+            raise
+
+    def _rebuild_rollups(self, since=None, until=None, exclude=None):
+        """
+        Recalcula os rollups da janela sem fazer commit.
+        
+        exclude: (low, high) opcional; as leituras com low <= timestamp < high são
+        ignoradas, como se já tivessem sido apagadas (ver delete_range).
+        """
+        # Deltas pendentes primeiro: os intervalos recalculados os substituem
+        self._flush_rollups()
+        aggregates = ["COUNT(*)"]
+        for sensor in AGGREGATE_SENSORS:
+            aggregates += [
+                f"COUNT({sensor})", f"SUM({sensor})", f"SUM({sensor} * {sensor})",
+                f"MIN({sensor})", f"MAX({sensor})"
+            ]
+        aggregates.append("SUM(CASE WHEN relay_status > 0 THEN 1 ELSE 0 END)")
+        
+        for bucket, table in ROLLUP_TABLES.items():
+            fmt = AGGREGATE_BUCKETS[bucket]
+            step = "1" if bucket == 'day' else "1/24"
+            delete_conditions = []
+            select_conditions = []
+            params = {}
+            if since is not None:
+                delete_conditions.append(f"bucket_start >= TRUNC(:since, '{fmt}')")
+                select_conditions.append(f"timestamp >= TRUNC(:since, '{fmt}')")
+                params['since'] = since
+            if until is not None:
+                delete_conditions.append(f"bucket_start <= TRUNC(:until, '{fmt}')")
+                select_conditions.append(f"timestamp < TRUNC(:until, '{fmt}') + {step}")
+                params['until'] = until
+            insert_params = dict(params)
+            if exclude is not None:
+                bounds = []
+                if exclude[0] is not None:
+                    bounds.append("timestamp >= :exclude_low")
+                    insert_params['exclude_low'] = exclude[0]
+                if exclude[1] is not None:
+                    bounds.append("timestamp < :exclude_high")
+                    insert_params['exclude_high'] = exclude[1]
+                select_conditions.append(f"NOT ({' AND '.join(bounds)})")
+            
+            delete_sql = f"DELETE FROM {table}"
+            if delete_conditions:
+                delete_sql += " WHERE " + " AND ".join(delete_conditions)
+            self.cursor.execute(delete_sql, params)
+            
+            insert_sql = f"""
+                INSERT INTO {table} (bucket_start, {', '.join(ROLLUP_COLUMNS)})
+                SELECT TRUNC(timestamp, '{fmt}'), {', '.join(aggregates)}
+                FROM sensor_data
+            """
+            if select_conditions:
+                insert_sql += " WHERE " + " AND ".join(select_conditions)
+            insert_sql += f" GROUP BY TRUNC(timestamp, '{fmt}')"
+            self.cursor.execute(insert_sql, insert_params)
+
+    def _get_reading_timestamp(self, id):
+        """Retorna o timestamp de uma leitura (None se não existir)."""
+        self.cursor.execute("SELECT timestamp FROM sensor_data WHERE id = :1", (id,))
+        row = self.cursor.fetchone()
+        return row[0] if row else None
+
+    def get_readings(self, since=None, until=None, columns=None, limit=None, descending=False,
+                     after_id=None, seek=None):
+        """
+        Recupera leituras dentro de uma janela de tempo, projetando apenas as colunas pedidas.
+        
+        O filtro em timestamp usa o índice idx_sensor_data_ts_id.
+        
+        Args:
+            since: Timestamp inicial (inclusivo) ou None para sem limite
+            until: Timestamp final (inclusivo) ou None para sem limite
+            columns: Lista de colunas (ver READING_COLUMNS) ou None para todas
+            limit: Número máximo de linhas ou None para todas
+            descending: Se True, ordena da leitura mais recente para a mais antiga
+            after_id: Se informado, retorna apenas leituras com id maior que este
+            seek: Chave (timestamp, id); retorna apenas leituras depois dela na ordem
+                pedida (paginação por keyset, ver get_page)
+        
+        Returns:
+            Lista de dicts com as colunas em maiúsculas (como get_all_readings)
+        """
+        sql, params = self._build_readings_query(since, until, columns, limit, descending, after_id=after_id,
+                                                 seek=seek)
         try:
-            self.cursor.execute("SELECT * FROM sensor_data ORDER BY timestamp ASC")
+            self.cursor.execute(sql, params)
             columns = [col[0] for col in self.cursor.description]
             readings = [dict(zip(columns, row)) for row in self.cursor.fetchall()]
             return readings
@@ -139,16 +741,275 @@ class DatabaseManager:
             print(f"Erro ao recuperar dados: {error}")
             raise
 
+    def iter_readings(self, since=None, until=None, columns=None, chunk_size=1000,
+                      arraysize=None, prefetchrows=None):
+        """
+        Gera as leituras em blocos de tamanho fixo (listas de dicts), com memória limitada.
+        
+        Args:
+            since, until, columns: Mesmos filtros de get_readings
+            chunk_size: Número de linhas por bloco
+            arraysize: Linhas buscadas por round trip (padrão: chunk_size)
+            prefetchrows: Linhas pré-buscadas na execução (padrão: arraysize + 1)
+        """
+        for names, rows in self._iter_row_chunks(since, until, columns, chunk_size, arraysize, prefetchrows):
+            yield [dict(zip(names, row)) for row in rows]
+
+    def iter_reading_frames(self, since=None, until=None, columns=None, chunk_size=10000,
+                            arraysize=None, prefetchrows=None):
+        """Gera as leituras em blocos como pandas DataFrames (mesmos parâmetros de iter_readings)."""
+        import pandas as pd
+        
+        for names, rows in self._iter_row_chunks(since, until, columns, chunk_size, arraysize, prefetchrows):
+            yield pd.DataFrame.from_records(rows, columns=names)
+
+    def _iter_row_chunks(self, since, until, columns, chunk_size, arraysize, prefetchrows):
+        """Executa a consulta em um cursor próprio e gera (nomes das colunas, bloco de tuplas)."""
+        if chunk_size < 1:
+            raise ValueError("chunk_size deve ser maior que zero")
+        sql, params = self._build_readings_query(since, until, columns)
+        
+        # Cursor dedicado: o streaming não interfere no self.cursor
+        cursor = self.connection.cursor()
+        try:
+            cursor.arraysize = arraysize or chunk_size
+            cursor.prefetchrows = cursor.arraysize + 1 if prefetchrows is None else prefetchrows
+            cursor.execute(sql, params)
+            names = [col[0] for col in cursor.description]
+            while True:
+                rows = cursor.fetchmany(chunk_size)
+                if not rows:
+                    break
+                yield names, rows
+        except cx_Oracle.Error as error:
+            print(f"Erro ao recuperar dados: {error}")
+            raise
+        finally:
+            cursor.close()
+
+    def get_readings_frame(self, since=None, until=None, columns=None, chunk_size=50000, after_id=None):
+        """
+        Recupera leituras direto em colunas NumPy tipadas, sem dicts por linha.
+        
+        Sensores viram float64, btn_p/btn_k/relay_status viram int8 e o timestamp
+        vira datetime64. Os números são buscados como double nativo (output type
+        handler) e cada bloco do fetchmany é convertido de uma vez para um array.
+        
+        Args:
+            since, until, columns, after_id: Mesmos filtros de get_readings
+            chunk_size: Linhas por round trip
+        
+        Returns:
+            pandas DataFrame com as colunas em maiúsculas
+        """
+        import numpy as np
+        
+        if columns is None:
+            columns = READING_COLUMNS
+        columns = [column.lower() for column in columns]
+        sql, params = self._build_readings_query(
+            since, until, columns, after_id=after_id,
+            expressions={'timestamp': f"{TIMESTAMP_US_SQL} AS timestamp_us"}
+        )
+        
+        cursor = self.connection.cursor()
+        try:
+            cursor.arraysize = chunk_size
+            cursor.prefetchrows = chunk_size + 1
+            cursor.outputtypehandler = _binary_double_output_handler
+            cursor.execute(sql, params)
+            blocks = []
+            while True:
+                rows = cursor.fetchmany(chunk_size)
+                if not rows:
+                    break
+                blocks.append(np.array(rows, dtype=np.float64))
+        except cx_Oracle.Error as error:
+            print(f"Erro ao recuperar dados: {error}")
+            raise
+        finally:
+            cursor.close()
+        
+        values = np.concatenate(blocks) if blocks else np.empty((0, len(columns)))
+        return frame_from_values(values, columns)
+
+    def get_timestamp_range(self):
+        """Retorna (menor, maior) timestamp da tabela, ou (None, None) se vazia."""
+        try:
+            self.cursor.execute("SELECT MIN(timestamp), MAX(timestamp) FROM sensor_data")
+            return self.cursor.fetchone()
+        except cx_Oracle.Error as error:
+            print(f"Erro ao recuperar intervalo de datas: {error}")
+            raise
+
+    def aggregate(self, bucket='day', since=None, until=None, use_rollups=True):
+        """
+        Calcula estatísticas por dia ou hora no próprio Oracle.
+        
+        Por padrão lê as tabelas de rollup (uma linha por intervalo, custo proporcional
+        ao número de intervalos); com use_rollups=False agrega sensor_data com
+        GROUP BY TRUNC(timestamp).
+        
+        Args:
+            bucket: 'day' ou 'hour'
+            since, until: Janela de tempo (inclusiva). Nos rollups, os intervalos que
+                tocam a janela entram por inteiro.
+            use_rollups: Se False, agrega as leituras brutas
+        
+        Returns:
+            pandas DataFrame indexado pelo início de cada intervalo (BUCKET), com
+            READINGS, <SENSOR>_mean/_min/_max/_std para temperatura, umidade e luz,
+            RELAY_STATUS_mean e RELAY_STATUS_sum
+        """
+        import pandas as pd
+        
+        if bucket not in AGGREGATE_BUCKETS:
+            raise ValueError(f"bucket deve ser um de {list(AGGREGATE_BUCKETS)}")
+        fmt = AGGREGATE_BUCKETS[bucket]
+        
+        names = aggregate_columns()
+        
+        conditions = []
+        params = {}
+        if use_rollups:
+            select_list = ["bucket_start", "readings"]
+            for sensor in AGGREGATE_SENSORS:
+                count, total, sumsq = f"{sensor}_count", f"{sensor}_sum", f"{sensor}_sumsq"
+                select_list += [
+                    f"{total} / NULLIF({count}, 0)",
+                    f"{sensor}_min",
+                    f"{sensor}_max",
+                    f"CASE WHEN {count} > 1 THEN "
+                    f"SQRT(GREATEST(({sumsq} - {total} * {total} / {count}) / ({count} - 1), 0)) END"
+                ]
+            select_list += ["relay_on / NULLIF(readings, 0)", "relay_on"]
+            if since is not None:
+                conditions.append(f"bucket_start >= TRUNC(:since, '{fmt}')")
+                params['since'] = since
+            if until is not None:
+                conditions.append("bucket_start <= :until")
+                params['until'] = until
+            sql = f"SELECT {', '.join(select_list)} FROM {ROLLUP_TABLES[bucket]}"
+            order_by = " ORDER BY bucket_start"
+        else:
+            truncated = f"TRUNC(timestamp, '{fmt}')"
+            select_list = [f"{truncated} AS bucket", "COUNT(*) AS readings"]
+            for sensor in AGGREGATE_SENSORS:
+                select_list += [f"{function}({sensor})" for function in ('AVG', 'MIN', 'MAX', 'STDDEV_SAMP')]
+            select_list += ["AVG(relay_status)", "SUM(relay_status)"]
+            if since is not None:
+                conditions.append("timestamp >= :since")
+                params['since'] = since
+            if until is not None:
+                conditions.append("timestamp <= :until")
+                params['until'] = until
+            sql = f"SELECT {', '.join(select_list)} FROM sensor_data"
+            order_by = f" GROUP BY {truncated} ORDER BY 1"
+        
+        if conditions:
+            sql += " WHERE " + " AND ".join(conditions)
+        sql += order_by
+        
+        cursor = self.connection.cursor()
+        try:
+            cursor.outputtypehandler = _binary_double_output_handler
+            cursor.execute(sql, params)
+            rows = cursor.fetchall()
+        except cx_Oracle.Error as error:
+            print(f"Erro ao agregar dados: {error}")
+            raise
+        finally:
+            cursor.close()
+        
+        frame = pd.DataFrame.from_records(rows, columns=names, index='BUCKET')
+        frame['READINGS'] = frame['READINGS'].astype('int64')
+        return frame
+
+    def get_max_id(self):
+        """Retorna o maior id da tabela (0 se vazia)."""
+        try:
+            self.cursor.execute("SELECT NVL(MAX(id), 0) FROM sensor_data")
+            return int(self.cursor.fetchone()[0])
+        except cx_Oracle.Error as error:
+            print(f"Erro ao recuperar último id: {error}")
+            raise
+
+    def count_readings(self, max_id=None):
+        """Retorna o número de leituras (só as com id <= max_id, se informado)."""
+        try:
+            if max_id is None:
+                self.cursor.execute("SELECT COUNT(*) FROM sensor_data")
+            else:
+                self.cursor.execute("SELECT COUNT(*) FROM sensor_data WHERE id <= :1", (int(max_id),))
+            return int(self.cursor.fetchone()[0])
+        except cx_Oracle.Error as error:
+            print(f"Erro ao contar leituras: {error}")
+            raise
+
+    @staticmethod
+    def _build_readings_query(since=None, until=None, columns=None, limit=None, descending=False,
+                              after_id=None, expressions=None, seek=None):
+        """
+        Monta o SELECT (e os binds) das consultas de leitura.
+        
+        expressions permite trocar colunas por expressões SQL com alias (ex.: timestamp em epoch).
+        seek (timestamp, id) restringe às leituras depois dessa chave na ordem pedida.
+        """
+        if columns is None:
+            columns = READING_COLUMNS
+        columns = [column.lower() for column in columns]
+        invalid = [column for column in columns if column not in READING_COLUMNS]
+        if invalid:
+            raise ValueError(f"Colunas inválidas: {invalid}")
+        
+        conditions = []
+        params = {}
+        if since is not None:
+            conditions.append("timestamp >= :since")
+            params['since'] = since
+        if until is not None:
+            conditions.append("timestamp <= :until")
+            params['until'] = until
+        if after_id is not None:
+            conditions.append("id > :after_id")
+            params['after_id'] = after_id
+        if seek is not None:
+            # Keyset em (timestamp, id); o filtro simples em timestamp permite o range scan no índice
+            op = "<" if descending else ">"
+            conditions.append(f"timestamp {op}= :seek_ts")
+            conditions.append(f"(timestamp {op} :seek_ts OR id {op} :seek_id)")
+            params['seek_ts'], params['seek_id'] = seek[0], int(seek[1])
+        
+        expressions = expressions or {}
+        select_list = [expressions.get(column, column) for column in columns]
+        sql = f"SELECT {', '.join(select_list)} FROM sensor_data"
+        if conditions:
+            sql += " WHERE " + " AND ".join(conditions)
+        # id desempata leituras com o mesmo timestamp (ordem total para a paginação)
+        direction = "DESC" if descending else "ASC"
+        sql += f" ORDER BY timestamp {direction}, id {direction}"
+        if limit is not None:
+            sql += " FETCH FIRST :row_limit ROWS ONLY"
+            params['row_limit'] = int(limit)
+        return sql, params
+
     def update_reading(self, id, field, value):
         """Atualiza um valor específico de uma leitura."""
         try:
+            timestamp = self._get_reading_timestamp(id)
             self.cursor.execute(f"""
                 UPDATE sensor_data 
                 SET {field} = :1
                 WHERE id = :2
             """, (value, id))
             
-            self.connection.commit()
+            # Recalcula os intervalos afetados nos rollups
+            if timestamp is not None:
+                self._rebuild_rollups(since=timestamp, until=timestamp)
+            if field.lower() == 'timestamp':
+                self._rebuild_rollups(since=value, until=value)
+            
+            self._commit()
             print(f"Registro {id} atualizado com sucesso!")
         except cx_Oracle.Error as error:
             print(f"Erro ao atualizar dados: {error}")
@@ -157,8 +1018,11 @@ class DatabaseManager:
     def delete_reading(self, id):
         """Deleta uma leitura específica."""
         try:
+            timestamp = self._get_reading_timestamp(id)
             self.cursor.execute("DELETE FROM sensor_data WHERE id = :1", (id,))
-            self.connection.commit()
+            if timestamp is not None:
+                self._rebuild_rollups(since=timestamp, until=timestamp)
+            self._commit()
             print(f"Registro {id} deletado com sucesso!")
         except cx_Oracle.Error as error:
             print(f"Erro ao deletar registro: {error}")
@@ -168,26 +1032,181 @@ class DatabaseManager:
         """Deleta todas as leituras."""
         try:
             self.cursor.execute("DELETE FROM sensor_data")
-            self.connection.commit()
+            for table in ROLLUP_TABLES.values():
+                self.cursor.execute(f"DELETE FROM {table}")
+            self._commit()
             print("Todos os registros foram deletados com sucesso!")
         except cx_Oracle.Error as error:
             print(f"Erro ao deletar registros: {error}")
             raise
 
+    def truncate_all_readings(self):
+        """
+        Esvazia sensor_data e os rollups com TRUNCATE TABLE, sem gerar undo/redo por linha.
+        
+        Ao contrário de delete_all_readings, é DDL: faz commit implícito (inclusive
+        do que estiver pendente nesta conexão), não pode ser desfeito com rollback e
+        exige ser dono da tabela (ou o privilégio DROP ANY TABLE).
+        """
+        try:
+            self.cursor.execute("TRUNCATE TABLE sensor_data")
+            for table in ROLLUP_TABLES.values():
+                self.cursor.execute(f"TRUNCATE TABLE {table}")
+            for deltas in self._pending_rollups.values():
+                deltas.clear()
+            print("Todos os registros foram deletados com sucesso!")
+        except cx_Oracle.Error as error:
+            print(f"Erro ao deletar registros: {error}")
+            raise
+
+    def get_partitioning(self):
+        """Retorna o intervalo de particionamento de sensor_data (texto do Oracle) ou None se não particionada."""
+        self.cursor.execute("""
+            SELECT interval FROM user_part_tables WHERE table_name = 'SENSOR_DATA'
+        """)
+        row = self.cursor.fetchone()
+        if row is None:
+            return None
+        return row[0] or 'RANGE'
+
+    def get_partitions(self):
+        """
+        Lista as partições de sensor_data em ordem.
+        
+        Returns:
+            Lista de dicts com name, low e high (limites [low, high) em datetime; low é
+            None na primeira partição) e interval (False para a partição inicial, que
+            não pode ser removida)
+        """
+        interval = (self.get_partitioning() or '').upper()
+        self.cursor.execute("""
+            SELECT partition_name, high_value, interval
+            FROM user_tab_partitions
+            WHERE table_name = 'SENSOR_DATA'
+            ORDER BY partition_position
+        """)
+        partitions = []
+        previous_high = None
+        for name, high_value, is_interval in self.cursor.fetchall():
+            match = _HIGH_VALUE_PATTERN.search(high_value or '')
+            high = datetime.strptime(match.group(1), '%Y-%m-%d %H:%M:%S') if match else None
+            low = previous_high
+            # Partições intervalares só existem onde há dados: cobrem um único intervalo
+            if is_interval == 'YES' and high is not None:
+                if 'MONTH' in interval:
+                    start = (high.replace(day=1) - timedelta(days=1)).replace(day=1)
+                else:
+                    start = high - timedelta(days=1)
+                low = max(low, start) if low is not None else start
+            partitions.append({'name': name, 'low': low, 'high': high, 'interval': is_interval == 'YES'})
+            previous_high = high
+        return partitions
+
+    def delete_range(self, since=None, until=None, mode='drop'):
+        """
+        Deleta as leituras com since <= timestamp < until.
+        
+        Em tabela particionada, as partições inteiramente dentro da janela são
+        removidas (mode='drop') ou esvaziadas (mode='truncate') com UPDATE GLOBAL
+        INDEXES, sem gerar undo/redo por linha; só as linhas das partições nas
+        bordas da janela passam por DELETE. Sem partições, faz um DELETE simples.
+        Os rollups dos intervalos afetados são recalculados.
+        
+        O DELETE das bordas e o recálculo dos rollups (já sem as linhas das
+        partições inteiras) formam uma transação, confirmada antes do DDL. Como
+        cada DROP/TRUNCATE PARTITION faz commit próprio, uma falha no meio deixa
+        só partições ainda por remover, e chamar delete_range de novo termina o
+        trabalho; os rollups já refletem o estado final.
+        
+        Args:
+            since: Timestamp inicial (inclusivo) ou None para sem limite
+            until: Timestamp final (exclusivo) ou None para sem limite
+            mode: 'drop' ou 'truncate' para as partições inteiras
+        
+        Returns:
+            dict com as partições removidas/esvaziadas e o total de linhas apagadas
+        """
+        if mode not in ('drop', 'truncate'):
+            raise ValueError("mode deve ser 'drop' ou 'truncate'")
+        
+        try:
+            # Partições inteiramente dentro da janela (contíguas: cobrem [low, high))
+            whole = []
+            if self.get_partitioning() is not None:
+                for partition in self.get_partitions():
+                    low, high = partition['low'], partition['high']
+                    inside = (
+                        (since is None or (low is not None and low >= since)) and
+                        (until is None or (high is not None and high <= until))
+                    )
+                    if inside:
+                        whole.append(partition)
+            exclude = (whole[0]['low'], whole[-1]['high']) if whole else None
+            
+            # Linhas das bordas (o filtro em timestamp poda as demais partições) e
+            # rollups sem as partições inteiras, numa só transação
+            conditions = []
+            params = {}
+            if since is not None:
+                conditions.append("timestamp >= :since")
+                params['since'] = since
+            if until is not None:
+                conditions.append("timestamp < :until")
+                params['until'] = until
+            if exclude is not None:
+                if exclude[0] is not None:
+                    conditions.append("NOT (timestamp >= :exclude_low AND timestamp < :exclude_high)")
+                    params['exclude_low'] = exclude[0]
+                else:
+                    conditions.append("timestamp >= :exclude_high")
+                params['exclude_high'] = exclude[1]
+            delete_sql = "DELETE FROM sensor_data"
+            if conditions:
+                delete_sql += " WHERE " + " AND ".join(conditions)
+            self.cursor.execute(delete_sql, params)
+            rows = self.cursor.rowcount
+            self._rebuild_rollups(since, until, exclude=exclude)
+            self._commit()
+            
+            # DDL por último: cada operação faz commit e pode ser repetida
+            dropped, truncated = [], []
+            for partition in whole:
+                name = partition['name']
+                self.cursor.execute(f'SELECT COUNT(*) FROM sensor_data PARTITION ("{name}")')
+                rows += self.cursor.fetchone()[0]
+                # A partição inicial (não intervalar) não pode ser removida: só esvaziada
+                if mode == 'drop' and partition['interval']:
+                    self.cursor.execute(f'ALTER TABLE sensor_data DROP PARTITION "{name}" UPDATE GLOBAL INDEXES')
+                    dropped.append(name)
+                else:
+                    self.cursor.execute(f'ALTER TABLE sensor_data TRUNCATE PARTITION "{name}" UPDATE GLOBAL INDEXES')
+                    truncated.append(name)
+            
+            print(f"{rows} registros deletados ({len(dropped)} partições removidas, {len(truncated)} esvaziadas).")
+            return {'rows': rows, 'dropped': dropped, 'truncated': truncated}
+        except cx_Oracle.Error as error:
+            print(f"Erro ao deletar intervalo: {error}")
+            raise
+
+# Leituras por página na opção 2 do menu
+CLI_PAGE_SIZE = 20
+
 def print_menu():
     """Imprime o menu de opções."""
     print("\n=== Sistema de Gerenciamento de Dados dos Sensores ===")
     print("1. Criar - Inserir dados aleatórios")
-    print("2. Ler - Mostrar todos os registros")
+    print("2. Ler - Navegar pelos registros (paginado)")
     print("3. Atualizar - Modificar um registro")
     print("4. Deletar - Remover um registro")
     print("5. Deletar - Remover todos os registros")
-    print("6. Sair")
+    print("6. Reconstruir agregações (rollups)")
+    print("7. Aplicar retenção - Remover leituras antigas")
+    print("8. Sair")
     print("================================================")
 
 def main():
-    """Função principal com menu interativo."""
-    db = DatabaseManager()
+    """Função principal com menu interativo (backend escolhido por DB_BACKEND)."""
+    db = get_storage()
     
     try:
         # Conecta ao banco e cria tabelas
@@ -196,7 +1215,7 @@ def main():
         
         while True:
             print_menu()
-            choice = input("Escolha uma opção (1-6): ")
+            choice = input("Escolha uma opção (1-8): ")
             
             if choice == '1':
                 # Criar - dados aleatórios
@@ -205,10 +1224,12 @@ def main():
                 print("Dados gerados:", data)
                 
             elif choice == '2':
-                # Ler - todos os registros
-                readings = db.get_all_readings()
-                if readings:
-                    for reading in readings:
+                # Ler - registros paginados, do mais recente para o mais antigo
+                page = db.get_page(page_size=CLI_PAGE_SIZE)
+                if not page['rows']:
+                    print("Nenhum registro encontrado.")
+                while page['rows']:
+                    for reading in page['rows']:
                         print("\nID:", reading['ID'])
                         print("Timestamp:", reading['TIMESTAMP'])
                         print(f"Temperatura: {reading['TEMPERATURE']}°C")
@@ -217,8 +1238,20 @@ def main():
                         print(f"Botão P: {'Ativado' if reading['BTN_P'] else 'Desativado'}")
                         print(f"Botão K: {'Ativado' if reading['BTN_K'] else 'Desativado'}")
                         print(f"Relé: {'Ligado' if reading['RELAY_STATUS'] else 'Desligado'}")
-                else:
-                    print("Nenhum registro encontrado.")
+                    
+                    options = []
+                    if page['next']:
+                        options.append("[n] próxima")
+                    if page['prev']:
+                        options.append("[p] anterior")
+                    options.append("[q] voltar")
+                    action = input(f"\n{', '.join(options)}: ").strip().lower()
+                    if action == 'n' and page['next']:
+                        page = db.get_page(page_size=CLI_PAGE_SIZE, after=page['next'])
+                    elif action == 'p' and page['prev']:
+                        page = db.get_page(page_size=CLI_PAGE_SIZE, before=page['prev'])
+                    elif action == 'q':
+                        break
                 
             elif choice == '3':
                 # Atualizar
@@ -259,12 +1292,23 @@ def main():
                     db.delete_all_readings()
                 
             elif choice == '6':
+                # Reconstruir rollups (ex.: após backfill ou carga externa)
+                db.rebuild_rollups()
+                
+            elif choice == '7':
+                # Retenção: remove leituras antigas (partições inteiras quando particionada)
+                days = input("Manter os últimos quantos dias? ")
+                confirm = input(f"Deletar as leituras com mais de {days} dias? (s/n): ")
+                if confirm.lower() == 's':
+                    db.apply_retention(int(days))
+                
+            elif choice == '8':
                 # Sair
                 print("Encerrando o programa...")
                 break
                 
             else:
-                print("Opção inválida! Por favor, escolha uma opção entre 1 e 6.")
+                print("Opção inválida! Por favor, escolha uma opção entre 1 e 8.")
         
     except Exception as e:
         print(f"Erro durante a execução: {e}")
@@ -0,0 +1,107 @@
+import os
+import sys
+import time
+import fcntl
+import struct
+import termios
+import tty
+import argparse
+import numpy as np
+
+# Validation thresholds of main.cpp (HUMIDITY_MIN/MAX, TEMP_MIN/MAX, LIGHT_MIN/MAX)
+HUMIDITY_RANGE = (30, 80)
+TEMP_RANGE = (10, 50)
+LIGHT_RANGE = (0, 700)
+
+def _float(value):
+    """Serial.print(float): two decimals, 'nan' for failed DHT reads"""
+    return 'nan' if np.isnan(value) else f"{value:.2f}"
+
+def _bool(value):
+    return 'true' if value else 'false'
+
+def firmware_lines(rng, nan_rate=0.0):
+    """
+    Yield the lines printed by printJSONData() for successive readings,
+    with slowly drifting sensors and buttons that toggle now and then.
+    """
+    humidity, temperature, light = 60.0, 25.0, 300
+    btn_p = btn_k = False
+    while True:
+        humidity = float(np.clip(humidity + rng.normal(0, 1), 0, 100))
+        temperature = float(np.clip(temperature + rng.normal(0, 0.3), -40, 80))
+        light = int(np.clip(light + rng.normal(0, 40), 0, 4095))
+        if rng.random() < 0.05:
+            btn_p = not btn_p
+        if rng.random() < 0.05:
+            btn_k = not btn_k
+        dht_failed = rng.random() < nan_rate
+        read_humidity = float('nan') if dht_failed else humidity
+        read_temperature = float('nan') if dht_failed else temperature
+
+        # NaN fails every comparison, as in validateSensors()
+        valid = (HUMIDITY_RANGE[0] <= read_humidity <= HUMIDITY_RANGE[1] and
+                 TEMP_RANGE[0] <= read_temperature <= TEMP_RANGE[1] and
+                 LIGHT_RANGE[0] <= light <= LIGHT_RANGE[1])
+        yield (f'{{"sensors":{{"humidity":{_float(read_humidity)},"temperature":{_float(read_temperature)},'
+               f'"light":{light}}},"buttons":{{"btnP":{_bool(btn_p)},"btnK":{_bool(btn_k)}}}}}')
+        yield f'{{"validation":{{"sensorsValid":{_bool(valid)},"buttonActive":{_bool(btn_p or btn_k)}}}}}'
+        yield '---'
+        yield f"{_float(read_temperature)},{_float(read_humidity)},{light}"
+
+def open_device():
+    """Create a raw pseudo-terminal; returns (master_fd, slave_fd, slave_path)"""
+    master, slave = os.openpty()
+    tty.setraw(slave, termios.TCSANOW)
+    path = os.ttyname(slave)
+    # Keep the slave open so the pty survives until the reader opens it
+    return master, slave, path
+
+def wait_until_read(slave, timeout=5.0):
+    """Wait for the reader to drain the pty (closing the master discards unread data)"""
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        pending = struct.unpack('i', fcntl.ioctl(slave, termios.FIONREAD, b'\0' * 4))[0]
+        if not pending:
+            return
+        time.sleep(0.05)
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Fake ESP32: emits the main.cpp serial output on a pty")
+    parser.add_argument('--interval', type=float, default=1.0,
+                        help='seconds between readings (main.cpp: 1s; 0 = as fast as possible)')
+    parser.add_argument('--count', type=int, default=None, help='readings to emit (default: forever)')
+    parser.add_argument('--nan-rate', type=float, default=0.02, help='fraction of failed DHT22 reads')
+    parser.add_argument('--seed', type=int, default=None, help='random seed, for reproducible streams')
+    parser.add_argument('--stdout', action='store_true', help='write to stdout instead of a pty (for pipes)')
+    return parser.parse_args(argv)
+
+def main(argv=None):
+    args = parse_args(argv)
+    rng = np.random.default_rng(args.seed)
+    if args.stdout:
+        out, slave = sys.stdout.fileno(), None
+    else:
+        out, slave, path = open_device()
+        print(f"Fake ESP32 on {path} (run: python ingest.py {path})", file=sys.stderr)
+
+    lines = firmware_lines(rng, args.nan_rate)
+    emitted = 0
+    try:
+        while args.count is None or emitted < args.count:
+            block = ''.join(next(lines) + '\r\n' for _ in range(4))  # Serial.println ends lines with CRLF
+            os.write(out, block.encode())
+            emitted += 1
+            if args.interval:
+                time.sleep(args.interval)
+    except (KeyboardInterrupt, BrokenPipeError):
+        pass
+    finally:
+        if slave is not None:
+            wait_until_read(slave)
+            os.close(slave)
+            os.close(out)
+    print(f"{emitted} readings emitted", file=sys.stderr)
+
+if __name__ == "__main__":
+    main()
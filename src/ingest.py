@@ -0,0 +1,391 @@
+import os
+import re
+import sys
+import json
+import stat
+import time
+import asyncio
+import argparse
+from datetime import datetime
+from concurrent.futures import ThreadPoolExecutor
+from storage import get_storage
+from spool import POLICIES, Spool, SpoolDrainer, new_reading_key
+
+# Plausible ranges of the hardware (DHT22 and the ESP32 12-bit ADC); readings
+# outside them are transmission/sensor errors. The firmware's own (narrower)
+# thresholds only decide the relay and arrive in the validation line.
+SENSOR_RANGES = {
+    'humidity': (0.0, 100.0),
+    'temperature': (-40.0, 80.0),
+    'light': (0, 4095)
+}
+
+# Arduino's Serial.print writes non-finite floats as bare words, which is not JSON
+_NON_FINITE = re.compile(r'(?<=[:\[,])\s*(nan|-?inf|ovf)\b', re.IGNORECASE)
+
+BAUD_RATES = (9600, 19200, 38400, 57600, 115200)
+
+def parse_line(line):
+    """
+    Parse one line of the firmware output.
+
+    Returns ('sensors', dict), ('validation', dict) or None for lines that
+    are not readings (the '---' separator, the CSV plotter line, noise).
+    Raises ValueError for JSON lines that cannot be parsed.
+    """
+    line = line.strip()
+    if not line.startswith('{'):
+        return None
+    try:
+        message = json.loads(_NON_FINITE.sub(' null', line))
+    except json.JSONDecodeError as e:
+        raise ValueError(f"Malformed JSON: {e}")
+    if not isinstance(message, dict):
+        raise ValueError("Malformed JSON: not an object")
+    if 'sensors' in message:
+        return 'sensors', message
+    if 'validation' in message:
+        return 'validation', message
+    return None
+
+def _number(values, name, integer=False):
+    value = values.get(name)
+    if isinstance(value, bool) or not isinstance(value, (int, float)):
+        raise ValueError(f"Invalid {name}: {value!r}")
+    low, high = SENSOR_RANGES[name]
+    if not low <= value <= high:
+        raise ValueError(f"{name} out of range: {value}")
+    return int(value) if integer else float(value)
+
+def _flag(values, name):
+    value = values.get(name)
+    if not isinstance(value, bool):
+        raise ValueError(f"Invalid {name}: {value!r}")
+    return int(value)
+
+def build_row(sensors_message, validation_message, timestamp):
+    """
+    Validate a sensors/validation pair and build the insert tuple
+    (INSERT_COLUMNS order). The relay is on when the firmware reported valid
+    sensors and an active button, as main.cpp drives it.
+    """
+    sensors = sensors_message.get('sensors') or {}
+    buttons = sensors_message.get('buttons') or {}
+    validation = validation_message.get('validation') or {}
+    btn_p = _flag(buttons, 'btnP')
+    btn_k = _flag(buttons, 'btnK')
+    relay_status = int(_flag(validation, 'sensorsValid') and _flag(validation, 'buttonActive'))
+    return (
+        timestamp,
+        _number(sensors, 'humidity'),
+        _number(sensors, 'temperature'),
+        _number(sensors, 'light', integer=True),
+        btn_p,
+        btn_k,
+        relay_status
+    )
+
+class ReadingAssembler:
+    """
+    Pairs each sensors line with the validation line that follows it.
+
+    The reading is timestamped when its sensors line arrives. feed() returns
+    (row, received_monotonic) when a reading is complete, else None; problems
+    are counted in self.counters instead of raised.
+    """
+
+    def __init__(self):
+        self._pending = None
+        self.counters = {'lines': 0, 'readings': 0, 'invalid': 0, 'malformed': 0, 'incomplete': 0}
+
+    def feed(self, line):
+        self.counters['lines'] += 1
+        try:
+            parsed = parse_line(line)
+        except ValueError:
+            self.counters['malformed'] += 1
+            return None
+        if parsed is None:
+            return None
+        kind, message = parsed
+        if kind == 'sensors':
+            if self._pending is not None:
+                self.counters['incomplete'] += 1  # Previous reading never got its validation line
+            self._pending = (message, datetime.now(), time.monotonic())
+            return None
+        if self._pending is None:
+            self.counters['incomplete'] += 1
+            return None
+        sensors_message, timestamp, received = self._pending
+        self._pending = None
+        try:
+            row = build_row(sensors_message, message, timestamp)
+        except ValueError:
+            self.counters['invalid'] += 1
+            return None
+        self.counters['readings'] += 1
+        return row, received
+
+def configure_serial(fd, baudrate=9600):
+    """Raw 8N1 mode at the given speed (the firmware uses Serial.begin(9600))"""
+    # POSIX only: imported here so file and stdin sources also work on Windows
+    import termios
+    import tty
+
+    if baudrate not in BAUD_RATES:
+        raise ValueError(f"Unsupported baud rate: {baudrate}")
+    tty.setraw(fd, termios.TCSANOW)
+    attrs = termios.tcgetattr(fd)
+    attrs[2] |= termios.CLOCAL | termios.CREAD  # Ignore modem lines, enable the receiver
+    attrs[4] = attrs[5] = getattr(termios, f"B{baudrate}")
+    termios.tcsetattr(fd, termios.TCSANOW, attrs)
+
+async def read_lines(source, baudrate=9600):
+    """
+    Yield decoded lines from a serial port/pty, FIFO, regular file or '-' (stdin).
+    Regular files are read to the end (replay of a capture); the other
+    sources are read until the writer goes away.
+    """
+    loop = asyncio.get_running_loop()
+    if source == '-':
+        fd = os.dup(sys.stdin.fileno())
+    else:
+        fd = os.open(source, os.O_RDONLY | getattr(os, 'O_NOCTTY', 0))
+
+    if stat.S_ISREG(os.fstat(fd).st_mode):
+        with os.fdopen(fd, 'rb') as f:
+            while True:
+                lines = await loop.run_in_executor(None, f.readlines, 1 << 16)
+                if not lines:
+                    return
+                for line in lines:
+                    yield line.decode('utf-8', errors='replace')
+
+    if os.isatty(fd):
+        configure_serial(fd, baudrate)
+    reader = asyncio.StreamReader(limit=1 << 16)
+    transport, _ = await loop.connect_read_pipe(
+        lambda: asyncio.StreamReaderProtocol(reader), os.fdopen(fd, 'rb', buffering=0)
+    )
+    try:
+        while True:
+            try:
+                line = await reader.readline()
+            except OSError:
+                return  # EIO: the other side of the pty was closed
+            except ValueError:
+                continue  # Over-long line (noise without newlines); the reader already discarded it
+            if not line:
+                return
+            yield line.decode('utf-8', errors='replace')
+    finally:
+        transport.close()
+
+class SerialIngestor:
+    """
+    Streams readings from the ESP32 into the database.
+
+    Complete readings get a reading key and are buffered, then written with
+    upsert_many of the storage backend (on a single worker thread, so the
+    asyncio loop keeps reading) when batch_size rows are pending or
+    flush_interval seconds have passed. If the database is unavailable the
+    rows stay buffered and are retried; rows a failed write did commit are
+    recognized by their key, not inserted twice. Past max_pending rows the
+    oldest are dropped.
+
+    With a spool (spool.Spool) the batches are appended to the local spool
+    instead, and a SpoolDrainer moves them to the database; the serial
+    reader then never waits on the database and nothing is lost if it is
+    down or the process restarts.
+
+    stats() reports the counters: lines read, readings accepted/rejected,
+    rows written, batches, flush errors, dropped rows, ingest lag (seconds
+    from reception to commit: last, max, and the age of the oldest pending
+    row) and throughput (rows committed per second).
+    """
+
+    def __init__(self, db_factory=get_storage, batch_size=500, flush_interval=5.0, max_pending=100000,
+                 spool=None):
+        if batch_size < 1:
+            raise ValueError("batch_size must be greater than zero")
+        self.db_factory = db_factory
+        self.spool = spool
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.max_pending = max_pending
+        self.assembler = ReadingAssembler()
+        self._rows = []
+        self._received = []
+        self._db = None
+        self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix='ingest-db')
+        self._wakeup = None
+        self._stopping = False
+        self._started = None
+        self.counters = {'rows_written': 0, 'batches': 0, 'flush_errors': 0, 'dropped': 0}
+        self.lag = {'last': None, 'max': None}
+
+    def stats(self):
+        elapsed = time.monotonic() - self._started if self._started else 0.0
+        pending_age = time.monotonic() - self._received[0] if self._received else 0.0
+        return dict(
+            self.assembler.counters,
+            **self.counters,
+            pending=len(self._rows),
+            lag_seconds=self.lag['last'],
+            max_lag_seconds=self.lag['max'],
+            pending_age_seconds=pending_age,
+            rows_per_second=self.counters['rows_written'] / elapsed if elapsed > 0 else 0.0
+        )
+
+    def _write(self, rows):
+        """Runs on the worker thread; (re)connects lazily"""
+        if self.spool is not None:
+            self.spool.append_many(rows)
+            return
+        if self._db is None:
+            db = self.db_factory()
+            db.connect()
+            self._db = db
+        try:
+            self._db.upsert_many(rows, batch_size=len(rows))
+        except Exception:
+            try:
+                self._db.disconnect()
+            finally:
+                self._db = None
+            raise
+
+    async def flush(self):
+        """Write all pending rows; on failure they stay pending for the next flush"""
+        if not self._rows:
+            return
+        # Take the batch; rows read during the write accumulate in fresh lists
+        rows, received = self._rows, self._received
+        self._rows, self._received = [], []
+        loop = asyncio.get_running_loop()
+        try:
+            await loop.run_in_executor(self._executor, self._write, rows)
+        except Exception as e:
+            self.counters['flush_errors'] += 1
+            print(f"Flush failed ({len(rows)} rows kept): {e}")
+            self._rows[:0] = rows
+            self._received[:0] = received
+            self._trim()
+            return
+        committed = time.monotonic()
+        self.counters['rows_written'] += len(rows)
+        self.counters['batches'] += 1
+        self.lag['last'] = committed - received[0]
+        self.lag['max'] = max(self.lag['max'] or 0.0, self.lag['last'])
+
+    def _trim(self):
+        """Drop the oldest pending rows beyond max_pending"""
+        overflow = len(self._rows) - self.max_pending
+        if overflow > 0:
+            del self._rows[:overflow]
+            del self._received[:overflow]
+            self.counters['dropped'] += overflow
+
+    def _add(self, row, received):
+        self._rows.append(row + (new_reading_key(),))
+        self._received.append(received)
+        self._trim()
+        if len(self._rows) >= self.batch_size:
+            self._wakeup.set()
+
+    async def _flusher(self):
+        while not self._stopping:
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), timeout=self.flush_interval)
+            except asyncio.TimeoutError:
+                pass
+            self._wakeup.clear()
+            await self.flush()
+
+    async def _reporter(self, interval):
+        while True:
+            await asyncio.sleep(interval)
+            print(format_stats(self.stats()))
+
+    async def run(self, lines, stats_interval=None):
+        """Consume an async iterable of lines until it ends, then flush what is left"""
+        self._started = time.monotonic()
+        self._stopping = False
+        self._wakeup = asyncio.Event()
+        flusher = asyncio.create_task(self._flusher())
+        reporter = asyncio.create_task(self._reporter(stats_interval)) if stats_interval else None
+        try:
+            async for line in lines:
+                reading = self.assembler.feed(line)
+                if reading is not None:
+                    self._add(*reading)
+        finally:
+            if reporter is not None:
+                reporter.cancel()
+            # Let an in-flight write finish (not cancel it), then write the rest
+            self._stopping = True
+            self._wakeup.set()
+            await flusher
+            await self.flush()
+        return self.stats()
+
+    def close(self):
+        if self._db is not None:
+            self._executor.submit(self._db.disconnect).result()
+            self._db = None
+        self._executor.shutdown()
+
+def format_stats(stats):
+    lag = stats['lag_seconds']
+    return (
+        f"lines={stats['lines']} readings={stats['readings']} invalid={stats['invalid']} "
+        f"malformed={stats['malformed']} incomplete={stats['incomplete']} "
+        f"written={stats['rows_written']} pending={stats['pending']} dropped={stats['dropped']} "
+        f"flush_errors={stats['flush_errors']} "
+        f"lag={'n/a' if lag is None else f'{lag:.2f}s'} "
+        f"throughput={stats['rows_per_second']:.1f} rows/s"
+    )
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Ingest the ESP32 serial output into the database")
+    parser.add_argument('source', help="serial port or pty (e.g. /dev/ttyUSB0), FIFO, capture file or '-' for stdin")
+    parser.add_argument('--baudrate', type=int, default=int(os.getenv('INGEST_BAUDRATE', '9600')),
+                        help='serial speed (default: 9600, as in main.cpp)')
+    parser.add_argument('--batch-size', type=int, default=int(os.getenv('INGEST_BATCH_SIZE', '500')),
+                        help='rows per database write')
+    parser.add_argument('--flush-interval', type=float, default=float(os.getenv('INGEST_FLUSH_INTERVAL', '5')),
+                        help='maximum seconds between writes')
+    parser.add_argument('--stats-interval', type=float, default=float(os.getenv('INGEST_STATS_INTERVAL', '60')),
+                        help='seconds between counter reports (0 = only at exit)')
+    parser.add_argument('--spool', default=os.getenv('INGEST_SPOOL_DIR') or None,
+                        help='durable local spool directory between the reader and the database')
+    parser.add_argument('--spool-max-mb', type=int, default=int(os.getenv('INGEST_SPOOL_MAX_MB', '1024')),
+                        help='disk space of the spool before the policy applies')
+    parser.add_argument('--spool-policy', choices=POLICIES, default=os.getenv('INGEST_SPOOL_POLICY', 'block'),
+                        help='when the spool is full: wait (block) or drop the newest/oldest readings')
+    return parser.parse_args(argv)
+
+def main(argv=None):
+    args = parse_args(argv)
+    spool = drainer = None
+    if args.spool:
+        spool = Spool(args.spool, max_bytes=args.spool_max_mb * 2**20, policy=args.spool_policy)
+        drainer = SpoolDrainer(spool, get_storage, batch_size=args.batch_size)
+        drainer.start()
+    ingestor = SerialIngestor(batch_size=args.batch_size, flush_interval=args.flush_interval, spool=spool)
+    print(f"Ingesting from {args.source}...")
+    try:
+        stats = asyncio.run(ingestor.run(read_lines(args.source, args.baudrate), args.stats_interval))
+    except KeyboardInterrupt:
+        stats = ingestor.stats()
+    finally:
+        ingestor.close()
+        if drainer is not None:
+            drainer.stop()
+            spool.close()
+    print(format_stats(stats))
+    if drainer is not None:
+        print(f"Spool: {spool.stats()} drainer: {drainer.stats()}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,409 @@
+import os
+import json
+import time
+import atexit
+import threading
+import functools
+from contextlib import nullcontext
+from dotenv import load_dotenv
+
+# Opt-in: with METRICS_ENABLED unset the decorators return the functions
+# unchanged and timer() is a shared no-op context, so nothing is measured
+# and nothing is paid. The flag (environment or .env) is read by the first
+# timed(), timer() or instrument_storage() call, not when this module is
+# imported; enable() only affects code instrumented afterwards.
+ENABLED = None
+
+# Latency histogram buckets (seconds), from 1 ms to 10 s
+LATENCY_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+def enable(enabled=True):
+    """Turn instrumentation on (or off) for modules imported from now on"""
+    global ENABLED
+    ENABLED = enabled
+
+def is_enabled():
+    """Whether instrumentation is on (METRICS_ENABLED is read on the first call)"""
+    if ENABLED is None:
+        load_dotenv(override=True)
+        enable(os.getenv('METRICS_ENABLED', '').strip().lower() in ('1', 'true', 'yes', 'sim'))
+        if ENABLED and os.getenv('METRICS_SNAPSHOT'):
+            # Short-lived processes (CLI, benchmarks) leave their metrics on exit
+            atexit.register(REGISTRY.write_snapshot, os.getenv('METRICS_SNAPSHOT'))
+    return ENABLED
+
+def _label_key(labels):
+    return tuple(sorted(labels.items()))
+
+def _format_labels(key, extra=()):
+    pairs = list(key) + list(extra)
+    if not pairs:
+        return ''
+    escaped = (str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n') for _, value in pairs)
+    return '{' + ','.join(f'{name}="{value}"' for (name, _), value in zip(pairs, escaped)) + '}'
+
+def _format_value(value):
+    return repr(float(value)) if value != int(value) else str(int(value))
+
+class Counter:
+    """Monotonic counter, one value per label set"""
+
+    type = 'counter'
+
+    def __init__(self, name, help):
+        self.name = name
+        self.help = help
+        self.values = {}
+        self._lock = threading.Lock()
+
+    def inc(self, amount=1, **labels):
+        key = _label_key(labels)
+        with self._lock:
+            self.values[key] = self.values.get(key, 0) + amount
+
+    def samples(self):
+        with self._lock:
+            return [{'labels': dict(key), 'value': value} for key, value in self.values.items()]
+
+    def render(self):
+        with self._lock:
+            return [f"{self.name}{_format_labels(key)} {_format_value(value)}" for key, value in self.values.items()]
+
+class Histogram:
+    """Cumulative histogram (Prometheus semantics), one set of buckets per label set"""
+
+    type = 'histogram'
+
+    def __init__(self, name, help, buckets=LATENCY_BUCKETS):
+        self.name = name
+        self.help = help
+        self.buckets = tuple(sorted(buckets))
+        self.values = {}  # label key -> [bucket counts..., +Inf count, sum]
+        self._lock = threading.Lock()
+
+    def observe(self, value, **labels):
+        key = _label_key(labels)
+        with self._lock:
+            state = self.values.get(key)
+            if state is None:
+                state = self.values[key] = [0] * (len(self.buckets) + 1) + [0.0]
+            for i, bound in enumerate(self.buckets):
+                if value <= bound:
+                    state[i] += 1
+            state[-2] += 1
+            state[-1] += value
+
+    def samples(self):
+        with self._lock:
+            return [{
+                'labels': dict(key),
+                'count': state[-2],
+                'sum': state[-1],
+                'buckets': dict(zip(map(str, self.buckets), state[:-2]))
+            } for key, state in self.values.items()]
+
+    def render(self):
+        lines = []
+        with self._lock:
+            for key, state in self.values.items():
+                for bound, count in zip(self.buckets, state):
+                    lines.append(f"{self.name}_bucket{_format_labels(key, [('le', bound)])} {count}")
+                lines.append(f"{self.name}_bucket{_format_labels(key, [('le', '+Inf')])} {state[-2]}")
+                lines.append(f"{self.name}_sum{_format_labels(key)} {_format_value(state[-1])}")
+                lines.append(f"{self.name}_count{_format_labels(key)} {state[-2]}")
+        return lines
+
+class Registry:
+    """Named metrics of the process; counter()/histogram() return the existing metric if already created"""
+
+    def __init__(self):
+        self.metrics = {}
+        self._lock = threading.Lock()
+
+    def _get(self, cls, name, help, **kwargs):
+        with self._lock:
+            metric = self.metrics.get(name)
+            if metric is None:
+                metric = self.metrics[name] = cls(name, help, **kwargs)
+            elif not isinstance(metric, cls):
+                raise ValueError(f"Metric {name} already registered as a {metric.type}")
+            return metric
+
+    def counter(self, name, help):
+        return self._get(Counter, name, help)
+
+    def histogram(self, name, help, buckets=LATENCY_BUCKETS):
+        return self._get(Histogram, name, help, buckets=buckets)
+
+    def render(self):
+        """All metrics in the Prometheus text exposition format"""
+        lines = []
+        for metric in list(self.metrics.values()):
+            lines.append(f"# HELP {metric.name} {metric.help}")
+            lines.append(f"# TYPE {metric.name} {metric.type}")
+            lines.extend(metric.render())
+        return '\n'.join(lines) + '\n'
+
+    def snapshot(self):
+        """All metrics as a JSON-serializable dict"""
+        return {
+            'timestamp': time.time(),
+            'metrics': {
+                metric.name: {'type': metric.type, 'help': metric.help, 'samples': metric.samples()}
+                for metric in list(self.metrics.values())
+            }
+        }
+
+    def write_snapshot(self, path):
+        """Write snapshot() to path atomically"""
+        tmp_path = path + '.tmp'
+        with open(tmp_path, 'w') as f:
+            json.dump(self.snapshot(), f, indent=1)
+        os.replace(tmp_path, path)
+
+REGISTRY = Registry()
+
+# Instrumented call in progress on this thread (round trips are attributed to it)
+_current = threading.local()
+
+def timer(histogram, help='', **labels):
+    """Context manager observing its duration in the named histogram (no-op when disabled)"""
+    if not is_enabled():
+        return nullcontext()
+    return _Timer(REGISTRY.histogram(histogram, help), labels)
+
+class _Timer:
+    def __init__(self, histogram, labels):
+        self.histogram = histogram
+        self.labels = labels
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.histogram.observe(time.perf_counter() - self.start, **self.labels)
+
+def _input_rows(args):
+    """Rows of the data argument of a model call (a single dict counts as one)"""
+    if not args:
+        return None
+    data = args[0]
+    if isinstance(data, dict):
+        return 1
+    try:
+        return len(data)
+    except TypeError:
+        return None
+
+def timed(prefix, **labels):
+    """
+    Decorator timing a function into <prefix>_call_seconds and counting the
+    rows of its first argument after self in <prefix>_rows_total and the
+    exceptions in <prefix>_errors_total. Returns func itself when disabled.
+    """
+    def decorate(func):
+        if not is_enabled():
+            return func
+        seconds = REGISTRY.histogram(f"{prefix}_call_seconds", f"Latency of {prefix} calls")
+        rows = REGISTRY.counter(f"{prefix}_rows_total", f"Input rows of {prefix} calls")
+        errors = REGISTRY.counter(f"{prefix}_errors_total", f"Failed {prefix} calls")
+
+        @functools.wraps(func)
+        def wrapper(self, *args, **kwargs):
+            start = time.perf_counter()
+            try:
+                return func(self, *args, **kwargs)
+            except Exception:
+                errors.inc(**labels)
+                raise
+            finally:
+                seconds.observe(time.perf_counter() - start, **labels)
+                count = _input_rows(args)
+                if count is not None:
+                    rows.inc(count, **labels)
+        return wrapper
+    return decorate
+
+# Storage backends (see instrument_storage)
+
+class _CountingCursor:
+    """Cursor proxy counting execute/executemany/fetch* calls as round trips"""
+
+    _ROUND_TRIPS = frozenset(('execute', 'executemany', 'fetchone', 'fetchmany', 'fetchall'))
+
+    def __init__(self, target, counter, backend):
+        object.__setattr__(self, '_target', target)
+        object.__setattr__(self, '_counter', counter)
+        object.__setattr__(self, '_backend', backend)
+
+    def __getattr__(self, name):
+        attribute = getattr(self._target, name)
+        if name in self._ROUND_TRIPS:
+            def counted(*args, **kwargs):
+                self._counter.inc(backend=self._backend, method=getattr(_current, 'method', 'other'))
+                return attribute(*args, **kwargs)
+            return counted
+        return attribute
+
+    def __setattr__(self, name, value):
+        setattr(self._target, name, value)
+
+    def __iter__(self):
+        return iter(self._target)
+
+class _CountingConnection:
+    """Connection proxy whose cursors count round trips (commits count as one too)"""
+
+    def __init__(self, target, counter, backend):
+        object.__setattr__(self, '_target', target)
+        object.__setattr__(self, '_counter', counter)
+        object.__setattr__(self, '_backend', backend)
+
+    def cursor(self, *args, **kwargs):
+        return _CountingCursor(self._target.cursor(*args, **kwargs), self._counter, self._backend)
+
+    def commit(self):
+        self._counter.inc(backend=self._backend, method=getattr(_current, 'method', 'other'))
+        return self._target.commit()
+
+    def __getattr__(self, name):
+        return getattr(self._target, name)
+
+    def __setattr__(self, name, value):
+        setattr(self._target, name, value)
+
+def _result_size(result):
+    """(rows, bytes) of a storage call result; None where not applicable"""
+    if isinstance(result, dict):
+        return result.get('rows'), None
+    if isinstance(result, list):
+        return len(result), None
+    if hasattr(result, 'memory_usage'):  # DataFrame
+        return len(result), int(result.memory_usage(index=True).sum())
+    return None, None
+
+def instrument_storage(cls):
+    """
+    Wrap the public methods defined by a storage backend class (see
+    storage.SensorStorage) with latency, row, byte, error and round-trip
+    metrics labelled by backend and method. No-op when disabled or when cls
+    is already instrumented.
+    """
+    if not is_enabled() or vars(cls).get('_instrumented'):
+        return cls
+    import inspect
+
+    backend = cls.__name__
+    seconds = REGISTRY.histogram('storage_call_seconds', 'Latency of storage backend calls')
+    rows = REGISTRY.counter('storage_rows_total', 'Rows written or returned by storage backend calls')
+    data_bytes = REGISTRY.counter('storage_bytes_total', 'Bytes of the frames returned by storage backend calls')
+    errors = REGISTRY.counter('storage_errors_total', 'Failed storage backend calls')
+    round_trips = REGISTRY.counter('storage_round_trips_total',
+                                   'Database calls (execute, executemany, fetch, commit) per storage method')
+
+    def record(method, start, result):
+        seconds.observe(time.perf_counter() - start, backend=backend, method=method)
+        count, size = _result_size(result)
+        if count is not None:
+            rows.inc(count, backend=backend, method=method)
+        if size is not None:
+            data_bytes.inc(size, backend=backend, method=method)
+
+    def wrap(method, func):
+        if inspect.isgeneratorfunction(func):
+            @functools.wraps(func)
+            def generator_wrapper(self, *args, **kwargs):
+                # Time the whole iteration; rows/bytes are counted per chunk
+                start = time.perf_counter()
+                chunks = func(self, *args, **kwargs)
+                try:
+                    while True:
+                        # Round trips are attributed to this method only while it runs
+                        previous = getattr(_current, 'method', None)
+                        _current.method = method
+                        try:
+                            chunk = next(chunks)
+                        except StopIteration:
+                            break
+                        finally:
+                            _current.method = previous
+                        count, size = _result_size(chunk)
+                        if count is not None:
+                            rows.inc(count, backend=backend, method=method)
+                        if size is not None:
+                            data_bytes.inc(size, backend=backend, method=method)
+                        yield chunk
+                except Exception:
+                    errors.inc(backend=backend, method=method)
+                    raise
+                finally:
+                    seconds.observe(time.perf_counter() - start, backend=backend, method=method)
+            return generator_wrapper
+
+        @functools.wraps(func)
+        def wrapper(self, *args, **kwargs):
+            previous = getattr(_current, 'method', None)
+            _current.method = method
+            start = time.perf_counter()
+            result = None
+            try:
+                if method == 'disconnect':
+                    # Hand the real objects back (e.g. to the Oracle session pool)
+                    self.connection = getattr(self.connection, '_target', self.connection)
+                    self.cursor = getattr(self.cursor, '_target', self.cursor)
+                result = func(self, *args, **kwargs)
+                if method == 'connect' and self.connection is not None:
+                    self.connection = _CountingConnection(self.connection, round_trips, backend)
+                    self.cursor = _CountingCursor(self.cursor, round_trips, backend)
+                return result
+            except Exception:
+                errors.inc(backend=backend, method=method)
+                raise
+            finally:
+                _current.method = previous
+                record(method, start, result)
+        return wrapper
+
+    for name, func in list(vars(cls).items()):
+        if not name.startswith('_') and inspect.isfunction(func):
+            setattr(cls, name, wrap(name, func))
+    cls._instrumented = True
+    return cls
+
+# Export
+
+def start_http_server(port=None, address=None):
+    """
+    Serve /metrics (Prometheus text format) and /metrics.json on a daemon
+    thread; port and address default to METRICS_PORT (9464) and
+    METRICS_ADDRESS (127.0.0.1). Returns the server.
+    """
+    from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+    class MetricsHandler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            if self.path in ('/', '/metrics'):
+                body = REGISTRY.render().encode()
+                content_type = 'text/plain; version=0.0.4; charset=utf-8'
+            elif self.path == '/metrics.json':
+                body = json.dumps(REGISTRY.snapshot()).encode()
+                content_type = 'application/json'
+            else:
+                self.send_error(404)
+                return
+            self.send_response(200)
+            self.send_header('Content-Type', content_type)
+            self.send_header('Content-Length', str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, format, *args):
+            pass
+
+    port = int(port if port is not None else os.getenv('METRICS_PORT', '9464'))
+    address = address or os.getenv('METRICS_ADDRESS', '127.0.0.1')
+    server = ThreadingHTTPServer((address, port), MetricsHandler)
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, name='metrics-http', daemon=True).start()
+    return server
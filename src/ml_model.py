@@ -1,35 +1,90 @@
+import os
+import json
+import time
+import tempfile
+from itertools import product
+from concurrent.futures import ProcessPoolExecutor
 import pandas as pd
 import numpy as np
-from sklearn.model_selection import train_test_split
+from sklearn.model_selection import train_test_split, TimeSeriesSplit
 from sklearn.ensemble import RandomForestRegressor
 from sklearn.preprocessing import StandardScaler
 from sklearn.metrics import mean_squared_error, r2_score
 import joblib
+from metrics import timed
 from datetime import datetime, timedelta
 
+# Default RandomForestRegressor hyperparameters
+DEFAULT_PARAMS = {
+    'n_estimators': 100,
+    'max_depth': 10,
+    'min_samples_split': 5,
+    'random_state': 42
+}
+
+# Default search space for IrrigationPredictor.tune
+DEFAULT_PARAM_GRID = {
+    'n_estimators': [50, 100, 200],
+    'max_depth': [6, 10, 14, None],
+    'min_samples_split': [2, 5, 10]
+}
+
+def _npz_path(filepath):
+    """Path of a compressed model artifact (np.savez_compressed appends '.npz' when missing)"""
+    return filepath if str(filepath).endswith('.npz') else f"{filepath}.npz"
+
+# Scaled fold matrices of the current tuning run, loaded once per worker process
+_tuning_folds = None
+
+def _init_tuning_worker(fold_paths):
+    """Process pool initializer: memory-map the cached fold matrices"""
+    global _tuning_folds
+    _tuning_folds = [tuple(np.load(path, mmap_mode='r') for path in paths) for paths in fold_paths]
+
+def _evaluate_fold(task):
+    """Fit one candidate on one walk-forward fold; returns (candidate, fold, mse, r2, seconds)"""
+    candidate_index, params, fold_index = task
+    X_train, y_train, X_test, y_test = _tuning_folds[fold_index]
+    start = time.perf_counter()
+    # One core per fit: the parallelism is across candidates and folds
+    model = RandomForestRegressor(**{**params, 'n_jobs': 1})
+    model.fit(X_train, y_train)
+    y_pred = model.predict(X_test)
+    r2 = r2_score(y_test, y_pred) if np.var(y_test) > 0 else np.nan
+    return candidate_index, fold_index, mean_squared_error(y_test, y_pred), r2, time.perf_counter() - start
+
 class IrrigationPredictor:
-    def __init__(self):
+    def __init__(self, params=None):
         self.model = None
         self.scaler = StandardScaler()
         self.features = ['humidity', 'temperature', 'light', 'btn_p', 'btn_k']
+        self.params = dict(DEFAULT_PARAMS, **(params or {}))
+        self.last_trained_id = None  # Highest reading ID the model has seen
+        self._pending = None  # New rows waiting for the next incremental update
         
     def prepare_data(self, data):
         """
         Prepare data for training or prediction.
         Handles missing values and converts boolean to integer.
+        Accepts dicts, DataFrames or Arrow tables (e.g. ReadingArchive.read()).
         """
+        if hasattr(data, 'to_pandas'):
+            # Arrow table: memory-mapped columns are wrapped without copying
+            data = data.to_pandas(split_blocks=True)
         df = pd.DataFrame(data)
         
         # Convert column names to lowercase
         df.columns = df.columns.str.lower()
         
         # Convert boolean/numeric strings to integers for button states and relay status
+        # (already-typed integer columns, e.g. from get_readings_frame, are left as is)
         for col in ['btn_p', 'btn_k', 'relay_status']:
-            if col in df.columns:
+            if col in df.columns and not pd.api.types.is_integer_dtype(df[col]):
                 df[col] = pd.to_numeric(df[col], errors='coerce').fillna(0).astype(int)
         
         # Handle missing values
-        df = df.fillna(method='ffill')
+        if df.isna().values.any():
+            df = df.fillna(method='ffill')
         
         # Ensure all required columns exist
         for feature in self.features:
@@ -38,6 +93,7 @@ class IrrigationPredictor:
         
         return df
         
+    @timed('model', method='train')
     def train(self, data):
         """
         Train the model using historical sensor data.
@@ -46,8 +102,8 @@ class IrrigationPredictor:
         try:
             df = self.prepare_data(data)
             
-            # Prepare features and target
-            X = df[self.features]
+            # Prepare features and target (plain arrays, so predict_batch can pass arrays too)
+            X = df[self.features].to_numpy(dtype=float)
             y = df['relay_status']
             
             # Scale features
@@ -59,12 +115,7 @@ class IrrigationPredictor:
             )
             
             # Train model
-            self.model = RandomForestRegressor(
-                n_estimators=100,
-                max_depth=10,
-                min_samples_split=5,
-                random_state=42
-            )
+            self.model = RandomForestRegressor(**self.params)
             self.model.fit(X_train, y_train)
             
             # Evaluate model
@@ -75,6 +126,9 @@ class IrrigationPredictor:
             # Feature importance
             importance = dict(zip(self.features, self.model.feature_importances_))
             
+            self.last_trained_id = int(df['id'].max()) if 'id' in df.columns else None
+            self._pending = None
+            
             return {
                 'mse': mse,
                 'r2': r2,
@@ -83,42 +137,414 @@ class IrrigationPredictor:
         except Exception as e:
             raise Exception(f"Error during training: {str(e)}")
     
+    @timed('model', method='partial_fit')
+    def partial_fit(self, data, n_new_trees=10, max_trees=200, min_rows=50):
+        """
+        Incrementally update the model with the readings added since the last update.
+
+        Only rows with an id above the last one seen are used (all rows if there
+        is no id column). The scaler statistics are updated with those rows, the
+        split thresholds of the existing trees are remapped to the new scaling,
+        and n_new_trees trees fitted on the new rows are added (warm start).
+        The oldest trees are dropped beyond max_trees. Fewer than min_rows new
+        rows are kept pending until enough arrive.
+
+        Returns metrics on the new rows, measured before the update
+        (prequential), plus the forest size and whether the model changed.
+        """
+        if self.model is None:
+            metrics = self.train(data)
+            metrics.update(updated=True, rows=None, n_trees=len(self.model.estimators_))
+            return metrics
+        
+        if not hasattr(self.model, 'estimators_'):
+            raise ValueError("Model was loaded from an inference-only artifact. Call train() first.")
+        
+        try:
+            df = self.prepare_data(data)
+            if 'id' in df.columns and self.last_trained_id is not None:
+                df = df[df['id'] > self.last_trained_id]
+            if self._pending is not None:
+                df = pd.concat([self._pending, df], ignore_index=True)
+            if len(df) < min_rows:
+                self._pending = df
+                return {'updated': False, 'rows': len(df), 'n_trees': len(self.model.estimators_)}
+            self._pending = None
+            
+            X = df[self.features].to_numpy(dtype=float)
+            y = df['relay_status'].to_numpy()
+            
+            # Prequential evaluation: score the new rows before learning from them
+            y_pred = self.model.predict(self.scaler.transform(X))
+            mse = mean_squared_error(y, y_pred)
+            r2 = r2_score(y, y_pred) if np.var(y) > 0 else None
+            
+            # Running scaler statistics; keep existing trees valid under the new scaling
+            old_mean, old_scale = self.scaler.mean_.copy(), self.scaler.scale_.copy()
+            self.scaler.partial_fit(X)
+            self._rescale_thresholds(old_mean, old_scale)
+            
+            # Warm-started tree additions fitted on the new rows only
+            self.model.set_params(
+                warm_start=True,
+                n_estimators=len(self.model.estimators_) + n_new_trees
+            )
+            self.model.fit(self.scaler.transform(X), y)
+            if max_trees is not None and len(self.model.estimators_) > max_trees:
+                self.model.estimators_ = self.model.estimators_[-max_trees:]
+                self.model.n_estimators = max_trees
+            
+            if 'id' in df.columns:
+                self.last_trained_id = int(df['id'].max())
+            
+            return {
+                'mse': mse,
+                'r2': r2,
+                'feature_importance': dict(zip(self.features, self.model.feature_importances_)),
+                'updated': True,
+                'rows': len(df),
+                'n_trees': len(self.model.estimators_)
+            }
+        except Exception as e:
+            raise Exception(f"Error during incremental training: {str(e)}")
+
+    def _rescale_thresholds(self, old_mean, old_scale):
+        """Map the split thresholds of every tree from the old scaling to the current one"""
+        new_mean, new_scale = self.scaler.mean_, self.scaler.scale_
+        for estimator in self.model.estimators_:
+            tree = estimator.tree_
+            split = tree.feature >= 0  # Leaves have feature == -2
+            features = tree.feature[split]
+            thresholds = tree.threshold  # View on the tree's node array
+            raw = thresholds[split] * old_scale[features] + old_mean[features]
+            thresholds[split] = (raw - new_mean[features]) / new_scale[features]
+
+    def tune(self, data, param_grid=None, n_splits=5, n_jobs=None, apply=True):
+        """
+        Hyperparameter search with walk-forward (time-ordered) cross-validation.
+
+        Rows are ordered by timestamp and split with TimeSeriesSplit, so every
+        fold trains on the past and validates on the following period. The
+        scaled fold matrices are computed once, written to a temporary
+        directory and memory-mapped by the workers; every (candidate, fold)
+        fit then runs in a process pool using n_jobs processes (default: all
+        cores). With apply=True the best configuration replaces self.params.
+
+        Returns the best parameters and, per candidate, mean/std MSE, mean R²
+        and the summed fit time across folds.
+        """
+        total_start = time.perf_counter()
+        df = self.prepare_data(data)
+        if 'timestamp' in df.columns:
+            df = df.sort_values('timestamp', kind='stable')
+        X = df[self.features].to_numpy(dtype=float)
+        y = df['relay_status'].to_numpy(dtype=float)
+        
+        grid = param_grid or DEFAULT_PARAM_GRID
+        names = list(grid)
+        candidates = [
+            dict(self.params, **dict(zip(names, values)))
+            for values in product(*(grid[name] for name in names))
+        ]
+        n_jobs = n_jobs or os.cpu_count() or 1
+        
+        with tempfile.TemporaryDirectory(prefix='irrigation_tuning_') as cache_dir:
+            # Scale each fold once (scaler fitted on that fold's past only)
+            fold_paths = []
+            for fold_index, (train_index, test_index) in enumerate(TimeSeriesSplit(n_splits=n_splits).split(X)):
+                scaler = StandardScaler().fit(X[train_index])
+                arrays = (scaler.transform(X[train_index]), y[train_index],
+                          scaler.transform(X[test_index]), y[test_index])
+                paths = []
+                for name, array in zip(('X_train', 'y_train', 'X_test', 'y_test'), arrays):
+                    path = os.path.join(cache_dir, f"fold{fold_index}_{name}.npy")
+                    np.save(path, array)
+                    paths.append(path)
+                fold_paths.append(paths)
+            
+            tasks = [
+                (candidate_index, params, fold_index)
+                for candidate_index, params in enumerate(candidates)
+                for fold_index in range(len(fold_paths))
+            ]
+            with ProcessPoolExecutor(max_workers=n_jobs, initializer=_init_tuning_worker,
+                                     initargs=(fold_paths,)) as pool:
+                fold_results = list(pool.map(_evaluate_fold, tasks))
+        
+        results = []
+        for candidate_index, params in enumerate(candidates):
+            rows = [result for result in fold_results if result[0] == candidate_index]
+            mse = np.array([row[2] for row in rows])
+            r2 = np.array([row[3] for row in rows])
+            results.append({
+                'params': params,
+                'mse': float(mse.mean()),
+                'mse_std': float(mse.std()),
+                'r2': float(np.nanmean(r2)) if not np.isnan(r2).all() else None,
+                'seconds': float(sum(row[4] for row in rows))
+            })
+        results.sort(key=lambda result: result['mse'])
+        
+        best = results[0]['params']
+        if apply:
+            self.params = dict(best)
+        return {
+            'best_params': best,
+            'best_mse': results[0]['mse'],
+            'results': results,
+            'n_splits': n_splits,
+            'n_jobs': n_jobs,
+            'total_seconds': time.perf_counter() - total_start
+        }
+    
+    @timed('model', method='predict')
     def predict(self, sensor_data):
         """
         Predict irrigation need based on current sensor readings.
         Returns probability of irrigation need (0-1).
         """
+        return float(self._predict_batch([sensor_data])[0])
+    
+    @timed('model', method='predict_batch')
+    def predict_batch(self, sensor_data):
+        """
+        Predict irrigation need for many readings at once.
+        Accepts a NumPy array (columns in self.features order), a DataFrame or
+        an iterable of dicts. The schema is validated once and the whole batch
+        is scaled and predicted in single vectorized calls.
+        Returns a NumPy array of probabilities (0-1).
+        """
+        return self._predict_batch(sensor_data)
+    
+    def _predict_batch(self, sensor_data):
+        """predict_batch without the metrics timer (predict is timed on its own)"""
         if self.model is None:
             raise ValueError("Model not trained. Call train() first.")
         
         try:
-            df = self.prepare_data([sensor_data])
-            X = df[self.features]
-            X_scaled = self.scaler.transform(X)
-            
-            prediction = self.model.predict(X_scaled)[0]
-            return float(prediction)
+            X = self.feature_matrix(sensor_data)
+            if len(X) == 0:
+                return np.empty(0)
+            return self.model.predict(self.scaler.transform(X))
         except Exception as e:
             raise Exception(f"Error during prediction: {str(e)}")
     
-    def save_model(self, filepath='models/irrigation_model.joblib'):
-        """Save the trained model and scaler"""
+    def feature_matrix(self, data):
+        """
+        Build the float feature matrix (rows x self.features) without going
+        through prepare_data. Missing button states count as 0 and missing
+        sensor values are forward-filled, as in prepare_data. Dict readings
+        must all carry the features in the first one; a later reading without
+        one of them counts as missing that value.
+        """
+        if hasattr(data, 'to_pandas'):
+            data = data.to_pandas(split_blocks=True)
+        if isinstance(data, np.ndarray):
+            X = np.array(data, dtype=float, ndmin=2)
+            if X.shape[1] != len(self.features):
+                raise ValueError(f"Expected {len(self.features)} feature columns {self.features}, got {X.shape[1]}")
+        elif isinstance(data, pd.DataFrame):
+            columns = {str(col).lower(): col for col in data.columns}
+            for feature in self.features:
+                if feature not in columns:
+                    raise ValueError(f"Missing required feature: {feature}")
+            X = data[[columns[feature] for feature in self.features]].to_numpy(dtype=float)
+        else:
+            rows = data if isinstance(data, (list, tuple)) else list(data)
+            if not rows:
+                return np.empty((0, len(self.features)))
+            # Validate the keys once, on the first reading
+            keys = {str(key).lower(): key for key in rows[0]}
+            for feature in self.features:
+                if feature not in keys:
+                    raise ValueError(f"Missing required feature: {feature}")
+            ordered = [(keys[feature], feature) for feature in self.features]
+            # Keys absent from a later reading become NaN (None), filled below
+            X = np.array([[row.get(key, row.get(feature)) for key, feature in ordered] for row in rows],
+                         dtype=float)
+        
+        missing = np.isnan(X)
+        if missing.any():
+            for i, feature in enumerate(self.features):
+                if feature in ('btn_p', 'btn_k'):
+                    X[missing[:, i], i] = 0
+            X = pd.DataFrame(X).ffill().to_numpy()
+        return X
+    
+    def compile(self):
+        """
+        Export the trained forest, with the scaler folded into the split
+        thresholds, as a CompiledForest (NumPy-only evaluator taking raw
+        sensor values in self.features order).
+        """
+        if self.model is None:
+            raise ValueError("Model not trained. Call train() first.")
+        if not hasattr(self.model, 'estimators_'):
+            raise ValueError("Model was loaded from an inference-only artifact. Call train() first.")
+        from compiled_forest import export_forest
+        return export_forest(self.model, self.features, scaler=self.scaler)
+    
+    def save_model(self, filepath='models/irrigation_model.joblib', metadata=None, format='joblib'):
+        """
+        Save the trained model and scaler (plus optional metadata, e.g. metrics).
+
+        Formats:
+            'joblib': pickle of the sklearn objects (default, can keep training)
+            'mmap': directory of .npy arrays that load memory-mapped and are
+                shared read-only across processes (inference only)
+            'compressed': single compressed .npz archive of the same arrays,
+                for archival (inference only, loaded into memory); '.npz' is
+                appended to filepath when missing, as np.savez_compressed does
+
+        Returns the path written.
+        """
         if self.model is None:
             raise ValueError("No model to save. Train the model first.")
-            
-        model_data = {
-            'model': self.model,
-            'scaler': self.scaler,
-            'features': self.features
-        }
-        joblib.dump(model_data, filepath)
+        
+        if format == 'joblib':
+            model_data = {
+                'model': self.model,
+                'scaler': self.scaler,
+                'features': self.features,
+                'params': self.params,
+                'last_trained_id': self.last_trained_id,
+                'metadata': metadata or {}
+            }
+            joblib.dump(model_data, filepath)
+            return filepath
+        if format not in ('mmap', 'compressed'):
+            raise ValueError(f"Unknown model format: {format}")
+        
+        from compiled_forest import CompiledForest, export_forest
+        # Unfolded forest: takes the scaled inputs, so predict_batch works unchanged
+        forest = self.model if isinstance(self.model, CompiledForest) else export_forest(self.model, self.features)
+        arrays = dict(forest.arrays(), scaler_mean=self.scaler.mean_, scaler_scale=self.scaler.scale_)
+        manifest = json.dumps({
+            'forest': forest.manifest(),
+            'features': self.features,
+            'params': self.params,
+            'last_trained_id': self.last_trained_id,
+            'scaler_samples': int(np.max(self.scaler.n_samples_seen_)),
+            'metadata': metadata or {}
+        }, default=float)
+        
+        if format == 'mmap':
+            os.makedirs(filepath, exist_ok=True)
+            for name, array in arrays.items():
+                np.save(os.path.join(filepath, f"{name}.npy"), np.ascontiguousarray(array))
+            with open(os.path.join(filepath, 'model.json'), 'w') as f:
+                f.write(manifest)
+        else:
+            filepath = _npz_path(filepath)
+            np.savez_compressed(filepath, manifest=np.array(manifest), **arrays)
+        return filepath
         
     def load_model(self, filepath='models/irrigation_model.joblib'):
-        """Load a trained model and scaler"""
-        model_data = joblib.load(filepath)
-        self.model = model_data['model']
-        self.scaler = model_data['scaler']
-        self.features = model_data['features']
+        """
+        Load a trained model and scaler. Returns the metadata saved with it.
+        Directories are loaded as memory-mapped artifacts and .npz files as
+        compressed artifacts (see save_model); anything else as joblib.
+        A missing path is also looked up with '.npz' appended, like save_model.
+        """
+        if not os.path.exists(filepath) and os.path.exists(_npz_path(filepath)):
+            filepath = _npz_path(filepath)
+        if not os.path.isdir(filepath) and not filepath.endswith('.npz'):
+            model_data = joblib.load(filepath)
+            self.model = model_data['model']
+            self.scaler = model_data['scaler']
+            self.features = model_data['features']
+            self.params = model_data.get('params', self.params)
+            self.last_trained_id = model_data.get('last_trained_id')
+            self._pending = None
+            return model_data.get('metadata', {})
+        
+        from compiled_forest import ARRAY_NAMES, CompiledForest
+        if os.path.isdir(filepath):
+            with open(os.path.join(filepath, 'model.json')) as f:
+                manifest = json.load(f)
+            arrays = {
+                name: np.load(os.path.join(filepath, f"{name}.npy"), mmap_mode='r')
+                for name in ARRAY_NAMES + ('scaler_mean', 'scaler_scale')
+            }
+        else:
+            with np.load(filepath) as archive:
+                manifest = json.loads(str(archive['manifest']))
+                arrays = {name: archive[name] for name in archive.files if name != 'manifest'}
+        
+        self.model = CompiledForest(**{name: arrays[name] for name in ARRAY_NAMES}, **manifest['forest'])
+        self.scaler = StandardScaler()
+        self.scaler.mean_ = np.array(arrays['scaler_mean'])
+        self.scaler.scale_ = np.array(arrays['scaler_scale'])
+        self.scaler.var_ = self.scaler.scale_ ** 2
+        self.scaler.n_features_in_ = len(self.scaler.mean_)
+        self.scaler.n_samples_seen_ = manifest['scaler_samples']
+        self.features = manifest['features']
+        self.params = manifest.get('params', self.params)
+        self.last_trained_id = manifest.get('last_trained_id')
+        self._pending = None
+        return manifest.get('metadata', {})
+
+def compare_incremental_training(data, initial_fraction=0.5, batch_rows=72, holdout_fraction=0.2,
+                                 n_new_trees=10, params=None):
+    """
+    Compare incremental updates against a full retrain on the same data.
+
+    Rows are taken in time order: the last holdout_fraction is held out for
+    evaluation, the first initial_fraction trains the incremental model, and
+    the rest is fed to partial_fit in batches of batch_rows (72 = one day of
+    20-minute readings). A second model is trained from scratch on all
+    non-holdout rows. Returns MSE, R² and training time for both.
+    """
+    df = pd.DataFrame(data)
+    df.columns = df.columns.str.lower()
+    if 'timestamp' in df.columns:
+        df = df.sort_values('timestamp', kind='stable')
+    df = df.reset_index(drop=True)
+    df['id'] = np.arange(1, len(df) + 1)
+    
+    split = int(len(df) * (1 - holdout_fraction))
+    history, holdout = df.iloc[:split], df.iloc[split:]
+    initial = int(len(history) * initial_fraction)
+    
+    def evaluate(predictor):
+        y_pred = predictor.model.predict(predictor.scaler.transform(
+            holdout[predictor.features].to_numpy(dtype=float)
+        ))
+        return mean_squared_error(holdout['relay_status'], y_pred), r2_score(holdout['relay_status'], y_pred)
+    
+    incremental = IrrigationPredictor(params)
+    start = time.perf_counter()
+    incremental.train(history.iloc[:initial])
+    initial_seconds = time.perf_counter() - start
+    update_seconds = 0.0
+    for batch_start in range(initial, len(history), batch_rows):
+        start = time.perf_counter()
+        incremental.partial_fit(history.iloc[batch_start:batch_start + batch_rows],
+                                n_new_trees=n_new_trees, min_rows=1)
+        update_seconds += time.perf_counter() - start
+    
+    full = IrrigationPredictor(params)
+    start = time.perf_counter()
+    full.train(history)
+    full_seconds = time.perf_counter() - start
+    
+    incremental_mse, incremental_r2 = evaluate(incremental)
+    full_mse, full_r2 = evaluate(full)
+    return {
+        'incremental': {
+            'mse': incremental_mse,
+            'r2': incremental_r2,
+            'initial_train_seconds': initial_seconds,
+            'update_seconds': update_seconds,
+            'n_trees': len(incremental.model.estimators_)
+        },
+        'full_retrain': {
+            'mse': full_mse,
+            'r2': full_r2,
+            'train_seconds': full_seconds,
+            'n_trees': len(full.model.estimators_)
+        }
+    }
 
 def generate_sample_data(n_samples=1000):
     """
@@ -0,0 +1,134 @@
+import os
+import json
+import shutil
+import hashlib
+import tempfile
+
+# File name suffix of the artifacts for each IrrigationPredictor.save_model format
+ARTIFACT_SUFFIXES = {
+    'joblib': '.joblib',
+    'mmap': '.mmap',  # Directory of memory-mappable .npy arrays
+    'compressed': '.npz'
+}
+
+class ModelRegistry:
+    """
+    On-disk cache of trained IrrigationPredictor artifacts.
+
+    Artifacts are keyed by a fingerprint of the training data (row count, max
+    ID) and of the model configuration (features, hyperparameters). A matching
+    artifact is loaded instead of retraining; the least recently used artifacts
+    beyond max_artifacts are deleted.
+
+    artifact_format selects how artifacts are written: 'joblib' (default),
+    'mmap' (fast, memory-mapped loads shared across dashboard workers) or
+    'compressed' (smallest on disk). The last two are inference-only, so a
+    model loaded from them is retrained rather than updated incrementally.
+
+    Artifacts are written under a temporary name in the same directory and
+    renamed into place, so concurrent sessions never load a partial file.
+    """
+
+    def __init__(self, directory='models/registry', max_artifacts=5, artifact_format='joblib'):
+        if artifact_format not in ARTIFACT_SUFFIXES:
+            raise ValueError(f"Unknown artifact format: {artifact_format}")
+        self.directory = directory
+        self.max_artifacts = max_artifacts
+        self.artifact_format = artifact_format
+
+    @staticmethod
+    def fingerprint(row_count, max_id, features, params):
+        """Stable key for a training set and model configuration"""
+        payload = json.dumps({
+            'row_count': int(row_count),
+            'max_id': int(max_id),
+            'features': list(features),
+            'params': params
+        }, sort_keys=True, default=str)
+        return hashlib.sha256(payload.encode()).hexdigest()[:16]
+
+    def path_for(self, key):
+        suffix = ARTIFACT_SUFFIXES[self.artifact_format]
+        return os.path.join(self.directory, f"irrigation_model_{key}{suffix}")
+
+    def load(self, key, predictor):
+        """Load the artifact for key into predictor. Returns its metrics, or None on a miss."""
+        path = self.path_for(key)
+        if not os.path.exists(path):
+            return None
+        try:
+            metadata = predictor.load_model(path)
+            os.utime(path)  # Mark as recently used
+        except FileNotFoundError:
+            return None  # Evicted by another worker meanwhile
+        predictor.registry_key = key
+        return metadata.get('metrics')
+
+    def save(self, key, predictor, metrics):
+        """Store a trained predictor under key and evict old artifacts"""
+        os.makedirs(self.directory, exist_ok=True)
+        path = self.path_for(key)
+        # Hidden temporary directory on the same filesystem (evict() ignores it)
+        staging = tempfile.mkdtemp(prefix='.tmp-', dir=self.directory)
+        try:
+            tmp_path = predictor.save_model(os.path.join(staging, os.path.basename(path)),
+                                            metadata={'key': key, 'metrics': metrics},
+                                            format=self.artifact_format)
+            try:
+                os.replace(tmp_path, path)
+            except OSError:
+                # An mmap directory saved by another worker: same key, same model
+                if not os.path.isdir(path):
+                    raise
+        finally:
+            shutil.rmtree(staging, ignore_errors=True)
+        predictor.registry_key = key
+        self.evict()
+
+    def get_or_train(self, predictor, row_count, max_id, load_data, incremental=False):
+        """
+        Return (metrics, cache_hit) for the current training data.
+
+        load_data is only called (and the model only trained) when no artifact
+        matches the fingerprint. A predictor already holding the matching model
+        is left untouched. With incremental=True a predictor that already holds
+        a model is updated with partial_fit (new rows only) instead of retrained.
+        """
+        key = self.fingerprint(row_count, max_id, predictor.features, predictor.params)
+        if predictor.model is not None and getattr(predictor, 'registry_key', None) == key:
+            return getattr(predictor, 'registry_metrics', None), True
+        
+        previous_metrics = getattr(predictor, 'registry_metrics', None)
+        metrics = self.load(key, predictor)
+        cache_hit = metrics is not None
+        if not cache_hit:
+            trainable = hasattr(predictor.model, 'estimators_')
+            if incremental and trainable and previous_metrics:
+                update = predictor.partial_fit(load_data())
+                # Keep the last known values for metrics the update could not compute
+                metrics = dict(previous_metrics)
+                metrics.update({name: value for name, value in update.items() if value is not None})
+            else:
+                metrics = predictor.train(load_data())
+            self.save(key, predictor, metrics)
+        predictor.registry_metrics = metrics
+        return metrics, cache_hit
+
+    def evict(self):
+        """Delete the least recently used artifacts beyond max_artifacts"""
+        if not os.path.isdir(self.directory):
+            return
+        paths = [
+            os.path.join(self.directory, name)
+            for name in os.listdir(self.directory)
+            if name.startswith('irrigation_model_') and name.endswith(tuple(ARTIFACT_SUFFIXES.values()))
+        ]
+        paths.sort(key=os.path.getmtime, reverse=True)
+        for path in paths[self.max_artifacts:]:
+            try:
+                if os.path.isdir(path):
+                    shutil.rmtree(path)
+                else:
+                    os.remove(path)
+            except FileNotFoundError:
+                pass  # Removed by another worker
@@ -0,0 +1,440 @@
+import os
+import json
+import time
+import zlib
+import struct
+import threading
+from datetime import datetime, timedelta
+from storage import INSERT_COLUMNS, UPSERT_COLUMNS
+
+# Record: header (payload length, CRC-32 of the payload) + payload.
+# Payload: reading key (16 random bytes, assigned when first spooled, so
+# replays of the record are recognized by upsert_many), timestamp
+# (microseconds since 1970, naive local time), the three sensors as float64
+# (NaN = None) and the three flags as int8 (-1 = None).
+RECORD_HEADER = struct.Struct('<II')
+ROW_FORMAT = struct.Struct('<16sqdddbbb')
+KEY_BYTES = 16
+RECORD_SIZE = RECORD_HEADER.size + ROW_FORMAT.size
+
+EPOCH = datetime(1970, 1, 1)
+ONE_MICROSECOND = timedelta(microseconds=1)
+
+SEGMENT_PREFIX = 'segment-'
+SEGMENT_SUFFIX = '.log'
+CHECKPOINT_FILE = 'checkpoint.json'
+
+# What append() does when the spool reaches max_bytes
+POLICIES = ('block', 'drop_newest', 'drop_oldest')
+
+class SpoolFull(Exception):
+    """Raised by append() under the 'block' policy when block_timeout expires"""
+
+def _float(value):
+    return float('nan') if value is None else float(value)
+
+def _flag(value):
+    return -1 if value is None else int(value)
+
+def new_reading_key():
+    """Random reading key (hex), as encode_row assigns to readings without one"""
+    return os.urandom(KEY_BYTES).hex()
+
+def encode_row(row):
+    """
+    Pack a reading (dict or tuple in UPSERT_COLUMNS order, the key optional) into a
+    checksummed record; readings without a key get a new random one
+    """
+    if isinstance(row, dict):
+        row = tuple(row.get(column) for column in UPSERT_COLUMNS)
+    elif len(row) == len(INSERT_COLUMNS):
+        row = tuple(row) + (None,)
+    timestamp, humidity, temperature, light, btn_p, btn_k, relay_status, key = row
+    if timestamp is None:
+        timestamp = datetime.now()
+    payload = ROW_FORMAT.pack(
+        bytes.fromhex(key) if key else os.urandom(KEY_BYTES),
+        (timestamp - EPOCH) // ONE_MICROSECOND,
+        _float(humidity), _float(temperature), _float(light),
+        _flag(btn_p), _flag(btn_k), _flag(relay_status)
+    )
+    return RECORD_HEADER.pack(len(payload), zlib.crc32(payload)) + payload
+
+def decode_row(payload):
+    """Inverse of encode_row (payload without the header); returns a tuple in UPSERT_COLUMNS order"""
+    key, microseconds, humidity, temperature, light, btn_p, btn_k, relay_status = ROW_FORMAT.unpack(payload)
+    return (
+        EPOCH + timedelta(microseconds=microseconds),
+        None if humidity != humidity else humidity,
+        None if temperature != temperature else temperature,
+        None if light != light else light,
+        None if btn_p < 0 else btn_p,
+        None if btn_k < 0 else btn_k,
+        None if relay_status < 0 else relay_status,
+        key.hex()
+    )
+
+def scan_records(f, offset, limit=None, max_records=None, decode=True):
+    """
+    Read valid records from an open segment starting at offset.
+
+    Stops at the end of the data (or limit bytes), at a truncated record or
+    at a record whose checksum does not match. Returns (rows, end_offset,
+    corrupt), where corrupt tells that a bad record (not a clean end) was hit.
+    With decode=False only the checksums are verified (rows stays empty).
+    """
+    f.seek(offset)
+    rows = []
+    while max_records is None or len(rows) < max_records:
+        if limit is not None and offset + RECORD_HEADER.size > limit:
+            return rows, offset, False
+        header = f.read(RECORD_HEADER.size)
+        if len(header) < RECORD_HEADER.size:
+            return rows, offset, bool(header)
+        length, crc = RECORD_HEADER.unpack(header)
+        if length != ROW_FORMAT.size:
+            return rows, offset, True
+        payload = f.read(length)
+        if len(payload) < length or zlib.crc32(payload) != crc:
+            return rows, offset, True
+        if decode:
+            rows.append(decode_row(payload))
+        offset += RECORD_HEADER.size + length
+    return rows, offset, False
+
+class Spool:
+    """
+    Durable, append-only local buffer between the readings producers and
+    the database.
+
+    Readings are appended to segment files (segment-<n>.log) as fixed-size
+    checksummed records and written to the OS on every append; fsync runs
+    at most every fsync_interval seconds (0 = every append). A consumer reads
+    batches from the checkpoint with read_batch() and calls ack() once they
+    are committed; the checkpoint is persisted atomically and fully
+    acknowledged segments are deleted. After a crash or restart everything
+    after the checkpoint is delivered again (at-least-once), so the consumer
+    must write idempotently (DatabaseManager.upsert_many).
+
+    Memory use does not depend on the backlog: only the current batch is
+    held. Disk use is capped at max_bytes; when full, policy decides:
+        'block': append() waits for the consumer (backpressure), raising
+            SpoolFull after block_timeout seconds (None = wait forever)
+        'drop_newest': the new reading is discarded (append() returns False)
+        'drop_oldest': the oldest segment is discarded to make room
+    A torn record at the end of the last segment (crash mid-write) is
+    truncated when the spool is opened.
+    """
+
+    def __init__(self, directory, segment_bytes=16 * 2**20, max_bytes=1024 * 2**20, policy='block',
+                 block_timeout=None, fsync_interval=1.0):
+        if policy not in POLICIES:
+            raise ValueError(f"Unknown spool policy: {policy} (expected one of {POLICIES})")
+        if max_bytes < 2 * segment_bytes:
+            raise ValueError("max_bytes must hold at least two segments")
+        self.directory = directory
+        self.segment_bytes = segment_bytes
+        self.max_bytes = max_bytes
+        self.policy = policy
+        self.block_timeout = block_timeout
+        self.fsync_interval = fsync_interval
+        self.counters = {'appended': 0, 'acked': 0, 'dropped': 0, 'corrupt': 0, 'blocked_seconds': 0.0}
+        self._cond = threading.Condition()
+        self._last_fsync = time.monotonic()
+        self._reader = None  # (segment, file) kept open by read_batch
+        os.makedirs(directory, exist_ok=True)
+        self._open()
+
+    # --- Files ---------------------------------------------------------
+
+    def _segment_path(self, segment):
+        return os.path.join(self.directory, f"{SEGMENT_PREFIX}{segment:012d}{SEGMENT_SUFFIX}")
+
+    def _list_segments(self):
+        return sorted(
+            int(name[len(SEGMENT_PREFIX):-len(SEGMENT_SUFFIX)])
+            for name in os.listdir(self.directory)
+            if name.startswith(SEGMENT_PREFIX) and name.endswith(SEGMENT_SUFFIX)
+        )
+
+    def _load_checkpoint(self):
+        try:
+            with open(os.path.join(self.directory, CHECKPOINT_FILE)) as f:
+                checkpoint = json.load(f)
+            return checkpoint['segment'], checkpoint['offset']
+        except (FileNotFoundError, ValueError, KeyError):
+            return None
+
+    def _save_checkpoint(self):
+        path = os.path.join(self.directory, CHECKPOINT_FILE)
+        tmp_path = path + '.tmp'
+        with open(tmp_path, 'w') as f:
+            json.dump({'segment': self._ack[0], 'offset': self._ack[1]}, f)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, path)
+
+    def _open(self):
+        segments = self._list_segments()
+        checkpoint = self._load_checkpoint()
+        if checkpoint is None or (segments and checkpoint[0] < segments[0]):
+            checkpoint = (segments[0], 0) if segments else (0, 0)
+        self._ack = checkpoint
+
+        # Segments acknowledged before a crash but not yet deleted
+        for segment in segments:
+            if segment < checkpoint[0]:
+                os.remove(self._segment_path(segment))
+        segments = [segment for segment in segments if segment >= checkpoint[0]]
+
+        # Discard a torn tail of the last segment (crash in the middle of a write)
+        if segments:
+            last = segments[-1]
+            with open(self._segment_path(last), 'rb') as f:
+                _, end, corrupt = scan_records(f, 0, decode=False)
+            if corrupt:
+                self.counters['corrupt'] += 1
+                with open(self._segment_path(last), 'r+b') as f:
+                    f.truncate(end)
+        self._sizes = {segment: os.path.getsize(self._segment_path(segment)) for segment in segments}
+        self._start_segment(segments[-1] if segments else checkpoint[0])
+        if self._ack[0] in self._sizes:
+            self._ack = (self._ack[0], min(self._ack[1], self._sizes[self._ack[0]]))
+        else:
+            self._ack = (min(self._sizes), 0)
+
+    def _start_segment(self, segment):
+        self._active = segment
+        self._file = open(self._segment_path(segment), 'ab')
+        self._sizes.setdefault(segment, self._file.tell())
+
+    def _roll(self):
+        self._sync(force=True)
+        self._file.close()
+        self._start_segment(self._active + 1)
+
+    def _sync(self, force=False):
+        now = time.monotonic()
+        if force or now - self._last_fsync >= self.fsync_interval:
+            os.fsync(self._file.fileno())
+            self._last_fsync = now
+
+    def disk_bytes(self):
+        return sum(self._sizes.values())
+
+    def pending_bytes(self):
+        """Bytes appended but not yet acknowledged"""
+        return self.disk_bytes() - self._ack[1]
+
+    # --- Producer ------------------------------------------------------
+
+    def append(self, reading):
+        """Spool one reading. Returns False if it was dropped (drop_newest policy)."""
+        return self.append_many([reading]) == 1
+
+    def append_many(self, readings):
+        """Spool several readings with as few writes as possible. Returns how many were kept."""
+        data = b''.join(encode_row(reading) for reading in readings)
+        # Each write must fit in one segment
+        step = max(self.segment_bytes // RECORD_SIZE, 1) * RECORD_SIZE
+        kept = 0
+        for start in range(0, len(data), step):
+            kept += self._write(data[start:start + step])
+        return kept
+
+    def _write(self, data):
+        records = len(data) // RECORD_SIZE
+        with self._cond:
+            if not self._make_room(len(data)):
+                self.counters['dropped'] += records
+                return 0
+            if self._sizes[self._active] + len(data) > self.segment_bytes and self._sizes[self._active]:
+                self._roll()
+            self._file.write(data)
+            self._file.flush()  # In the OS page cache: survives a crash of this process
+            self._sizes[self._active] += len(data)
+            self._sync(force=self.fsync_interval == 0)
+            self.counters['appended'] += records
+            self._cond.notify_all()
+        return records
+
+    def _make_room(self, size):
+        """Apply the full-spool policy (lock held). Returns False to drop the new data."""
+        if self.disk_bytes() + size <= self.max_bytes:
+            return True
+        if self.policy == 'drop_newest':
+            return False
+        if self.policy == 'drop_oldest':
+            while self.disk_bytes() + size > self.max_bytes:
+                if self._active == min(self._sizes):
+                    self._roll()
+                self._drop_oldest_segment()
+            return True
+
+        start = time.monotonic()
+        deadline = None if self.block_timeout is None else start + self.block_timeout
+        while self.disk_bytes() + size > self.max_bytes:
+            remaining = None if deadline is None else deadline - time.monotonic()
+            if remaining is not None and remaining <= 0:
+                self.counters['blocked_seconds'] += time.monotonic() - start
+                raise SpoolFull(f"Spool full ({self.disk_bytes()} bytes) for {self.block_timeout}s")
+            self._cond.wait(remaining)
+        self.counters['blocked_seconds'] += time.monotonic() - start
+        return True
+
+    def _drop_oldest_segment(self):
+        oldest = min(self._sizes)
+        offset = self._ack[1] if self._ack[0] == oldest else 0
+        self.counters['dropped'] += (self._sizes[oldest] - offset) // RECORD_SIZE
+        self._remove_segment(oldest)
+        self._ack = (min(self._sizes), 0)
+        self._save_checkpoint()
+
+    def _remove_segment(self, segment):
+        if self._reader is not None and self._reader[0] == segment:
+            self._reader[1].close()
+            self._reader = None
+        del self._sizes[segment]
+        try:
+            os.remove(self._segment_path(segment))
+        except FileNotFoundError:
+            pass
+
+    # --- Consumer ------------------------------------------------------
+
+    def read_batch(self, max_records=1000, timeout=None):
+        """
+        Return (rows, position) for up to max_records readings after the
+        checkpoint, waiting up to timeout seconds for data. Pass position to
+        ack() once the rows are safely stored; until then the same rows are
+        returned again.
+        """
+        with self._cond:
+            if timeout and not self.pending_bytes():
+                self._cond.wait(timeout)
+            segment, offset = self._ack
+            rows = []
+            while len(rows) < max_records and segment in self._sizes:
+                if self._reader is None or self._reader[0] != segment:
+                    if self._reader is not None:
+                        self._reader[1].close()
+                    self._reader = (segment, open(self._segment_path(segment), 'rb'))
+                limit = self._sizes[segment]
+                chunk, offset, corrupt = scan_records(self._reader[1], offset, limit, max_records - len(rows))
+                rows += chunk
+                if corrupt:
+                    # Damaged record inside a closed segment: skip the rest of it
+                    self.counters['corrupt'] += 1
+                    offset = limit
+                if offset < limit or segment == self._active:
+                    break
+                segment, offset = segment + 1, 0
+            return rows, (segment, offset)
+
+    def ack(self, position):
+        """Mark everything before position as stored; persists the checkpoint"""
+        with self._cond:
+            segment, offset = position
+            if (segment, offset) <= self._ack:
+                return  # Already acknowledged, or its segment was dropped meanwhile
+            acked = 0
+            for old in sorted(self._sizes):
+                if old >= segment:
+                    break
+                start = self._ack[1] if old == self._ack[0] else 0
+                acked += (self._sizes[old] - start) // RECORD_SIZE
+                self._remove_segment(old)
+            start = self._ack[1] if segment == self._ack[0] else 0
+            acked += (offset - start) // RECORD_SIZE
+            self._ack = (segment, offset)
+            self._save_checkpoint()
+            self.counters['acked'] += acked
+            self._cond.notify_all()
+
+    def stats(self):
+        with self._cond:
+            return dict(
+                self.counters,
+                pending=self.pending_bytes() // RECORD_SIZE,
+                pending_bytes=self.pending_bytes(),
+                disk_bytes=self.disk_bytes(),
+                segments=len(self._sizes)
+            )
+
+    def close(self):
+        with self._cond:
+            self._sync(force=True)
+            self._file.close()
+            if self._reader is not None:
+                self._reader[1].close()
+                self._reader = None
+
+class SpoolDrainer(threading.Thread):
+    """
+    Background thread that moves spooled readings into the database with
+    DatabaseManager.upsert_many, so producers never wait on the database.
+
+    On a database error the connection is dropped and the batch retried
+    after an exponential backoff (up to max_backoff seconds); nothing is
+    acknowledged until its commit succeeded.
+    """
+
+    def __init__(self, spool, db_factory, batch_size=1000, poll_interval=1.0, max_backoff=60.0):
+        super().__init__(name='spool-drainer', daemon=True)
+        self.spool = spool
+        self.db_factory = db_factory
+        self.batch_size = batch_size
+        self.poll_interval = poll_interval
+        self.max_backoff = max_backoff
+        self.counters = {'batches': 0, 'rows': 0, 'inserted': 0, 'duplicates': 0, 'errors': 0}
+        self.last_error = None
+        self._stop_event = threading.Event()
+        self._db = None
+
+    def drain_once(self):
+        """Write one batch; returns the number of rows written (raises on database errors)"""
+        rows, position = self.spool.read_batch(self.batch_size, timeout=self.poll_interval)
+        if not rows:
+            return 0
+        if self._db is None:
+            db = self.db_factory()
+            db.connect()
+            self._db = db
+        result = self._db.upsert_many(rows, batch_size=len(rows))
+        self.spool.ack(position)
+        self.counters['batches'] += 1
+        self.counters['rows'] += result['rows']
+        self.counters['inserted'] += result['inserted']
+        self.counters['duplicates'] += result['duplicates']
+        return len(rows)
+
+    def run(self):
+        backoff = 0.5
+        while not self._stop_event.is_set():
+            try:
+                self.drain_once()
+                backoff = 0.5
+            except Exception as e:
+                self.counters['errors'] += 1
+                self.last_error = str(e)
+                print(f"Spool drain failed, retrying in {backoff:.1f}s: {e}")
+                self._disconnect()
+                self._stop_event.wait(backoff)
+                backoff = min(backoff * 2, self.max_backoff)
+        self._disconnect()
+
+    def _disconnect(self):
+        if self._db is not None:
+            try:
+                self._db.disconnect()
+            except Exception:
+                pass
+            self._db = None
+
+    def stop(self, timeout=None):
+        """Stop after the current batch; undelivered rows stay in the spool"""
+        self._stop_event.set()
+        self.join(timeout)
+
+    def stats(self):
+        return dict(self.counters, last_error=self.last_error)
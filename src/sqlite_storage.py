@@ -0,0 +1,515 @@
+import os
+import time
+import sqlite3
+from datetime import datetime, timedelta
+from storage import (
+    SensorStorage, INSERT_COLUMNS, UPSERT_COLUMNS, READING_COLUMNS, AGGREGATE_SENSORS, AGGREGATE_INTERVALS,
+    aggregate_columns, frame_from_values
+)
+
+# Timestamps ficam em INTEGER (microssegundos desde 1970, hora local sem fuso, como
+# no Oracle): comparações e agrupamentos por intervalo são aritmética inteira
+EPOCH = datetime(1970, 1, 1)
+ONE_MICROSECOND = timedelta(microseconds=1)
+BUCKET_MICROSECONDS = {'hour': 3600 * 10**6, 'day': 86400 * 10**6}
+
+INSERT_SQL = f"""
+    INSERT INTO sensor_data ({', '.join(INSERT_COLUMNS)})
+    VALUES ({', '.join('?' for _ in INSERT_COLUMNS)})
+"""
+
+# INSERT idempotente: ignora leituras com reading_key já gravada (índice único
+# uq_sensor_data_reading_key, como o MERGE do Oracle)
+UPSERT_SQL = f"""
+    INSERT OR IGNORE INTO sensor_data ({', '.join(UPSERT_COLUMNS)})
+    VALUES ({', '.join('?' for _ in UPSERT_COLUMNS)})
+"""
+
+def to_microseconds(value):
+    """datetime (ou pandas Timestamp) -> microssegundos desde 1970; None passa direto."""
+    if value is None:
+        return None
+    return (value - EPOCH) // ONE_MICROSECOND
+
+def from_microseconds(value):
+    if value is None:
+        return None
+    return EPOCH + timedelta(microseconds=value)
+
+class SQLiteStorage(SensorStorage):
+    """
+    Backend local embutido (SQLite), para nós de borda e testes de desempenho
+    sem Oracle Instant Client.
+
+    Mesma interface do DatabaseManager. Diferenças: não há particionamento
+    (delete_range usa DELETE) nem tabelas de rollup; aggregate agrupa as
+    leituras direto pelo índice de timestamp.
+    """
+
+    def __init__(self, path=None, pooled=None):
+        """
+        Args:
+            path: Arquivo do banco (padrão: DB_SQLITE_PATH do .env ou data/sensor_data.db);
+                ':memory:' cria um banco temporário em memória
+            pooled: Ignorado (compatibilidade com DatabaseManager)
+        """
+        self.path = path or os.getenv('DB_SQLITE_PATH', 'data/sensor_data.db')
+        self.pooled = False
+        self.connection = None
+        self.cursor = None
+
+    def connect(self):
+        """Abre o arquivo do banco (criando o diretório se preciso)."""
+        try:
+            if self.path != ':memory:':
+                directory = os.path.dirname(self.path)
+                if directory:
+                    os.makedirs(directory, exist_ok=True)
+            # check_same_thread=False: a ingestão grava a partir de uma thread de trabalho
+            self.connection = sqlite3.connect(self.path, check_same_thread=False)
+            if self.path != ':memory:':
+                # WAL: leitores (dashboard) não bloqueiam o escritor (ingestão) e vice-versa
+                self.connection.execute("PRAGMA journal_mode=WAL")
+                self.connection.execute("PRAGMA synchronous=NORMAL")
+            self.cursor = self.connection.cursor()
+            # Um arquivo novo já sai com o esquema (não há DBA para criá-lo como no Oracle)
+            self._create_schema()
+        except sqlite3.Error as error:
+            print(f"Erro ao conectar ao banco de dados: {error}")
+            raise
+
+    def disconnect(self):
+        """Fecha a conexão com o banco de dados."""
+        try:
+            if self.cursor:
+                self.cursor.close()
+            if self.connection:
+                self.connection.close()
+        except sqlite3.Error as error:
+            print(f"Erro ao fechar conexão: {error}")
+        finally:
+            self.cursor = None
+            self.connection = None
+
+    def health_check(self):
+        status = {'pooled': False, 'connected': False, 'path': self.path}
+        if self.connection is not None:
+            try:
+                self.connection.execute("SELECT 1")
+                status['connected'] = True
+            except sqlite3.Error as error:
+                status['error'] = str(error)
+        return status
+
+    def create_tables(self, partitioning=None):
+        """Cria a tabela e o índice se não existirem (partitioning é ignorado no SQLite)."""
+        try:
+            self._create_schema()
+            print("Tabelas criadas/verificadas com sucesso!")
+        except sqlite3.Error as error:
+            print(f"Erro ao criar tabelas: {error}")
+            raise
+
+    def _create_schema(self):
+        self.cursor.execute("""
+            CREATE TABLE IF NOT EXISTS sensor_data (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                timestamp INTEGER,
+                humidity REAL,
+                temperature REAL,
+                light REAL,
+                btn_p INTEGER,
+                btn_k INTEGER,
+                relay_status INTEGER,
+                reading_key TEXT
+            )
+        """)
+        # Banco anterior ao upsert por reading_key
+        columns = [row[1] for row in self.cursor.execute("PRAGMA table_info(sensor_data)")]
+        if 'reading_key' not in columns:
+            self.cursor.execute("ALTER TABLE sensor_data ADD COLUMN reading_key TEXT")
+        self.cursor.execute("""
+            CREATE UNIQUE INDEX IF NOT EXISTS uq_sensor_data_reading_key
+            ON sensor_data(reading_key)
+        """)
+        # (timestamp, id): janelas de tempo e paginação por keyset no mesmo índice
+        self.cursor.execute("""
+            CREATE INDEX IF NOT EXISTS idx_sensor_data_ts_id
+            ON sensor_data(timestamp, id)
+        """)
+        self.connection.commit()
+
+    def _to_bind(self, reading):
+        row = self._reading_to_row(reading)
+        return (to_microseconds(row[0]),) + row[1:]
+
+    def insert_sensor_data(self, humidity, temperature, light, btn_p, btn_k, relay_status, timestamp=None):
+        """Insere dados dos sensores no banco."""
+        try:
+            row = (timestamp, humidity, temperature, light, btn_p, btn_k, relay_status)
+            self.cursor.execute(INSERT_SQL, self._to_bind(row))
+            self.connection.commit()
+        except sqlite3.Error as error:
+            print(f"Erro ao inserir dados: {error}")
+            raise
+
+    def insert_many(self, readings, batch_size=1000, commit_every=1):
+        """Insere leituras em lote (executemany); mesmos parâmetros e retorno do DatabaseManager."""
+        if batch_size < 1:
+            raise ValueError("batch_size deve ser maior que zero")
+
+        total_rows = 0
+        batches = 0
+        start = time.perf_counter()
+
+        try:
+            batch = []
+            for reading in readings:
+                batch.append(self._to_bind(reading))
+                if len(batch) >= batch_size:
+                    self.cursor.executemany(INSERT_SQL, batch)
+                    total_rows += len(batch)
+                    batches += 1
+                    batch = []
+                    if commit_every and batches % commit_every == 0:
+                        self.connection.commit()
+
+            if batch:
+                self.cursor.executemany(INSERT_SQL, batch)
+                total_rows += len(batch)
+                batches += 1
+
+            self.connection.commit()
+        except sqlite3.Error as error:
+            print(f"Erro ao inserir dados em lote: {error}")
+            raise
+
+        elapsed = time.perf_counter() - start
+        rows_per_second = total_rows / elapsed if elapsed > 0 else float('inf')
+        print(f"{total_rows} registros inseridos em {elapsed:.2f}s ({rows_per_second:.0f} registros/s)")
+        return {
+            'rows': total_rows,
+            'batches': batches,
+            'seconds': elapsed,
+            'rows_per_second': rows_per_second
+        }
+
+    def upsert_many(self, readings, batch_size=1000):
+        """Insere em lote ignorando reading_keys já gravadas (idempotente); um commit no final."""
+        if batch_size < 1:
+            raise ValueError("batch_size deve ser maior que zero")
+
+        total_rows = 0
+        inserted = 0
+        start = time.perf_counter()
+
+        try:
+            batch = []
+            for reading in readings:
+                row = self._reading_to_upsert_row(reading)
+                batch.append((to_microseconds(row[0]),) + row[1:])
+                if len(batch) >= batch_size:
+                    self.cursor.executemany(UPSERT_SQL, batch)
+                    inserted += self.cursor.rowcount
+                    total_rows += len(batch)
+                    batch = []
+
+            if batch:
+                self.cursor.executemany(UPSERT_SQL, batch)
+                inserted += self.cursor.rowcount
+                total_rows += len(batch)
+
+            self.connection.commit()
+        except sqlite3.Error as error:
+            print(f"Erro ao inserir dados em lote (upsert): {error}")
+            raise
+
+        return {
+            'rows': total_rows,
+            'inserted': inserted,
+            'duplicates': total_rows - inserted,
+            'seconds': time.perf_counter() - start
+        }
+
+    def rebuild_rollups(self, since=None, until=None):
+        """Sem tabelas de rollup no SQLite: nada a recalcular."""
+
+    @staticmethod
+    def _build_readings_query(since=None, until=None, columns=None, limit=None, descending=False,
+                              after_id=None, seek=None):
+        """Monta o SELECT (e os binds) das consultas de leitura."""
+        if columns is None:
+            columns = READING_COLUMNS
+        columns = [column.lower() for column in columns]
+        invalid = [column for column in columns if column not in READING_COLUMNS]
+        if invalid:
+            raise ValueError(f"Colunas inválidas: {invalid}")
+
+        conditions = []
+        params = {}
+        if since is not None:
+            conditions.append("timestamp >= :since")
+            params['since'] = to_microseconds(since)
+        if until is not None:
+            conditions.append("timestamp <= :until")
+            params['until'] = to_microseconds(until)
+        if after_id is not None:
+            conditions.append("id > :after_id")
+            params['after_id'] = int(after_id)
+        if seek is not None:
+            # Keyset em (timestamp, id), resolvido no índice idx_sensor_data_ts_id
+            op = "<" if descending else ">"
+            conditions.append(f"(timestamp, id) {op} (:seek_ts, :seek_id)")
+            params['seek_ts'], params['seek_id'] = to_microseconds(seek[0]), int(seek[1])
+
+        sql = f"SELECT {', '.join(columns)} FROM sensor_data"
+        if conditions:
+            sql += " WHERE " + " AND ".join(conditions)
+        direction = "DESC" if descending else "ASC"
+        sql += f" ORDER BY timestamp {direction}, id {direction}"
+        if limit is not None:
+            sql += " LIMIT :row_limit"
+            params['row_limit'] = int(limit)
+        return sql, params, columns
+
+    @staticmethod
+    def _rows_to_dicts(names, rows):
+        """Tuplas -> dicts com colunas em maiúsculas e TIMESTAMP como datetime."""
+        readings = [dict(zip(names, row)) for row in rows]
+        if 'TIMESTAMP' in names:
+            for reading in readings:
+                reading['TIMESTAMP'] = from_microseconds(reading['TIMESTAMP'])
+        return readings
+
+    def get_readings(self, since=None, until=None, columns=None, limit=None, descending=False,
+                     after_id=None, seek=None):
+        """Leituras da janela [since, until] (ver DatabaseManager.get_readings)."""
+        sql, params, columns = self._build_readings_query(since, until, columns, limit, descending, after_id, seek)
+        try:
+            self.cursor.execute(sql, params)
+            return self._rows_to_dicts([column.upper() for column in columns], self.cursor.fetchall())
+        except sqlite3.Error as error:
+            print(f"Erro ao recuperar dados: {error}")
+            raise
+
+    def _iter_row_chunks(self, since, until, columns, chunk_size):
+        if chunk_size < 1:
+            raise ValueError("chunk_size deve ser maior que zero")
+        sql, params, columns = self._build_readings_query(since, until, columns)
+        names = [column.upper() for column in columns]
+        cursor = self.connection.cursor()
+        try:
+            cursor.execute(sql, params)
+            while True:
+                rows = cursor.fetchmany(chunk_size)
+                if not rows:
+                    break
+                yield names, rows
+        except sqlite3.Error as error:
+            print(f"Erro ao recuperar dados: {error}")
+            raise
+        finally:
+            cursor.close()
+
+    def iter_readings(self, since=None, until=None, columns=None, chunk_size=1000,
+                      arraysize=None, prefetchrows=None):
+        """Gera as leituras em blocos de dicts (arraysize/prefetchrows não se aplicam ao SQLite)."""
+        for names, rows in self._iter_row_chunks(since, until, columns, chunk_size):
+            yield self._rows_to_dicts(names, rows)
+
+    def iter_reading_frames(self, since=None, until=None, columns=None, chunk_size=10000,
+                            arraysize=None, prefetchrows=None):
+        """Gera as leituras em blocos como pandas DataFrames."""
+        import pandas as pd
+
+        for names, rows in self._iter_row_chunks(since, until, columns, chunk_size):
+            frame = pd.DataFrame.from_records(rows, columns=names)
+            if 'TIMESTAMP' in frame:
+                frame['TIMESTAMP'] = pd.to_datetime(frame['TIMESTAMP'], unit='us')
+            yield frame
+
+    def get_readings_frame(self, since=None, until=None, columns=None, chunk_size=50000, after_id=None):
+        """Leituras em colunas NumPy tipadas (mesmo formato do DatabaseManager)."""
+        import numpy as np
+
+        sql, params, columns = self._build_readings_query(since, until, columns, after_id=after_id)
+        cursor = self.connection.cursor()
+        try:
+            cursor.execute(sql, params)
+            blocks = []
+            while True:
+                rows = cursor.fetchmany(chunk_size)
+                if not rows:
+                    break
+                # None vira NaN na conversão para float64
+                blocks.append(np.array(rows, dtype=np.float64))
+        except sqlite3.Error as error:
+            print(f"Erro ao recuperar dados: {error}")
+            raise
+        finally:
+            cursor.close()
+
+        values = np.concatenate(blocks) if blocks else np.empty((0, len(columns)))
+        return frame_from_values(values, columns)
+
+    def get_timestamp_range(self):
+        """Retorna (menor, maior) timestamp da tabela, ou (None, None) se vazia."""
+        try:
+            self.cursor.execute("SELECT MIN(timestamp), MAX(timestamp) FROM sensor_data")
+            low, high = self.cursor.fetchone()
+            return from_microseconds(low), from_microseconds(high)
+        except sqlite3.Error as error:
+            print(f"Erro ao recuperar intervalo de datas: {error}")
+            raise
+
+    def get_max_id(self):
+        """Retorna o maior id da tabela (0 se vazia)."""
+        try:
+            self.cursor.execute("SELECT COALESCE(MAX(id), 0) FROM sensor_data")
+            return int(self.cursor.fetchone()[0])
+        except sqlite3.Error as error:
+            print(f"Erro ao recuperar último id: {error}")
+            raise
+
+    def count_readings(self, max_id=None):
+        """Retorna o número de leituras (só as com id <= max_id, se informado)."""
+        try:
+            if max_id is None:
+                self.cursor.execute("SELECT COUNT(*) FROM sensor_data")
+            else:
+                self.cursor.execute("SELECT COUNT(*) FROM sensor_data WHERE id <= ?", (int(max_id),))
+            return int(self.cursor.fetchone()[0])
+        except sqlite3.Error as error:
+            print(f"Erro ao contar leituras: {error}")
+            raise
+
+    def aggregate(self, bucket='day', since=None, until=None, use_rollups=True):
+        """
+        Estatísticas por dia ou hora, agrupadas no SQLite (use_rollups é ignorado).
+        Mesmo DataFrame do DatabaseManager.aggregate; o desvio padrão (amostral) é
+        calculado a partir da soma e da soma dos quadrados.
+        """
+        import numpy as np
+        import pandas as pd
+
+        if bucket not in AGGREGATE_INTERVALS:
+            raise ValueError(f"bucket deve ser um de {list(AGGREGATE_INTERVALS)}")
+        size = BUCKET_MICROSECONDS[bucket]
+
+        select_list = [f"(timestamp / {size}) * {size}", "COUNT(*)"]
+        for sensor in AGGREGATE_SENSORS:
+            select_list += [
+                f"AVG({sensor})", f"MIN({sensor})", f"MAX({sensor})",
+                f"COUNT({sensor})", f"SUM({sensor})", f"SUM({sensor} * {sensor})"
+            ]
+        select_list += ["AVG(relay_status)", "SUM(relay_status)"]
+
+        conditions = ["timestamp IS NOT NULL"]
+        params = {}
+        if since is not None:
+            conditions.append("timestamp >= :since")
+            params['since'] = to_microseconds(since)
+        if until is not None:
+            conditions.append("timestamp <= :until")
+            params['until'] = to_microseconds(until)
+        sql = (
+            f"SELECT {', '.join(select_list)} FROM sensor_data"
+            f" WHERE {' AND '.join(conditions)}"
+            f" GROUP BY timestamp / {size} ORDER BY 1"
+        )
+
+        cursor = self.connection.cursor()
+        try:
+            cursor.execute(sql, params)
+            rows = cursor.fetchall()
+        except sqlite3.Error as error:
+            print(f"Erro ao agregar dados: {error}")
+            raise
+        finally:
+            cursor.close()
+
+        names = aggregate_columns()
+        values = np.array(rows, dtype=np.float64).reshape(len(rows), len(select_list))
+        frame = {'BUCKET': pd.to_datetime(values[:, 0].astype(np.int64), unit='us')}
+        frame['READINGS'] = values[:, 1].astype(np.int64)
+        for i, sensor in enumerate(AGGREGATE_SENSORS):
+            mean, low, high, count, total, sumsq = (values[:, 2 + 6 * i + k] for k in range(6))
+            with np.errstate(invalid='ignore', divide='ignore'):
+                variance = (sumsq - total * total / count) / (count - 1)
+            std = np.where(count > 1, np.sqrt(np.maximum(variance, 0)), np.nan)
+            for suffix, column in zip(('mean', 'min', 'max', 'std'), (mean, low, high, std)):
+                frame[f"{sensor.upper()}_{suffix}"] = column
+        frame['RELAY_STATUS_mean'] = values[:, -2]
+        frame['RELAY_STATUS_sum'] = values[:, -1]
+        return pd.DataFrame(frame, columns=names).set_index('BUCKET')
+
+    def update_reading(self, id, field, value):
+        """Atualiza um valor específico de uma leitura."""
+        field = field.lower()
+        if field not in INSERT_COLUMNS:
+            raise ValueError(f"Campo inválido: {field}")
+        if field == 'timestamp':
+            value = to_microseconds(value)
+        try:
+            self.cursor.execute(f"UPDATE sensor_data SET {field} = ? WHERE id = ?", (value, id))
+            self.connection.commit()
+            print(f"Registro {id} atualizado com sucesso!")
+        except sqlite3.Error as error:
+            print(f"Erro ao atualizar dados: {error}")
+            raise
+
+    def delete_reading(self, id):
+        """Deleta uma leitura específica."""
+        try:
+            self.cursor.execute("DELETE FROM sensor_data WHERE id = ?", (id,))
+            self.connection.commit()
+            print(f"Registro {id} deletado com sucesso!")
+        except sqlite3.Error as error:
+            print(f"Erro ao deletar registro: {error}")
+            raise
+
+    def delete_all_readings(self):
+        """Deleta todas as leituras (DELETE sem WHERE: o SQLite descarta as páginas de uma vez)."""
+        try:
+            self.cursor.execute("DELETE FROM sensor_data")
+            self.connection.commit()
+            print("Todos os registros foram deletados com sucesso!")
+        except sqlite3.Error as error:
+            print(f"Erro ao deletar registros: {error}")
+            raise
+
+    def truncate_all_readings(self):
+        """SQLite não tem TRUNCATE: o DELETE sem WHERE já descarta as páginas de uma vez."""
+        self.delete_all_readings()
+
+    def get_partitioning(self):
+        """SQLite não tem particionamento."""
+        return None
+
+    def get_partitions(self):
+        return []
+
+    def delete_range(self, since=None, until=None, mode='drop'):
+        """Deleta as leituras com since <= timestamp < until (mode é ignorado: sem partições)."""
+        if mode not in ('drop', 'truncate'):
+            raise ValueError("mode deve ser 'drop' ou 'truncate'")
+        conditions = []
+        params = {}
+        if since is not None:
+            conditions.append("timestamp >= :since")
+            params['since'] = to_microseconds(since)
+        if until is not None:
+            conditions.append("timestamp < :until")
+            params['until'] = to_microseconds(until)
+        sql = "DELETE FROM sensor_data"
+        if conditions:
+            sql += " WHERE " + " AND ".join(conditions)
+        try:
+            self.cursor.execute(sql, params)
+            rows = self.cursor.rowcount
+            self.connection.commit()
+            print(f"{rows} registros deletados.")
+            return {'rows': rows, 'dropped': [], 'truncated': []}
+        except sqlite3.Error as error:
+            print(f"Erro ao deletar intervalo: {error}")
+            raise
@@ -0,0 +1,314 @@
+import os
+import random
+import importlib
+from abc import ABC, abstractmethod
+from dotenv import load_dotenv
+from datetime import datetime, timedelta
+import metrics
+
+# Ordem das colunas usada nos INSERTs (e nas tuplas aceitas por insert_many)
+INSERT_COLUMNS = ('timestamp', 'humidity', 'temperature', 'light', 'btn_p', 'btn_k', 'relay_status')
+
+# Tuplas aceitas por upsert_many: reading_key é a chave única da leitura, gerada
+# na origem (ex.: cada registro do spool em src/spool.py) e repetida nos reenvios
+UPSERT_COLUMNS = INSERT_COLUMNS + ('reading_key',)
+
+# Colunas que podem ser projetadas nas consultas de leitura
+READING_COLUMNS = ('id',) + INSERT_COLUMNS
+
+# Tipos NumPy de cada coluna em get_readings_frame (timestamp vira datetime64)
+FRAME_DTYPES = {
+    'id': 'int64',
+    'humidity': 'float64',
+    'temperature': 'float64',
+    'light': 'float64',
+    'btn_p': 'int8',
+    'btn_k': 'int8',
+    'relay_status': 'int8'
+}
+
+# Sensores contínuos agregados por aggregate() e granularidades suportadas
+AGGREGATE_SENSORS = ('temperature', 'humidity', 'light')
+AGGREGATE_INTERVALS = ('day', 'hour')
+
+# Backends disponíveis: nome -> (módulo, classe). Importados só quando escolhidos,
+# assim o backend local não depende do cx_Oracle nem do Instant Client.
+STORAGE_BACKENDS = {
+    'oracle': ('database', 'DatabaseManager'),
+    'sqlite': ('sqlite_storage', 'SQLiteStorage')
+}
+
+def get_storage_class(backend=None):
+    """Retorna a classe do backend (None usa DB_BACKEND do .env; padrão: oracle)."""
+    # Carrega o .env (DB_BACKEND e as demais configurações) na primeira escolha de
+    # backend, não ao importar; como antes, o .env prevalece sobre o ambiente
+    load_dotenv(override=True)
+    backend = (backend or os.getenv('DB_BACKEND') or 'oracle').strip().lower()
+    if backend not in STORAGE_BACKENDS:
+        raise ValueError(f"Backend inválido: {backend} (use {', '.join(STORAGE_BACKENDS)})")
+    module_name, class_name = STORAGE_BACKENDS[backend]
+    return getattr(importlib.import_module(module_name), class_name)
+
+def get_storage(backend=None, **kwargs):
+    """Cria o gerenciador de armazenamento configurado (kwargs vão para o construtor)."""
+    return get_storage_class(backend)(**kwargs)
+
+def generate_random_data():
+    """Gera dados aleatórios simulando sensores."""
+    return {
+        'humidity': round(random.uniform(30, 80), 2),
+        'temperature': round(random.uniform(10, 50), 2),
+        'light': round(random.uniform(0, 700), 2),
+        'btn_p': random.choice([0, 1]),
+        'btn_k': random.choice([0, 1]),
+        'relay_status': random.choice([0, 1])
+    }
+
+def aggregate_columns():
+    """Nomes das colunas do DataFrame de aggregate() (BUCKET vira o índice)."""
+    names = ['BUCKET', 'READINGS']
+    for sensor in AGGREGATE_SENSORS:
+        names += [f"{sensor.upper()}_{suffix}" for suffix in ('mean', 'min', 'max', 'std')]
+    names += ['RELAY_STATUS_mean', 'RELAY_STATUS_sum']
+    return names
+
+def frame_from_values(values, columns):
+    """
+    Monta o DataFrame de get_readings_frame a partir de uma matriz float64
+    (uma coluna por item de columns; timestamp em microssegundos desde 1970,
+    NULL como NaN).
+    """
+    import numpy as np
+    import pandas as pd
+
+    frame = {}
+    for i, column in enumerate(columns):
+        raw = values[:, i]
+        if column == 'timestamp':
+            # Microssegundos -> datetime64[ns]; NULL (NaN) vira NaT
+            nanoseconds = np.where(np.isnan(raw), 0, raw).astype(np.int64) * 1000
+            stamps = nanoseconds.view('datetime64[ns]')
+            stamps[np.isnan(raw)] = np.datetime64('NaT')
+            frame[column.upper()] = stamps
+        elif FRAME_DTYPES[column].startswith('int'):
+            frame[column.upper()] = np.nan_to_num(raw, nan=0).astype(FRAME_DTYPES[column])
+        else:
+            frame[column.upper()] = np.ascontiguousarray(raw)
+    return pd.DataFrame(frame, copy=False)
+
+def page_readings(get_readings, page_size=20, after=None, before=None, since=None, until=None, columns=None,
+                  descending=True):
+    """
+    Paginação por keyset em (timestamp, id) sobre uma função com a assinatura
+    de get_readings (ver SensorStorage.get_page; archive.load_page a usa sobre
+    o arquivo colunar mais o banco).
+    """
+    if page_size < 1:
+        raise ValueError("page_size deve ser maior que zero")
+    if after is not None and before is not None:
+        raise ValueError("Use after ou before, não os dois")
+    if columns is not None:
+        columns = list(dict.fromkeys(['id', 'timestamp'] + [column.lower() for column in columns]))
+    
+    if before is None:
+        rows = get_readings(since, until, columns, limit=page_size + 1, descending=descending, seek=after)
+        has_prev, has_next = after is not None, len(rows) > page_size
+        rows = rows[:page_size]
+    else:
+        # Página anterior: percorre na ordem inversa a partir da chave e desinverte
+        rows = get_readings(since, until, columns, limit=page_size + 1, descending=not descending, seek=before)
+        has_prev, has_next = len(rows) > page_size, True
+        rows = rows[:page_size][::-1]
+    
+    return {
+        'rows': rows,
+        'prev': (rows[0]['TIMESTAMP'], rows[0]['ID']) if rows and has_prev else None,
+        'next': (rows[-1]['TIMESTAMP'], rows[-1]['ID']) if rows and has_next else None
+    }
+
+class SensorStorage(ABC):
+    """
+    Interface de armazenamento das leituras dos sensores.
+
+    Implementada por DatabaseManager (Oracle, database.py) e SQLiteStorage
+    (banco local embutido, sqlite_storage.py); use get_storage() para obter o
+    backend configurado em DB_BACKEND. Leituras são dicts com as chaves de
+    INSERT_COLUMNS ou tuplas nessa ordem; as consultas retornam as colunas em
+    maiúsculas.
+
+    Com METRICS_ENABLED, os métodos públicos de cada backend são
+    instrumentados (latência, linhas, bytes e round trips; ver metrics.py)
+    quando o primeiro objeto do backend é criado, não ao importar o módulo.
+    """
+
+    def __new__(cls, *args, **kwargs):
+        for klass in cls.__mro__[:cls.__mro__.index(SensorStorage)]:
+            metrics.instrument_storage(klass)
+        return super().__new__(cls)
+
+    def __enter__(self):
+        self.connect()
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.disconnect()
+
+    # Conexão e esquema
+
+    @abstractmethod
+    def connect(self):
+        """Abre a conexão com o armazenamento."""
+
+    @abstractmethod
+    def disconnect(self):
+        """Fecha a conexão (erros são apenas reportados)."""
+
+    @abstractmethod
+    def health_check(self):
+        """Retorna um dict com o estado da conexão ('connected' e detalhes do backend)."""
+
+    @abstractmethod
+    def create_tables(self, partitioning=None):
+        """Cria as tabelas necessárias se não existirem."""
+
+    # Escrita
+
+    @abstractmethod
+    def insert_sensor_data(self, humidity, temperature, light, btn_p, btn_k, relay_status, timestamp=None):
+        """Insere uma leitura (timestamp None = agora) e faz commit."""
+
+    @abstractmethod
+    def insert_many(self, readings, batch_size=1000, commit_every=1):
+        """Insere leituras em lote; retorna rows, batches, seconds e rows_per_second."""
+
+    @abstractmethod
+    def upsert_many(self, readings, batch_size=1000):
+        """Insere em lote ignorando reading_keys já gravadas; retorna rows, inserted, duplicates e seconds."""
+
+    @abstractmethod
+    def update_reading(self, id, field, value):
+        """Atualiza um valor específico de uma leitura."""
+
+    @abstractmethod
+    def delete_reading(self, id):
+        """Deleta uma leitura específica."""
+
+    @abstractmethod
+    def delete_all_readings(self):
+        """Deleta todas as leituras."""
+
+    @abstractmethod
+    def truncate_all_readings(self):
+        """Esvazia as tabelas de uma vez (no Oracle, TRUNCATE: DDL, sem rollback)."""
+
+    @abstractmethod
+    def delete_range(self, since=None, until=None, mode='drop'):
+        """Deleta as leituras com since <= timestamp < until; retorna rows, dropped e truncated."""
+
+    def apply_retention(self, days, mode='drop'):
+        """
+        Remove as leituras com mais de `days` dias (ver delete_range).
+
+        Returns:
+            dict de delete_range, com o limite usado em 'cutoff'
+        """
+        if days < 0:
+            raise ValueError("days deve ser maior ou igual a zero")
+        cutoff = datetime.now() - timedelta(days=days)
+        result = self.delete_range(until=cutoff, mode=mode)
+        result['cutoff'] = cutoff
+        return result
+
+    @abstractmethod
+    def rebuild_rollups(self, since=None, until=None):
+        """Recalcula as agregações mantidas pelo backend (se houver)."""
+
+    # Leitura
+
+    def get_all_readings(self):
+        """Recupera todas as leituras dos sensores."""
+        return self.get_readings()
+
+    @abstractmethod
+    def get_readings(self, since=None, until=None, columns=None, limit=None, descending=False,
+                     after_id=None, seek=None):
+        """Leituras da janela [since, until] como lista de dicts (seek: chave (timestamp, id), ver get_page)."""
+
+    def get_page(self, page_size=20, after=None, before=None, since=None, until=None, columns=None,
+                 descending=True):
+        """
+        Uma página de leituras com paginação por keyset em (timestamp, id).
+        
+        Cada página busca só page_size + 1 linhas a partir da chave (índice
+        idx_sensor_data_ts_id), então o custo não depende da posição da página
+        nem do tamanho da tabela.
+        
+        Args:
+            page_size: Leituras por página
+            after: Cursor 'next' da página atual (próxima página) ou None para a primeira
+            before: Cursor 'prev' da página atual (página anterior)
+            since, until, columns: Mesmos filtros de get_readings (ID e TIMESTAMP sempre vêm)
+            descending: Se True (padrão), da leitura mais recente para a mais antiga
+        
+        Returns:
+            dict com 'rows' (lista de dicts, como get_readings) e os cursores
+            'next' e 'prev' ((timestamp, id), ou None se não houver mais páginas)
+        """
+        return page_readings(self.get_readings, page_size, after, before, since, until, columns, descending)
+
+    @abstractmethod
+    def iter_readings(self, since=None, until=None, columns=None, chunk_size=1000,
+                      arraysize=None, prefetchrows=None):
+        """Gera as leituras em blocos (listas de dicts), com memória limitada."""
+
+    @abstractmethod
+    def iter_reading_frames(self, since=None, until=None, columns=None, chunk_size=10000,
+                            arraysize=None, prefetchrows=None):
+        """Gera as leituras em blocos como pandas DataFrames."""
+
+    @abstractmethod
+    def get_readings_frame(self, since=None, until=None, columns=None, chunk_size=50000, after_id=None):
+        """Leituras em colunas NumPy tipadas (ver frame_from_values)."""
+
+    @abstractmethod
+    def get_timestamp_range(self):
+        """Retorna (menor, maior) timestamp, ou (None, None) se vazio."""
+
+    @abstractmethod
+    def get_max_id(self):
+        """Retorna o maior id (0 se vazio)."""
+
+    @abstractmethod
+    def count_readings(self, max_id=None):
+        """Retorna o número de leituras (só as com id <= max_id, se informado)."""
+
+    @abstractmethod
+    def aggregate(self, bucket='day', since=None, until=None, use_rollups=True):
+        """Estatísticas por dia ou hora como DataFrame indexado por BUCKET (ver aggregate_columns)."""
+
+    @staticmethod
+    def _reading_to_row(reading):
+        """Converte uma leitura (dict ou tupla) para a tupla de bind do INSERT."""
+        if isinstance(reading, dict):
+            row = tuple(reading.get(column) for column in INSERT_COLUMNS)
+        else:
+            row = tuple(reading)
+            if len(row) != len(INSERT_COLUMNS):
+                raise ValueError(f"Leitura deve ter {len(INSERT_COLUMNS)} campos: {INSERT_COLUMNS}")
+        if row[0] is None:
+            row = (datetime.now(),) + row[1:]
+        return row
+
+    @classmethod
+    def _reading_to_upsert_row(cls, reading):
+        """Tupla de bind do upsert (ordem de UPSERT_COLUMNS); a reading_key é obrigatória."""
+        if isinstance(reading, dict):
+            key = reading.get('reading_key')
+        else:
+            reading = tuple(reading)
+            if len(reading) != len(UPSERT_COLUMNS):
+                raise ValueError(f"Leitura deve ter {len(UPSERT_COLUMNS)} campos: {UPSERT_COLUMNS}")
+            reading, key = reading[:-1], reading[-1]
+        if not key:
+            raise ValueError("upsert_many exige a reading_key de cada leitura")
+        return cls._reading_to_row(reading) + (str(key),)
@@ -0,0 +1,134 @@
+import time
+import threading
+import pandas as pd
+
+class TailCache:
+    """
+    In-process cache of sensor readings that refreshes incrementally.
+
+    Keeps the readings already loaded in a DataFrame plus a high-water mark on
+    the identity column (ID). Each refresh fetches only rows with a greater ID,
+    applies the transform (e.g. derived columns) to those new rows only and
+    appends them. The oldest readings are evicted once the row or memory cap is
+    exceeded. window() slices a time range out of the cached frame while the
+    cache still holds every row in that range.
+
+    Rows updated below the high-water mark are not picked up; call reset() to
+    force a full reload. Deletes are detected: the cache remembers how many
+    rows the table had up to the mark, and any change in that count (delete,
+    truncate and reload, a row committed late with a lower ID) triggers a
+    full reload. IDs never go back down after a delete, so the max ID alone
+    cannot tell. Counting scans the table, so it runs at most once every
+    verify_interval seconds (None: never), not on every refresh.
+
+    load(db), if given, returns the frame of a full (re)load instead of
+    db.get_readings_frame() (e.g. archive.load_history, so days purged into
+    the archive stay cached); later refreshes still fetch new rows by ID.
+    """
+
+    def __init__(self, transform=None, max_rows=None, max_bytes=None, verify_interval=60, load=None):
+        self.transform = transform
+        self.load = load
+        self.max_rows = max_rows
+        self.max_bytes = max_bytes
+        self.verify_interval = verify_interval
+        self.verified_at = None  # time.monotonic() of the last count check
+        self.frame = pd.DataFrame()
+        self.high_water_id = 0
+        self.high_water_timestamp = None
+        self.known_rows = 0
+        self.evicted_until = None  # Newest TIMESTAMP evicted by the caps
+        self._lock = threading.Lock()
+
+    def reset(self):
+        """Drop all cached rows so the next refresh reloads the table"""
+        with self._lock:
+            self.frame = pd.DataFrame()
+            self.high_water_id = 0
+            self.high_water_timestamp = None
+            self.known_rows = 0
+            self.evicted_until = None
+            self.verified_at = None
+
+    def window(self, since=None, until=None):
+        """
+        Cached rows with since <= TIMESTAMP <= until (a slice, no query), or
+        None when the window needs rows the cache never loaded or evicted
+        """
+        with self._lock:
+            frame, loaded, evicted_until = self.frame, self.high_water_id > 0, self.evicted_until
+        if not loaded or (evicted_until is not None and (since is None or since <= evicted_until)):
+            return None
+        stamps = frame['TIMESTAMP']
+        start = 0 if since is None else stamps.searchsorted(since, 'left')
+        stop = len(frame) if until is None else stamps.searchsorted(until, 'right')
+        return frame.iloc[start:stop]
+
+    def refresh(self, db):
+        """
+        Fetch rows newer than the high-water mark and return the cached frame.
+
+        The returned frame is replaced (never mutated) by later refreshes, so it
+        is safe to keep using it while another session refreshes the cache.
+        """
+        with self._lock:
+            if self.high_water_id and self._verify_due() and \
+                    db.count_readings(max_id=self.high_water_id) != self.known_rows:
+                # Rows below the mark were deleted (or the table reloaded): start over
+                self.frame = pd.DataFrame()
+                self.high_water_id = 0
+                self.high_water_timestamp = None
+                self.known_rows = 0
+                self.evicted_until = None
+            
+            full_load = not self.high_water_id
+            if full_load and self.load is not None:
+                new_rows = self.load(db)
+            else:
+                new_rows = db.get_readings_frame(after_id=self.high_water_id or None)
+            if new_rows.empty:
+                return self.frame
+            
+            if self.transform is not None:
+                new_rows = self.transform(new_rows)
+            
+            if self.frame.empty:
+                frame = new_rows
+            else:
+                frame = pd.concat([self.frame, new_rows], ignore_index=True)
+                # Late-arriving rows (backfills) may be older than the cached tail
+                if new_rows['TIMESTAMP'].min() < self.high_water_timestamp:
+                    frame = frame.sort_values('TIMESTAMP', kind='stable', ignore_index=True)
+            
+            self.high_water_id = int(new_rows['ID'].max())
+            if full_load and self.load is not None:
+                # Rows of the loader do not all come from the table (nor all of the table's rows)
+                self.known_rows = db.count_readings(max_id=self.high_water_id)
+            else:
+                self.known_rows += len(new_rows)
+            self.high_water_timestamp = frame['TIMESTAMP'].iloc[-1]
+            self.frame = self._evict(frame)
+            return self.frame
+
+    def _verify_due(self):
+        """Whether the count check is due (and if so, restart its interval)"""
+        if self.verify_interval is None:
+            return False
+        now = time.monotonic()
+        if self.verified_at is not None and now - self.verified_at < self.verify_interval:
+            return False
+        self.verified_at = now
+        return True
+
+    def _evict(self, frame):
+        """Drop the oldest rows beyond the row and memory caps"""
+        keep = len(frame)
+        if self.max_rows is not None:
+            keep = min(keep, self.max_rows)
+        if self.max_bytes is not None and len(frame):
+            bytes_per_row = frame.memory_usage(index=True).sum() / len(frame)
+            keep = min(keep, int(self.max_bytes // bytes_per_row))
+        if keep < len(frame):
+            self.evicted_until = frame['TIMESTAMP'].iloc[len(frame) - keep - 1]
+            frame = frame.iloc[len(frame) - keep:].reset_index(drop=True)
+        return frame
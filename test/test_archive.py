@@ -0,0 +1,84 @@
+from datetime import datetime, timedelta
+
+import pandas as pd
+import pytest
+
+from archive import ReadingArchive, load_history, load_page
+from sqlite_storage import SQLiteStorage
+
+START = datetime(2024, 1, 1)
+BOUNDARY = datetime(2024, 1, 4)  # Days before it are archived and purged
+ONE_MICROSECOND = timedelta(microseconds=1)
+
+@pytest.fixture
+def db(tmp_path):
+    storage = SQLiteStorage(path=str(tmp_path / 'sensor_data.db'))
+    storage.connect()
+    storage.create_tables()
+    # Five days, one reading every 20 minutes, the last one of each day at 23:40
+    storage.insert_many([
+        (START + timedelta(minutes=20 * i), 40.0 + i % 30, 25.0, None if i % 11 == 0 else 300.0, i % 2, 0, i % 3 % 2)
+        for i in range(5 * 72)
+    ])
+    yield storage
+    storage.disconnect()
+
+@pytest.fixture(params=['arrow', 'parquet'])
+def archived(db, tmp_path, request):
+    """(archive, full history as get_readings_frame returned it before the purge)"""
+    history = db.get_readings_frame()
+    archive = ReadingArchive(str(tmp_path / 'archive'), format=request.param)
+    result = archive.compact(db, until=BOUNDARY, purge=True)
+    assert result['purged'] == 3 * 72
+    assert db.count_readings() == 2 * 72
+    return archive, history
+
+def window(frame, since=None, until=None):
+    mask = pd.Series(True, index=frame.index)
+    if since is not None:
+        mask &= frame['TIMESTAMP'] >= since
+    if until is not None:
+        mask &= frame['TIMESTAMP'] <= until
+    return frame[mask].reset_index(drop=True)
+
+@pytest.mark.parametrize('since, until', [
+    (None, None),                                              # Whole history
+    (START + timedelta(days=2, hours=20), BOUNDARY + timedelta(hours=3)),  # Across the boundary
+    (BOUNDARY - timedelta(minutes=20), BOUNDARY),              # Last archived and first live reading
+    (START + timedelta(hours=5), BOUNDARY - ONE_MICROSECOND),  # Archive only
+    (BOUNDARY, None)                                           # Database only
+])
+def test_load_history_matches_the_data_before_the_purge(db, archived, since, until):
+    archive, history = archived
+    frame = load_history(db, archive, since, until)
+    pd.testing.assert_frame_equal(frame, window(history, since, until))
+
+def test_load_history_projects_columns(db, archived):
+    archive, history = archived
+    frame = load_history(db, archive, columns=['timestamp', 'humidity'])
+    assert list(frame.columns) == ['TIMESTAMP', 'HUMIDITY']
+    assert frame['HUMIDITY'].tolist() == history['HUMIDITY'].tolist()
+
+def test_load_history_sees_a_purge_made_by_another_archive_instance(db, tmp_path):
+    dashboard_archive = ReadingArchive(str(tmp_path / 'archive'))
+    assert dashboard_archive.archived_until() is None
+
+    ReadingArchive(str(tmp_path / 'archive')).compact(db, until=BOUNDARY, purge=True)
+
+    assert dashboard_archive.archived_until() == BOUNDARY
+    assert len(load_history(db, dashboard_archive)) == 5 * 72
+
+def test_load_page_walks_across_the_boundary(db, archived):
+    archive, history = archived
+    expected = history.sort_values(['TIMESTAMP', 'ID'], ascending=False)['ID'].tolist()
+    page = load_page(db, archive, page_size=50)
+    ids = [row['ID'] for row in page['rows']]
+    while page['next'] is not None:
+        page = load_page(db, archive, page_size=50, after=page['next'])
+        ids += [row['ID'] for row in page['rows']]
+    assert ids == expected
+
+    # Back from the last page to the first
+    while page['prev'] is not None:
+        page = load_page(db, archive, page_size=50, before=page['prev'])
+    assert [row['ID'] for row in page['rows']] == expected[:50]
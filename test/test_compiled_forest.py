@@ -0,0 +1,81 @@
+import numpy as np
+import pytest
+from sklearn.ensemble import RandomForestRegressor
+from sklearn.preprocessing import StandardScaler
+
+from compiled_forest import CompiledForest, exact_thresholds, export_forest
+
+FEATURES = ['humidity', 'temperature', 'light', 'btn_p', 'btn_k']
+
+@pytest.fixture(scope='module')
+def trained():
+    rng = np.random.default_rng(0)
+    X = np.column_stack([
+        rng.uniform(30, 80, 2000),
+        rng.uniform(10, 50, 2000),
+        rng.uniform(0, 700, 2000),
+        rng.integers(0, 2, 2000),
+        rng.integers(0, 2, 2000)
+    ])
+    y = ((X[:, 0] < 45) & (X[:, 3] + X[:, 4] > 0)).astype(float)
+    y = np.where(rng.random(2000) < 0.1, 1 - y, y)  # Noise, for deep trees
+    scaler = StandardScaler().fit(X)
+    model = RandomForestRegressor(n_estimators=20, max_depth=12, random_state=42).fit(scaler.transform(X), y)
+    return model, scaler, X
+
+def threshold_inputs(forest, X):
+    """Rows whose split feature sits exactly on, and one ulp around, each raw threshold"""
+    internal = np.isfinite(forest.threshold)
+    rows = []
+    for feature, threshold in zip(forest.feature[internal], forest.threshold[internal]):
+        for value in (np.nextafter(threshold, -np.inf), threshold, np.nextafter(threshold, np.inf)):
+            row = X[len(rows) % len(X)].copy()
+            row[feature] = value
+            rows.append(row)
+    return np.array(rows)
+
+def test_matches_sklearn_on_training_inputs(trained):
+    model, scaler, X = trained
+    forest = export_forest(model, FEATURES, scaler=scaler)
+    assert np.array_equal(forest.predict(X), model.predict(scaler.transform(X)))
+
+def test_matches_sklearn_on_exact_thresholds(trained):
+    model, scaler, X = trained
+    forest = export_forest(model, FEATURES, scaler=scaler)
+    edges = threshold_inputs(forest, X)
+    assert np.array_equal(forest.predict(edges), model.predict(scaler.transform(edges)))
+
+def test_predict_one_and_reading_match_batch(trained):
+    model, scaler, X = trained
+    forest = export_forest(model, FEATURES, scaler=scaler)
+    batch = forest.predict(X[:50])
+    assert [forest.predict_one(row) for row in X[:50]] == list(batch)
+    reading = dict(zip(FEATURES, X[0]))
+    assert forest.predict_reading(reading) == batch[0]
+
+def test_without_scaler_takes_scaled_inputs(trained):
+    model, scaler, X = trained
+    forest = export_forest(model, FEATURES)
+    X_scaled = scaler.transform(X)
+    assert not forest.scaler_folded
+    assert np.array_equal(forest.predict(X_scaled), model.predict(X_scaled))
+
+def test_save_and_load_round_trip(trained, tmp_path):
+    model, scaler, X = trained
+    forest = export_forest(model, FEATURES, scaler=scaler)
+    forest.save(str(tmp_path / 'forest'))
+    loaded = CompiledForest.load(str(tmp_path / 'forest'))
+    assert loaded.features == FEATURES
+    assert np.array_equal(loaded.predict(X), forest.predict(X))
+
+def test_exact_thresholds_is_the_largest_passing_value():
+    rng = np.random.default_rng(1)
+    threshold = rng.normal(size=500).astype(np.float32).astype(np.float64)
+    mean, scale = rng.uniform(-100, 100, 500), rng.uniform(0.1, 300, 500)
+    raw = exact_thresholds(threshold, mean, scale)
+
+    def passes(x):
+        return ((x - mean) / scale).astype(np.float32).astype(np.float64) <= threshold
+
+    assert passes(raw).all()
+    assert not passes(np.nextafter(raw, np.inf)).any()
@@ -0,0 +1,70 @@
+import os
+from datetime import datetime, timedelta
+
+from spool import RECORD_SIZE, Spool
+
+START = datetime(2024, 1, 1)
+
+def readings(count, start=0):
+    return [
+        (START + timedelta(minutes=i), 50.0 + i, 25.0, 300.0 if i % 4 else None, 1, 0, i % 2)
+        for i in range(start, start + count)
+    ]
+
+def segment_paths(directory):
+    return sorted(os.path.join(directory, name) for name in os.listdir(directory) if name.endswith('.log'))
+
+def test_torn_write_is_truncated_on_open(tmp_path):
+    spool = Spool(str(tmp_path), fsync_interval=0)
+    spool.append_many(readings(10))
+    spool.close()
+
+    # Crash in the middle of the next record: half of it reached the file
+    path = segment_paths(str(tmp_path))[-1]
+    with open(path, 'ab') as f:
+        f.write(b'\x20\x00\x00\x00' + b'\xff' * (RECORD_SIZE // 2))
+
+    spool = Spool(str(tmp_path), fsync_interval=0)
+    assert spool.counters['corrupt'] == 1
+    assert os.path.getsize(path) == 10 * RECORD_SIZE
+    rows, _ = spool.read_batch(100)
+    assert [row[:7] for row in rows] == readings(10)
+
+    # New records land right after the last complete one
+    spool.append_many(readings(5, start=10))
+    rows, position = spool.read_batch(100)
+    assert [row[:7] for row in rows] == readings(15)
+    spool.ack(position)
+    spool.close()
+
+def test_corrupted_checksum_at_the_tail_drops_only_that_record(tmp_path):
+    spool = Spool(str(tmp_path), fsync_interval=0)
+    spool.append_many(readings(3))
+    spool.close()
+
+    path = segment_paths(str(tmp_path))[-1]
+    with open(path, 'r+b') as f:
+        f.seek(3 * RECORD_SIZE - 1)
+        last = f.read(1)
+        f.seek(3 * RECORD_SIZE - 1)
+        f.write(bytes([last[0] ^ 0xff]))
+
+    spool = Spool(str(tmp_path), fsync_interval=0)
+    rows, _ = spool.read_batch(100)
+    assert [row[:7] for row in rows] == readings(2)
+    spool.close()
+
+def test_unacknowledged_rows_are_redelivered_with_the_same_keys(tmp_path):
+    spool = Spool(str(tmp_path), fsync_interval=0)
+    spool.append_many(readings(6))
+    first, position = spool.read_batch(4)
+    spool.ack(position)
+    pending, _ = spool.read_batch(100)
+    spool.close()  # Crash before the second batch was acknowledged
+
+    spool = Spool(str(tmp_path), fsync_interval=0)
+    again, _ = spool.read_batch(100)
+    assert again == pending
+    assert [row[:7] for row in first + again] == readings(6)
+    assert len({row[7] for row in first + again}) == 6
+    spool.close()
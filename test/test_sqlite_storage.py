@@ -0,0 +1,74 @@
+from datetime import datetime, timedelta
+
+import pytest
+
+from sqlite_storage import SQLiteStorage
+
+START = datetime(2024, 1, 1)
+
+@pytest.fixture
+def db(tmp_path):
+    storage = SQLiteStorage(path=str(tmp_path / 'sensor_data.db'))
+    storage.connect()
+    storage.create_tables()
+    # Two readings per timestamp, so the keyset has to break ties on ID
+    storage.insert_many([
+        (START + timedelta(minutes=20 * (i // 2)), 40.0 + i % 10, 25.0, 300.0, i % 2, 0, int(i % 3 == 0))
+        for i in range(95)
+    ])
+    yield storage
+    storage.disconnect()
+
+def keys(rows):
+    return [(row['TIMESTAMP'], row['ID']) for row in rows]
+
+def walk(db, page_size, **kwargs):
+    """All pages from the first one, following the 'next' cursors"""
+    pages = [db.get_page(page_size=page_size, **kwargs)]
+    while pages[-1]['next'] is not None:
+        pages.append(db.get_page(page_size=page_size, after=pages[-1]['next'], **kwargs))
+    return pages
+
+@pytest.mark.parametrize('descending', [True, False])
+def test_get_page_walks_every_reading_once_in_keyset_order(db, descending):
+    expected = keys(db.get_readings(descending=descending))
+    pages = walk(db, 10, descending=descending)
+
+    assert [len(page['rows']) for page in pages] == [10] * 9 + [5]
+    assert [key for page in pages for key in keys(page['rows'])] == expected
+    assert pages[0]['prev'] is None
+    assert pages[-1]['next'] is None
+
+def test_get_page_before_returns_the_previous_page(db):
+    pages = walk(db, 10)
+    for previous, page in zip(pages, pages[1:]):
+        back = db.get_page(page_size=10, before=page['prev'])
+        assert keys(back['rows']) == keys(previous['rows'])
+        assert back['next'] == previous['next']
+    assert db.get_page(page_size=10, before=pages[1]['prev'])['prev'] is None
+
+def test_get_page_page_size_multiple_of_rows_has_no_empty_last_page(db):
+    pages = walk(db, 19)
+    assert len(pages) == 5
+    assert all(page['rows'] for page in pages)
+
+def test_get_page_filters_window_and_projects_columns(db):
+    since, until = START + timedelta(hours=2), START + timedelta(hours=4) - timedelta(microseconds=1)
+    pages = walk(db, 4, since=since, until=until, columns=['humidity'])
+    rows = [row for page in pages for row in page['rows']]
+
+    assert len(rows) == 12
+    assert all(since <= row['TIMESTAMP'] <= until for row in rows)
+    assert set(rows[0]) == {'ID', 'TIMESTAMP', 'HUMIDITY'}
+
+def test_get_page_rejects_invalid_arguments(db):
+    page = db.get_page(page_size=5)
+    with pytest.raises(ValueError):
+        db.get_page(page_size=0)
+    with pytest.raises(ValueError):
+        db.get_page(page_size=5, after=page['next'], before=page['next'])
+
+def test_get_page_on_empty_table(tmp_path):
+    with SQLiteStorage(path=str(tmp_path / 'empty.db')) as storage:
+        storage.create_tables()
+        assert storage.get_page(page_size=10) == {'rows': [], 'prev': None, 'next': None}